@@ -0,0 +1,162 @@
+"""
+Agregação em uma passada dos recortes das telas (grouping sets).
+
+Um groupby por recorte (dia, banco, parceiro, digitador, tipo) refaz o
+hash das colunas e monta os grupos a cada vez. Aqui cada coluna de
+recorte vira códigos inteiros compactos uma única vez, sem hash: os
+códigos da category, o número do dia para datas e pd.factorize só para o
+que sobra. As medidas são convertidas para NumPy uma vez e cada recorte
+é um np.bincount por medida sobre os códigos.
+
+Contagens de distintos por grupo (CPFs, dias com produção) usam os mesmos
+códigos: cada par (grupo, valor) vira um inteiro, marcado numa matriz
+grupos x valores (ou deduplicado com pd.unique, se a matriz for grande
+demais) e contado por grupo.
+
+Funciona tanto sobre propostas (uma linha por proposta) quanto sobre o
+propostas_diario já somado (a medida qtd faz o papel da contagem).
+"""
+import numpy as np
+import pandas as pd
+
+# Até esse tanto de pares (grupo, valor) possíveis, os distintos são
+# marcados numa matriz de bool (1 byte por par) em vez de passar por hash
+LIMITE_MARCACAO = 64_000_000
+
+
+def _codigos(serie: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """(código de cada linha, rótulos); nulo = -1. Datas são agrupadas por dia."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy().astype("int64"), serie.cat.categories
+
+    if pd.api.types.is_datetime64_dtype(serie.dtype):
+        dias = serie.to_numpy().astype("datetime64[D]")
+        validos = ~np.isnat(dias)
+        if not validos.any():
+            return np.full(len(dias), -1, dtype="int64"), pd.DatetimeIndex([])
+        numeros = dias.view("int64")
+        primeiro = numeros[validos].min()
+        codigos = np.where(validos, numeros - primeiro, -1)
+        rotulos = np.arange(primeiro, numeros[validos].max() + 1).astype("datetime64[D]")
+        return codigos, pd.DatetimeIndex(rotulos.astype(serie.dtype))
+
+    codigos, rotulos = pd.factorize(serie, sort=True)
+    return codigos.astype("int64"), pd.Index(rotulos)
+
+
+def _medida(df: pd.DataFrame, coluna: str) -> np.ndarray:
+    # nulos somam zero, como no sum do pandas
+    return df[coluna].to_numpy(dtype="float64", na_value=0)
+
+
+def agregar_recortes(
+    df: pd.DataFrame,
+    recortes: list[str],
+    medidas: list[str],
+    distintos: dict[str, str] | None = None,
+) -> tuple[dict, dict]:
+    """
+    Soma as medidas por valor de cada coluna de recortes.
+
+    - distintos: {nome: coluna} para contar, em cada grupo, os valores
+      distintos (não nulos) da coluna; sai como a coluna nome
+
+    Devolve (totais, por_recorte):
+
+    - totais: {"linhas": linhas de df, medida: soma}
+    - por_recorte: {recorte: DataFrame indexado pelo valor do recorte com
+      linhas e as medidas}. Só valores presentes em df, em ordem; nulos
+      ficam de fora, como no groupby
+
+    As somas são acumuladas em float64 (np.bincount) e voltam a inteiro
+    quando a coluna é inteira: exatas enquanto o total em centavos cabe
+    em 2^53 (R$ 90 trilhões).
+    """
+    valores = {m: _medida(df, m) for m in medidas}
+    inteiras = {m for m in medidas if pd.api.types.is_integer_dtype(df[m].dtype)}
+    totais = {"linhas": len(df)}
+    for m, v in valores.items():
+        soma = v.sum()
+        totais[m] = int(round(soma)) if m in inteiras else float(soma)
+
+    memo = {}
+
+    def codigos_de(coluna):
+        if coluna not in memo:
+            memo[coluna] = _codigos(df[coluna])
+        return memo[coluna]
+
+    por_recorte = {}
+    for recorte in recortes:
+        codigos, rotulos = codigos_de(recorte)
+        # nulos vão para um grupo a mais, descartado no fim
+        grupos = len(rotulos)
+        codigos = np.where(codigos >= 0, codigos, grupos)
+
+        linhas = np.bincount(codigos, minlength=grupos + 1)[:grupos]
+        presentes = linhas > 0
+        colunas = {"linhas": linhas[presentes]}
+        for m, v in valores.items():
+            soma = np.bincount(codigos, weights=v, minlength=grupos + 1)[:grupos][presentes]
+            colunas[m] = np.rint(soma).astype("int64") if m in inteiras else soma
+        for nome, coluna in (distintos or {}).items():
+            valores_coluna, rotulos_coluna = codigos_de(coluna)
+            largura = max(len(rotulos_coluna), 1)
+            validos = (codigos < grupos) & (valores_coluna >= 0)
+            pares = codigos[validos] * largura + valores_coluna[validos]
+            if grupos * largura <= LIMITE_MARCACAO:
+                marcados = np.zeros(grupos * largura, dtype=bool)
+                marcados[pares] = True
+                contagem = marcados.reshape(grupos, largura).sum(axis=1)
+            else:
+                contagem = np.bincount(pd.unique(pares) // largura, minlength=grupos)
+            colunas[nome] = contagem[presentes]
+        por_recorte[recorte] = pd.DataFrame(colunas, index=pd.Index(rotulos[presentes], name=recorte))
+    return totais, por_recorte
+
+
+def performance_por_digitador(atual: pd.DataFrame, anterior: pd.DataFrame, dias_periodo: int) -> pd.DataFrame:
+    """
+    Tabela da Performance por Digitador: uma linha por digitador com
+    propostas em atual, do maior para o menor valor considerado. atual e
+    anterior (período de mesmo tamanho imediatamente antes) já vêm com a
+    regra de CPF aplicada.
+
+    - qtd_propostas, qtd_clientes (CPFs distintos), dias_ativos (dias com
+      ao menos uma proposta)
+    - valor_bruto, valor_considerado, ticket_medio (considerado por
+      proposta) e media_diaria (considerado por dia do período), em R$
+    - participacao: fração do valor considerado de todos os digitadores
+    - crescimento: variação do valor considerado contra o período
+      anterior; NaN se o digitador não produziu nada antes
+    """
+    _, por = agregar_recortes(
+        atual,
+        ["digitador"],
+        ["valor_centavos", "valor_considerado_centavos"],
+        distintos={"qtd_clientes": "cpf", "dias_ativos": "data"},
+    )
+    _, antes = agregar_recortes(anterior, ["digitador"], ["valor_considerado_centavos"])
+    grupos = por["digitador"]
+
+    considerado = grupos["valor_considerado_centavos"].to_numpy() / 100
+    considerado_antes = (
+        antes["digitador"]["valor_considerado_centavos"].reindex(grupos.index, fill_value=0).to_numpy() / 100
+    )
+    total = considerado.sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        crescimento = np.where(considerado_antes > 0, considerado / considerado_antes - 1, np.nan)
+    df = pd.DataFrame({
+        "digitador": grupos.index.astype(str),
+        "qtd_propostas": grupos["linhas"].to_numpy(),
+        "qtd_clientes": grupos["qtd_clientes"].to_numpy(),
+        "dias_ativos": grupos["dias_ativos"].to_numpy(),
+        "valor_bruto": grupos["valor_centavos"].to_numpy() / 100,
+        "valor_considerado": considerado,
+        "ticket_medio": considerado / grupos["linhas"].to_numpy(),
+        "media_diaria": considerado / max(dias_periodo, 1),
+        "participacao": considerado / total if total else np.zeros(len(grupos)),
+        "crescimento": crescimento,
+    })
+    return df.sort_values("valor_considerado", ascending=False, kind="stable", ignore_index=True)
@@ -1,13 +1,21 @@
 import sqlite3
 import io
 import hashlib
-import socket
-from datetime import date, datetime
-import numpy as np
-import pandas as pd
+import time
+from datetime import date, datetime, timedelta
 import streamlit as st
-import json
-from pathlib import Path
+
+from db import (
+    conexao, data_para_dia, escrita, estatisticas_pool, executar_escrita, leitura, metricas_escrita,
+    reais_para_centavos,
+)
+from manutencao import iniciar_manutencao, metricas_manutencao, solicitar_manutencao
+from migracoes import garantir_schema, verificar_planos, versao_schema
+from recursos import (
+    get_user_ip, get_version_info, icone_pagina, logo_sidebar, metricas_partida, registrar_partida,
+)
+
+inicio_script = time.perf_counter()
 
 # ------------------------
 # CONFIGURAÇÕES INICIAIS
@@ -15,483 +23,27 @@ from pathlib import Path
 
 st.set_page_config(
     page_title="Controle de Propostas",
-    page_icon="logo_evolve.png",
+    page_icon=icone_pagina(),
     layout="wide"
 )
 
-def get_user_ip():
-    try:
-        hostname = socket.gethostname()
-        ip = socket.gethostbyname(hostname)
-        return ip
-    except:
-        return "IP desconocido"
-    
-def get_version_info():
-    file_path = Path(__file__).parent / "version.json"
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {
-            "version": "0.0.0",
-            "build": 0,
-            "generatedAt": "",
-            "description": ""
-        }
-
 version_info = get_version_info()
 
 # ------------------------
 # Funções de banco de dados
 # ------------------------
-def get_connection():
-    return sqlite3.connect("propostas.db", check_same_thread=False)
-
-
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    # Tabela de propostas
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS propostas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            digitador TEXT NOT NULL,
-            ade TEXT NOT NULL,
-            cpf TEXT NOT NULL,
-            data TEXT NOT NULL,
-            parceiro TEXT NOT NULL,
-            tipo_produto TEXT,
-            valor REAL,
-            banco TEXT NOT NULL
-        );
-        """
-    )
-
-    # Garante coluna tipo_produto mesmo se a tabela já existir de antes
-    cur.execute("PRAGMA table_info(propostas);")
-    cols = [r[1] for r in cur.fetchall()]
-    if "tipo_produto" not in cols:
-        cur.execute("ALTER TABLE propostas ADD COLUMN tipo_produto TEXT;")
-
-    # Tabela de usuários (login)
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            usuario TEXT UNIQUE NOT NULL,
-            nome_exibicao TEXT NOT NULL,
-            senha_hash TEXT NOT NULL,
-            perfil TEXT NOT NULL  -- 'admin' ou 'digitador'
-        );
-        """
-    )
-
-    # Tabela de logs de auditoria das propostas
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS log_propostas (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            proposta_id INTEGER,
-            acao TEXT NOT NULL,          -- INSERT, UPDATE, DELETE
-            usuario TEXT NOT NULL,       -- login de quem fez
-            timestamp TEXT NOT NULL,     -- data/hora da ação
-            detalhes TEXT,               -- texto livre descrevendo a mudança
-            FOREIGN KEY (proposta_id) REFERENCES propostas(id)
-        );
-        """
-    )
-
-    # Tabela de parceiros
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS parceiros (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            descricao TEXT UNIQUE NOT NULL,
-            ativo INTEGER NOT NULL DEFAULT 1
-        );
-        """
-    )
-
-    # Tabela de bancos
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS bancos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            descricao TEXT UNIQUE NOT NULL,
-            ativo INTEGER NOT NULL DEFAULT 1
-        );
-        """
-    )
-
-    # Popula parceiros iniciais se estiver vazio
-    cur.execute("SELECT COUNT(*) FROM parceiros;")
-    if cur.fetchone()[0] == 0:
-        parceiros_iniciais = [
-            "Selecione o parceiro",
-            "1@EVOLVE SOLUÇÕES LTDA",
-            "2@JOSE WALTER PEREIRA BATISTA",
-            "3@MARIA IEDA SAMICO CAVALCANTI NETA",
-            "1001@FLAVIA CHRISTIANE GOMES DE SIQUEIRA",
-            "1002@PAULO RAMON GOMES DA SILVA",
-            "1003@MICHELI ROSE DOS SANTOS SILVA",
-            "1004@JOSE ERIK DOS SANTOS SILVA",
-            "1005@CELIA EMPRESTIMOS LTDA",
-            "1006@ACTOS PROMOTORA LTDA",
-            "1007@ROZILVA VIEIRA DOS SANTOS",
-            "1010@GEOVANIA SANTOS BARBOSA DE MOURA",
-            "1014@MEGA CRED SERVICOS FINANCEIROS LTDA",
-            "1017@RENE R. DA SILVA SANTOS",
-            "1023@MARLLEN KELLY FERREIRA DA SILVA",
-            "1024@MANACES FRANCA DO NASCIMENTO JUNIOR",
-            "1026@J J SOARES COSTA LTDA",
-            "1027@EMILLY BREENDA DE FIGUEIREDO DA SILVA",
-            "1030@EVOLVE PROMOTORA LTDA",
-            "1031@ERIKA PATRICIA BEZERRA BRASIL",
-            "1032@JANAINA RENATA DA SILVA",
-            "1033@S C DA C FIGUEREDO NA CONTACRED",
-            "1034@ISACREDITO CADASTRO E INTERMEDIACOES FINANCEIRAS LTDA",
-            "1036@AD SANTANA RAMOS",
-            "1038@R P DA SILVA PROMOTORA DE NEGOCIOS",
-            "1039@F DOS SANTOS BARROS LTDA",
-            "1040@JAQUELINE PEREIRA DA SILVA",
-            "1041@ALAN FERREIRA CHICUTA",
-            "1043@MERCIA LOPES DE GOES",
-            "1044@EVERTON FELIX TELES",
-            "1045@RAYSSA KARLA SILVA DOS SANTOS",
-            "1046@MORAES CONSIGNADOS LTDA",
-            "1047@VIVIANE RIBEIRO SENA DE MELO SILVA",
-            "1048@Q L A CHUCUTA PROMOTORA DE VENDAS E SERVICOS",
-            "1049@CLAUDETE OLIVEIRA BORGES DA SILVA",
-            "1050@KEILA COSTA BARROS",
-            "1052@ISRAEL BISPO DA SILVA",
-            "1053@RAFAEL VICENTE DA SILVA SANTOS",
-            "1054@SILVANIA ALMEIDA DA SILVA QUIRINO",
-            "1055@CARLOS CESAR FOLHA DE SANTANA",
-            "1056@FERNANDO SAMPAIO BARROS",
-            "1057@KAUAI AMORIM GOUVEIA",
-            "1059@FERNANDA EMANUELLE DOS SANTOS FERREIRA",
-            "1060@VANIA LUCIA SILVESTRE DE ANDRADE CASTRO SOTERO",
-            "1061@TANIA MARIA SANTOS FERREIRA",
-            "1062@CINTHIA ALVES CADETE",
-            "1063@VALERIA FERREIRA SILVA",
-            "1064@KARLA JULIANA SOARES MACIEL",
-            "1065@VALQUIRIA SANTOS",
-            "1066@WARLLEN VINICIUS GAMA DE LIMA",
-            "1067@CARLA NAIARA DOS SANTOS LIMA",
-            "1068@GILSON NASCIMENTO DO CARMO",
-            "1070@ADIVALDIR DOS SANTOS SIQUEIRA JUNIOR",
-            "1072@ANDREIA DOS SANTOS SILVA",
-            "1073@GUSTAVO ARGEMIRO DA SILVA PARREIRA",
-            "1074@JOAO LINO RAMOS NETO",
-            "1075@PAULA JULIANA CORDEIRO SANTOS DA SILVA",
-            "1076@IZABELLA ALVES DE MENEZES MAIA",
-            "1078@SELMA ALVES BULHOES DE MACEDO",
-            "1079@SHEILA GUILHERME DA SILVA",
-            "1080@SALETE MENDONCA PEREIRA",
-            "1081@FERNANDA PESSOA DE OLIVEIRA",
-            "1082@MARIA DE LOURDES GOMES LIMA",
-            "1083@RAFAELLA DE ARAUJO CANDIDO DA SILVA",
-            "1084@JOSE VITOR OLIVEIRA SILVA",
-            "1086@ERICK GUSTAVO ALVES DE SOUZA",
-            "1087@CLARISSA BARACHO PEREIRA",
-            "1088@MARCOS PAULO TEIXEIRA DA SILVA",
-            "1089@THIAGO WINICIUS NOGUEIRA DA SILVA",
-            "1085@MONICA TALITA DA SILVA AMARO",
-            "1091@RENATO DE SANTANA ALVES",
-            "1092@AMANDA GALVAO DE SOUZA",
-            "1093@NILTON FABRICIO SANTANA RAMOS",
-            "1094@LUCIANA GOMES DA SILVA CRUZ",
-            "1095@ALBERTO TEIXEIRA DE SOUZA FILHO",
-            "1096@KAMILLA CAMPOS MALTA",
-            "1097@FABIOLA VANIA PIMENTEL BRANDAO FREIRE",
-            "1098@JANE GONCALVES DE MACEDO",
-            "1099@ROBSON BERNARDO OLIVEIRA",
-            "1100@HELLISVAN CLEMENTE DA SILVA",
-            "1077@JACQUELINE SANTOS VICENTE DA SILVA",
-            "1102@JOSYVANIA LINS SANTOS",
-            "1103@INGRID MAYARA MOREIRA DE OLIVEIRA MENDONCA CANDEA",
-            "1104@ANA LUCIA PEREIRA DA SILVA",
-            "1105@ODJANE SILVA DOS SANTOS",
-            "1106@LARISSA KALLYNE DOS SANTOS ALVES PEIXOTO",
-            "1107@MICHAEL MORAES DE BARROS",
-            "1108@MAICOLN SILVA SANTOS",
-            "1109@JOYCE MAYARA BARBOSA DA SILVA",
-            "1110@MARCEL DE MORAIS TENORIO",
-            "1111@MICHELLE MONTELARES DE OLIVEIRA E SILVA",
-            "1112@ERICK DAMIAO DOS SANTOS SILVA",
-            "1113@ALINE DE MENDONCA ARAUJO",
-            "1114@LEANDRO DE OLIVEIRA CAVALCANTE",
-            "1115@JHOANNA LOWHAYNY DA SILVA SANTOS",
-            "1116@MARIA DA PENHA VIEIRA DE FARIAS",
-            "1117@QUEZIA ELOY TENORIO CADENGUE",
-            "1118@JEAN CARLOS SILVA SANTANA",
-            "1071@CICERO ALDO DOS SANTOS DA COSTA",
-            "1120@JALDEMO OLIVEIRA PAZ",
-            "1121@SAQUE CRED",
-            "1122@INES MARINHO PEIXOTO",
-            "1123@ALESSANDRO TEIXEIRA DA SILVA",
-            "1124@LUCAS LINDO DE SOUZA",
-            "1125@NELSON R DA SILVA FILHO",
-            "1126@GUSTAVO DO AMARAL LIMA",
-            "1127@JENESSON PEREIRA DA SILVA",
-            "1128@DIVA HERMELINDA SANTOS DO NASCIMENTO",
-            "1129@WANESSA ROBERTA VILA NOVA DA SILVA CALAZANS",
-            "1130@MAIARA SANTOS DE MEDEIROS",
-            "1131@JEFERSON WILLIAM COSTA VIEIRA",
-            "1132@LAYS FERNANDA ROCHA DA SILVA",
-            "1133@DMAIS PROMOTORA LTDA",
-            "1134@DANIEL DANTAS NETO",
-            "1069@PATRICIA DA COSTA SANTOS",
-            "1136@ROSILEIDE GOMES DOS SANTOS",
-            "1137@ALEXSANDRA LINDYSANE VANDERLEI SANTOS GUIMARAES",
-            "1138@MARCEL DE MORAIS TENORIO JUNIOR",
-            "1139@54.266.455 BRENA GABRIELE CHASTINET NASCIMENTO",
-            "1140@P P DA S SANTOS TOPCRED SOLUCOES FINANCEIRAS",
-            "1141@JOSE DOUGLAS CAVALCANTE DA ROCHA",
-            "1058@CAMILA PEREIRA DA SILVA",
-            "1143@S. PAULA GUIMARAES AMARAL",
-            "1144@DEBORAH BEATRIZ SILVA SANTOS",
-            "1145@ROSMYLE MONTEIRO DOS SANTOS",
-            "1146@CICERO RAFAEL DOS SANTOS SILVA",
-            "1147@FABIO TORRES MEDEIROS REGO",
-            "1148@CLAUDIANE ARAUJO DA SILVA",
-            "1149@ANDREIA DA SILVA SANTOS",
-            "1150@LEONE PEREIRA GOMES",
-            "1051@ANE ISABELY AZEVEDO DE SOUZA",
-            "1042@SIVALDO CALIXTO DA ROCHA",
-            "1154@GUILHERME TEIXEIRA TAVARES",
-            "1155@RENATA DE FATIMA ANDRADE MASTRANGELI",
-            "1156@HERICK DE MENDONCA ANSELMO",
-            "1157@TAMMIRIS EMANUELA DOMINGOS DE MELO",
-            "1158@JOSINEIDE MARIA DA SILVA SANTOS",
-            "1159@MICHELINE KATTY DE LIMA",
-            "1037@LUCINEIDE MARIA BARBOSA",
-            "1161@RENATA MARIA DOS SANTOS",
-            "1035@MARCELO CORTEZ DE LUCENA 00307167569",
-            "1163@ALLYSON GUILHERME FELIX DO NASCIMENTO",
-            "1164@RENATA BARROS DE CASTRO",
-            "1165@DANIELA KIVIA GOMES NICANDRO",
-            "1166@FLAVIA CRISTINA ASSUNCAO DE MELO",
-            "1029@ALBUQUERQUE E MORAES SERVICOS LTDA",
-            "1168@MARIA HELANIA DA SILVA",
-            "1169@KETHELY ALVES",
-            "1170@EDUARDO GOMES DA CRUZ",
-            "1171@JOSIVANIA DA SILVA LUZ",
-            "1172@MARILENE RODRIGUES GOMES DEODATO",
-            "1173@MARIA FERNANDA GOMES DE LIMA FERNANDES",
-            "1174@SILVANIA SARAIVA DE FRANCA SILVA",
-            "1175@MARIA CLAUDIA GREGO DE AGUIAR LIMA",
-            "1176@SHALLAKO WANDYSON MOREIRA DO CARMO",
-            "1177@JULIO JOSE CLIMACO DE MELO MENDONCA",
-            "1178@VANESSA RIBEIRO DOMINGOS SANTOS",
-            "1179@JEFFERSON CAVALCANTI LUCENA",
-            "1182@SAVIO ALLAN CABRAL SANTANA DA SILVA",
-            "1028@FABRICIA SILVA DE BRITO CAMPOS",
-            "1184@CARLA CLAUDIA GUILHERME DA SILVA MARQUES",
-            "1185@NEXT LEVEL PROMOTORA LTDA",
-            "1186@NEXT LEVEL PROMOTORA LTDA",
-            "1189@MARIA NEIDE CAMARA DE QUEIROZ",
-            "1190@ELIEZER ALVES DE MEIRELES",
-            "1191@JACIRA DOS SANTOS FILGUEIRA",
-            "1025@F P DE OLIVEIRA FERNANDES",
-            "1193@ANDREA CHRISTIANE DE MENEZES ANDRADE",
-            "1194@MONICA GOUVEIA DA SILVA SANTOS",
-            "1195@MARIA MADALENA DA SILVA",
-            "1196@LUZIANA MARIA DE SOUZA DUTRA",
-            "1197@KARINY KELLY DE MENEZES",
-            "1022@REAL PROMOTORA DE VENDAS LTDA",
-            "1199@ALEXANDRA ALVES DE CARVALHO",
-            "1200@SEVERINO EDUARDO DA SILVA",
-            "1201@ISABELE MARIA BARBOSA SANTOS",
-            "1202@ISMAEL DE SOUZA GOMES",
-            "1203@VERA LUCIA ANDRADE DONATO",
-            "1205@JOSE CID HONORATO",
-            "1206@ADEILDO JOSE PATRIOTA",
-            "1207@CLAUDIO CEZAR COUTINHO DE MOURA",
-            "1208@JANIEIDE DA SILVA GONCALVES",
-            "1021@DAYANE B S DE OLIVEIRA",
-            "1020@LARISSA DAIANNY DA SILVA AVELINO",
-            "1211@CLAUDIA MARIA FERREIRA CAMILO",
-            "1212@FABIANE BENICIO DE ARAUJO",
-            "1019@RIVANIA ROMANA RODRIGUES DO NASCIMENTO LTDA",
-            "1214@MARIA CRISTINA ALVES BARBOSA",
-            "1215@SUELEN LIMA DA SILVA",
-            "1216@MARCELO DELGADO ALVES",
-            "1018@ROSIMARIA BARBOSA DE FIGUEIREDO",
-            "1218@CRISTIANE IZIDORO DA SILVA",
-            "1219@IARA CURVELO TENORIO",
-            "1220@PEDRO ANTONIO DA SILVA",
-            "1221@MARIA ZENIVANIA ALVES BARBOSA MOURA",
-            "1222@ANDRESSA RAYANE DOS SANTOS",
-            "1224@MACIELE NOGUEIRA DE LIMA",
-            "1225@MARIA IEDA SAMICO CAVALCANTI NETA",
-            "1226@ANDERSON FERREIRA DE SOUZA",
-            "1227@JOAO CARLOS TAVARES DE LIMA",
-            "1228@GABRIELA ALENCAR CAMPELO DE MELO",
-            "1229@CAMILA IRIS DE FRANCA SILVA",
-            "1231@DANIELE CIARA DA SILVA",
-            "1232@THAINA SILVA FERREIRA",
-            "1233@MARCYVANIA SANTOS DA SILVA",
-            "1016@KATIA CRISTINA MORAIS DE OLIVEIRA KM",
-            "1235@VILMAR DONDI",
-            "1236@LUIZ RAPHAEL D EMERY DUARTE",
-            "1237@ERIKA FERNANDA MARTINS DA SILVA",
-            "1238@MARCELA DE SOUZA COSTA",
-            "1239@DUCILENE NOGUEIRA DA SILVA",
-            "1240@IVINA ELENITA RIBEIRO BEZERRA",
-            "1015@E DOS SANTOS REPRESENTACAO",
-            "1242@CYNTHIA SANTOS SILVA",
-            "1243@JOSE CICERO SILVA NETO",
-            "1244@TESTE",
-            "2244@PRODUÇÃO INTERNA",
-            "2250@TABELA ESPELHO",
-            "2251@IULY GOMES DOS SANTOS",
-            "2252@M FINANCEIRA LTDA",
-            "2257@FLAVIA REJANE DOS SANTOS",
-            "2258@TABELA ESPELHO ACTOS",
-            "2260@JOCYANE LUCIA SANTOS AMORIM",
-            "2261@TABELA ESPELHO AYRON",
-            "2262@TABELA ESPELHO C6BANK",
-            "2263@TABELA ESPELHO BONUS PAN",
-            "2264@CELSO CORREIA DE LIMA",
-            "2266@RICARDO LEONARDO FERREIRA DA SILVA",
-            "2267@ANDRE DO ESPIRITO SANTO CRUZ FILHO",
-            "2268@TABELA ESPELHO SAQUECRED",
-            "2269@GLAUCIA ALVES SANTOS",
-            "2270@JESSICA GOUVEIA DA SILVA",
-            "2271@TABELA ESPELHO SAQUE CRED",
-            "2272@TESTE 2",
-            "1013@ROSALIA NUNES DA CRUZ",
-            "1012@MARCIO ANDRE PAES BENJOINO FILHO",
-            "1011@DENISE VANDERLEI LUCAS 80309933404",
-            "1009@SILVANIA RAMOS DOS SANTOS LIMA",
-            "1008@FRANCO CARNAUBA FERREIRA",
-            "1090@VANIA LUCIA DE LIMA RODRIGUES",
-            "1101@BEMSENIOR PROMOTORA DE CREDITO LTDA",
-            "1119@LETICIA DAS NEVES DOS SANTOS",
-            "1135@ROSILEIDE FERNANDES BARBOZA SILVA",
-            "1142@MARCELO DOS SANTOS BEZERRA",
-            "1151@MARIA ELIANE CRISTIANO LAURINDO",
-            "1152@TILGATHPILNEZER FERNANDES LIMA NETO",
-            "1160@VANDETE TAVARES DA SILVA PEREIRA",
-            "1162@ICARO LEON UBIRATAN SILVA",
-            "1167@MARISTELA RODRIGUES LEMOS",
-            "1183@JOSE NAZARENO TELES",
-            "1192@EDUARDO LOPES DO NASCIMENTO",
-            "1198@JOSE ANDERSON DO NASCIMENTO",
-            "1209@LUCIA DE FATIMA DA CONCEICAO",
-            "1210@ANA MARIA ARAGAO",
-            "1213@LUANA DA SILVA RAMOS",
-            "1217@TANIA LUZIMAR DA SILVA PEREIRA",
-            "1234@JUSCARA LIMA SOARES",
-            "1241@NEIDJA ABREU DE QUEIROZ",
-        ]
-        for p in parceiros_iniciais:
-            cur.execute(
-                "INSERT OR IGNORE INTO parceiros (descricao, ativo) VALUES (?, 1);",
-                (p,),
-            )
-
-    # Popula bancos iniciais se estiver vazio
-    cur.execute("SELECT COUNT(*) FROM bancos;")
-    if cur.fetchone()[0] == 0:
-        bancos_iniciais = [
-            "C6 - DG",
-            "DIGIO - BEVI",
-            "DIGIO - DG (209271)",
-            "DIGIO - AD PROM.(100154)",
-            "BMG - DG 53991",
-            "BMG - BEVI",
-            "FACTA FINANCEIRA - DG",
-            "OLE(ANTIGO) - DG",
-            "OLE(FVE) - DG",
-            "SANTANDER - DG",
-            "CREFISA - DG",
-            "CREFISA BOLSA FAMILIA - DG",
-            "CREFISA BOLSA FAMILIA - ALCIF",
-            "CIASPREV - INOPERANTE",
-            "PAULISTA - INOPERANTE",
-            "VEMCARD - INOPERANTE",
-            "HAPPY - DG",
-            "AMIGOZ - DG",
-            "ITAU - DG",
-            "BRB - ESTEIRA DIGITAL",
-            "BRB - EVOLVE",
-            "BRB - DG",
-            "CREFAZ - DG",
-            "SABEMI - BEVI",
-            "QUERO+ - DG",
-            "QUERO+ (RL) - DG",
-            "MASTER - DG",
-            "INCONTA - PORT",
-            "INBURSA - PORT",
-            "DAYCOVAL - BEVI",
-            "BANRISUL - BEVI",
-            "BANRISUL - DG",
-            "SAFRA - BEVI",
-            "SAFRA - DIRETO",
-            "MEU CASHCARD",
-            "KARDBANK - GFT",
-            "ICRED - BEVI",
-            "MERCANTIL - DG",
-            "FINANTO - DIRETO",
-            "PRESENÇA BANK - DG",
-            "FUTURO PREVIDENCIA - DIRETO",
-            "AKI CAPITAL (ALCIF CONVENIOS) - ALCIF",
-            "PAN - DG",
-            "PICPAY - DG",
-            "PARANA - DG",
-            "NBC BANK - DG",
-            "PRATA - DG",
-        ]
-        for b in bancos_iniciais:
-            cur.execute(
-                "INSERT OR IGNORE INTO bancos (descricao, ativo) VALUES (?, 1);",
-                (b,),
-            )
-
-    conn.commit()
-    conn.close()
-    criar_usuario_inicial()
-
-
 def hash_senha(senha: str) -> str:
     return hashlib.sha256(senha.encode("utf-8")).hexdigest()
 
 
-def criar_usuario_inicial():
-    """
-    Cria um usuário admin padrão caso a tabela esteja vazia.
-    usuario: admin / senha: admin
-    """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT COUNT(*) FROM usuarios;")
-    (qtd,) = cur.fetchone()
-    if qtd == 0:
+def autenticar_usuario(usuario: str, senha: str):
+    with leitura() as conn:
+        cur = conn.cursor()
         cur.execute(
-            """
-            INSERT INTO usuarios (usuario, nome_exibicao, senha_hash, perfil)
-            VALUES (?, ?, ?, ?);
-            """,
-            ("admin", "Administrador", hash_senha("admin"), "admin"),
+            "SELECT id, usuario, nome_exibicao, senha_hash, perfil FROM usuarios WHERE usuario = ?;",
+            (usuario,),
         )
-        conn.commit()
-    conn.close()
-
-
-def autenticar_usuario(usuario: str, senha: str):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT id, usuario, nome_exibicao, senha_hash, perfil FROM usuarios WHERE usuario = ?;",
-        (usuario,),
-    )
-    row = cur.fetchone()
-    conn.close()
+        row = cur.fetchone()
 
     if row is None:
         return None
@@ -507,217 +59,299 @@ def autenticar_usuario(usuario: str, senha: str):
     return None
 
 
-def listar_usuarios():
+def listar_usuarios(conn=None):
     """Retorna um DataFrame com os usuários (sem mostrar hash da senha)."""
-    conn = get_connection()
-    df = pd.read_sql_query(
-        "SELECT id, usuario, nome_exibicao, perfil FROM usuarios ORDER BY id;",
-        conn
-    )
-    conn.close()
-    return df
+    with leitura(conn) as conn:
+        return pd.read_sql_query(
+            "SELECT id, usuario, nome_exibicao, perfil FROM usuarios ORDER BY id;",
+            conn
+        )
 
 
-def registrar_log_proposta(acao: str, usuario: str, proposta_id: int | None = None, detalhes: str | None = None):
+@escrita
+def registrar_log_proposta(acao: str, usuario: str, proposta_id: int | None = None, detalhes: str | None = None, conn=None):
     """
     Registra uma ação (INSERT, UPDATE, DELETE) relacionada a uma proposta.
     - acao: 'INSERT', 'UPDATE', 'DELETE'
     - usuario: login de quem fez a ação
     - proposta_id: id da proposta (pode ser None, mas é bom sempre mandar)
     - detalhes: texto livre descrevendo o que aconteceu
+    - conn: conexão de uma gravação em andamento, para o log entrar no
+      mesmo commit da alteração da proposta
     """
-    conn = get_connection()
-    cur = conn.cursor()
     ts = datetime.now().isoformat(sep=" ", timespec="seconds")
-    cur.execute(
+    conn.execute(
         """
         INSERT INTO log_propostas (proposta_id, acao, usuario, timestamp, detalhes)
         VALUES (?, ?, ?, ?, ?);
         """,
         (proposta_id, acao, usuario, ts, detalhes),
     )
-    conn.commit()
-    conn.close()
 
 
-def criar_usuario(usuario: str, nome_exibicao: str, senha: str, perfil: str):
+@escrita
+def criar_usuario(usuario: str, nome_exibicao: str, senha: str, perfil: str, conn=None):
     """Cria um novo usuário com senha hasheada."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
+    conn.execute(
         """
         INSERT INTO usuarios (usuario, nome_exibicao, senha_hash, perfil)
         VALUES (?, ?, ?, ?);
         """,
         (usuario, nome_exibicao, hash_senha(senha), perfil),
     )
-    conn.commit()
-    conn.close()
 
 
-def excluir_usuario(user_id: int):
-    """Exclui usuário pelo ID (não permite apagar o admin padrão)."""
-    conn = get_connection()
+@escrita
+def excluir_usuario(user_id: int, conn=None):
+    """Exclui usuário pelo ID (não permite apagar o admin padrão nem quem tem propostas)."""
     cur = conn.cursor()
     # Garante que não vai apagar o usuario 'admin'
     cur.execute("SELECT usuario FROM usuarios WHERE id = ?;", (user_id,))
     row = cur.fetchone()
     if row is not None:
         if row[0] == "admin":
-            conn.close()
             raise ValueError("Não é permitido excluir o usuário 'admin'.")
+    # As propostas apontam para o usuário (digitador_id)
+    cur.execute("SELECT COUNT(*) FROM propostas WHERE digitador_id = ?;", (user_id,))
+    if cur.fetchone()[0] > 0:
+        raise ValueError("Este usuário é digitador de propostas cadastradas e não pode ser excluído.")
     cur.execute("DELETE FROM usuarios WHERE id = ?;", (user_id,))
-    conn.commit()
-    conn.close()
 
 
-def inserir_proposta(digitador, ade, cpf, data_str, parceiro, tipo_produto, valor, banco):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
+@escrita
+def inserir_proposta(digitador_id, ade, cpf, data_str, parceiro, tipo_produto, valor, banco, conn=None):
+    """
+    Insere uma proposta. parceiro e banco são as descrições dos cadastros
+    (únicas); o id correspondente é resolvido no próprio INSERT.
+    data_str vem em ISO (AAAA-MM-DD) e valor em reais; são gravados como
+    número do dia e centavos.
+    """
+    cur = conn.execute(
         """
-        INSERT INTO propostas (digitador, ade, cpf, data, parceiro, tipo_produto, valor, banco)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+        INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+        VALUES (
+            ?, ?, ?, ?,
+            (SELECT id FROM parceiros WHERE descricao = ?),
+            ?, ?,
+            (SELECT id FROM bancos WHERE descricao = ?)
+        );
         """,
-        (digitador, ade, cpf, data_str, parceiro, tipo_produto, valor, banco),
+        (digitador_id, ade, cpf, data_para_dia(data_str), parceiro, tipo_produto,
+         reais_para_centavos(valor), banco),
     )
-    nova_id = cur.lastrowid
-    conn.commit()
-    conn.close()
-    return nova_id
+    return cur.lastrowid
 
 
-def atualizar_proposta(id_proposta, digitador, ade, cpf, data_str, parceiro, tipo_produto, valor, banco):
+@escrita
+def atualizar_proposta(id_proposta, digitador_id, ade, cpf, data_str, parceiro, tipo_produto, valor, banco, conn=None):
     """Atualiza uma proposta existente pelo ID."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
+    conn.execute(
         """
         UPDATE propostas
-        SET digitador = ?, ade = ?, cpf = ?, data = ?, parceiro = ?, tipo_produto = ?, valor = ?, banco = ?
+        SET digitador_id = ?, ade = ?, cpf = ?, data = ?,
+            parceiro_id = (SELECT id FROM parceiros WHERE descricao = ?),
+            tipo_produto = ?, valor_centavos = ?,
+            banco_id = (SELECT id FROM bancos WHERE descricao = ?)
         WHERE id = ?;
         """,
-        (digitador, ade, cpf, data_str, parceiro, tipo_produto, valor, banco, id_proposta),
+        (digitador_id, ade, cpf, data_para_dia(data_str), parceiro, tipo_produto,
+         reais_para_centavos(valor), banco, id_proposta),
     )
-    conn.commit()
-    conn.close()
 
 
-def excluir_proposta_bd(id_proposta):
+@escrita
+def excluir_proposta_bd(id_proposta, conn=None):
     """Exclui uma proposta pelo ID."""
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM propostas WHERE id = ?;", (id_proposta,))
-    conn.commit()
-    conn.close()
+    conn.execute("DELETE FROM propostas WHERE id = ?;", (id_proposta,))
+
+
+# Proposta + LOG no mesmo commit (ou grava os dois, ou nenhum)
+def inserir_proposta_com_log(usuario: str, detalhes: str, **campos):
+    def _gravar(conn):
+        nova_id = inserir_proposta(**campos, conn=conn)
+        registrar_log_proposta("INSERT", usuario, nova_id, detalhes, conn=conn)
+        return nova_id
+    return executar_escrita(_gravar)
+
+
+def atualizar_proposta_com_log(id_proposta, usuario: str, detalhes: str, **campos):
+    def _gravar(conn):
+        atualizar_proposta(id_proposta, **campos, conn=conn)
+        registrar_log_proposta("UPDATE", usuario, id_proposta, detalhes, conn=conn)
+    executar_escrita(_gravar)
 
 
-def carregar_propostas():
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM propostas ORDER BY id DESC;", conn)
-    conn.close()
-    return df
+def excluir_proposta_com_log(id_proposta, usuario: str, detalhes: str):
+    def _gravar(conn):
+        excluir_proposta_bd(id_proposta, conn=conn)
+        registrar_log_proposta("DELETE", usuario, id_proposta, detalhes, conn=conn)
+    executar_escrita(_gravar)
 
 
 # --------------------------
 # Parceiros / Bancos - Funções de apoio
 # --------------------------
-def listar_parceiros_bd():
-    conn = get_connection()
-    df = pd.read_sql_query(
-        "SELECT id, descricao, ativo FROM parceiros ORDER BY descricao;",
-        conn
-    )
-    conn.close()
-    return df
+def listar_parceiros_bd(conn=None):
+    return listar_catalogo("parceiros", conn)
 
 
-def listar_bancos_bd():
-    conn = get_connection()
-    df = pd.read_sql_query(
-        "SELECT id, descricao, ativo FROM bancos ORDER BY descricao;",
-        conn
-    )
-    conn.close()
-    return df
+def listar_bancos_bd(conn=None):
+    return listar_catalogo("bancos", conn)
 
 
-def inserir_parceiro(descricao: str):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
+@escrita
+def inserir_parceiro(descricao: str, conn=None):
+    conn.execute(
         "INSERT INTO parceiros (descricao, ativo) VALUES (?, 1);",
         (descricao.strip(),),
     )
-    conn.commit()
-    conn.close()
 
 
-def alterar_status_parceiro(parceiro_id: int, ativo: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
+@escrita
+def alterar_status_parceiro(parceiro_id: int, ativo: int, conn=None):
+    conn.execute(
         "UPDATE parceiros SET ativo = ? WHERE id = ?;",
         (ativo, parceiro_id),
     )
-    conn.commit()
-    conn.close()
 
 
-def excluir_parceiro(parceiro_id: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM parceiros WHERE id = ?;", (parceiro_id,))
-    conn.commit()
-    conn.close()
+@escrita
+def excluir_parceiro(parceiro_id: int, conn=None):
+    (qtd,) = conn.execute(
+        "SELECT COUNT(*) FROM propostas WHERE parceiro_id = ?;", (parceiro_id,)
+    ).fetchone()
+    if qtd > 0:
+        raise ValueError("Parceiro possui propostas cadastradas. Desative-o em vez de excluir.")
+    conn.execute("DELETE FROM parceiros WHERE id = ?;", (parceiro_id,))
 
 
-def inserir_banco(descricao: str):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
+@escrita
+def inserir_banco(descricao: str, conn=None):
+    conn.execute(
         "INSERT INTO bancos (descricao, ativo) VALUES (?, 1);",
         (descricao.strip(),),
     )
-    conn.commit()
-    conn.close()
 
 
-def alterar_status_banco(banco_id: int, ativo: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
+@escrita
+def alterar_status_banco(banco_id: int, ativo: int, conn=None):
+    conn.execute(
         "UPDATE bancos SET ativo = ? WHERE id = ?;",
         (ativo, banco_id),
     )
-    conn.commit()
-    conn.close()
 
 
-def excluir_banco(banco_id: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM bancos WHERE id = ?;", (banco_id,))
-    conn.commit()
-    conn.close()
+@escrita
+def excluir_banco(banco_id: int, conn=None):
+    (qtd,) = conn.execute(
+        "SELECT COUNT(*) FROM propostas WHERE banco_id = ?;", (banco_id,)
+    ).fetchone()
+    if qtd > 0:
+        raise ValueError("Banco possui propostas cadastradas. Desative-o em vez de excluir.")
+    conn.execute("DELETE FROM bancos WHERE id = ?;", (banco_id,))
 
 
-def get_parceiros_opcoes():
+def get_parceiros_opcoes(conn=None):
     """Retorna lista para selectbox, com 'Selecione o parceiro' na frente."""
-    df = listar_parceiros_bd()
-    ativos = df[df["ativo"] == 1]["descricao"].sort_values().tolist()
-    return ["Selecione o parceiro"] + ativos
+    return ["Selecione o parceiro"] + descricoes_ativas("parceiros", conn)
 
 
-def get_bancos_opcoes():
+def get_bancos_opcoes(conn=None):
     """Retorna lista para selectbox, com 'Selecione o banco' na frente."""
-    df = listar_bancos_bd()
-    ativos = df[df["ativo"] == 1]["descricao"].sort_values().tolist()
-    return ["Selecione o banco"] + ativos
+    return ["Selecione o banco"] + descricoes_ativas("bancos", conn)
+
+
+# --------------------------
+# Consultas - tabela exibida, paginação e exportação
+# --------------------------
+COLUNAS_CONSULTA = {
+    "id": "ID",
+    "digitador": "Digitador",
+    "ade": "ADE",
+    "cpf": "CPF",
+    "data": "Data",
+    "parceiro": "Parceiro",
+    "tipo_produto": "Tipo de Produto",
+    "banco": "Banco",
+    "valor": "Valor",
+    "valor_considerado": "Valor Considerado",
+    "ignorar_valor": "Ignorar Valor?",
+}
+
+TAMANHOS_PAGINA = [25, 50, 100, 250, 500]
+
+
+def tabela_consulta(df):
+    """Colunas da tela de Consultas, na ordem e com os títulos de exibição."""
+    colunas_existentes = [c for c in COLUNAS_CONSULTA if c in df.columns]
+    return df[colunas_existentes].rename(columns=COLUNAS_CONSULTA)
+
+
+def exportar_consulta(where, params, formato):
+    """Resultado inteiro do filtro em xlsx/csv; só roda quando o botão de download é clicado."""
+    with leitura() as conn:
+        df_exporta = tabela_consulta(consultar_propostas(where, params, conn))
+    if formato == "xlsx":
+        buffer = io.BytesIO()
+        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+            df_exporta.to_excel(writer, index=False, sheet_name="Propostas")
+        return buffer.getvalue()
+    return df_exporta.to_csv(index=False).encode("utf-8-sig")
+
+
+# --------------------------
+# Paginação por keyset (Consultas e Logs)
+# --------------------------
+def paginas_visitadas(estado: str, assinatura) -> list:
+    """
+    Chave de início de cada página já visitada (None = primeira), guardada
+    em st.session_state[estado]; a página atual é a última. Filtro, ordem
+    ou tamanho novos (assinatura diferente) voltam para a primeira página.
+    """
+    if st.session_state.get(f"{estado}_assinatura") != assinatura:
+        st.session_state[f"{estado}_assinatura"] = assinatura
+        _primeira_pagina(estado)
+    return st.session_state[estado]
+
+
+def _primeira_pagina(estado: str):
+    st.session_state[estado] = [None]
+
+
+def _pagina_anterior(estado: str):
+    st.session_state[estado].pop()
 
 
-# Inicializa o banco / tabelas
-init_db()
+def _pagina_seguinte(estado: str, chave):
+    st.session_state[estado].append(chave)
+
+
+def navegacao_paginas(estado: str, proxima, legenda: str):
+    """Botões Primeira / Anterior / Próxima; proxima = chave da próxima página ou None."""
+    paginas = st.session_state[estado]
+    coln1, coln2, coln3, coln4 = st.columns([1, 1, 1, 3])
+    with coln1:
+        st.button(
+            "⏮ Primeira", on_click=_primeira_pagina, args=(estado,),
+            disabled=len(paginas) == 1, key=f"{estado}_primeira",
+        )
+    with coln2:
+        st.button(
+            "⬅️ Anterior", on_click=_pagina_anterior, args=(estado,),
+            disabled=len(paginas) == 1, key=f"{estado}_anterior",
+        )
+    with coln3:
+        st.button(
+            "Próxima ➡️", on_click=_pagina_seguinte, args=(estado, proxima),
+            disabled=proxima is None, key=f"{estado}_proxima",
+        )
+    with coln4:
+        st.caption(legenda)
+
+# Inicializa o banco / tabelas (migrações pendentes, uma vez por processo)
+garantir_schema()
+# Backup online e manutenção do banco em segundo plano (uma thread por processo)
+iniciar_manutencao()
 
 # ------------------------
 # STATE DE LOGIN
@@ -727,14 +361,6 @@ if "usuario" not in st.session_state:
 
 usuario_logado = st.session_state["usuario"]
 
-def get_user_ip():
-    try:
-        hostname = socket.gethostname()
-        ip = socket.gethostbyname(hostname)
-        return ip
-    except:
-        return "IP desconhecido"
-
 ip_usuario = get_user_ip()
 
 
@@ -746,7 +372,7 @@ with st.sidebar:
     col_logo1, col_logo2, col_logo3 = st.columns([1, 2, 1])
 
     with col_logo2:
-        st.image("logo_evolvegrande.png", use_container_width=True)
+        st.image(logo_sidebar(), use_container_width=True)
 
     st.markdown("---")
 
@@ -764,6 +390,7 @@ with st.sidebar:
                 st.rerun()
             else:
                 st.error("Usuário ou senha inválidos.")
+        registrar_partida("login", time.perf_counter() - inicio_script)
         st.stop()  # Não mostra o resto da app enquanto não logar
 
     else:
@@ -788,6 +415,8 @@ with st.sidebar:
                 "📈 Performance por Digitador",
                 "🤝 Cadastro de Parceiros",
                 "🏦 Cadastro de Bancos",
+                "📥 Importar Propostas",
+                "🩺 Diagnóstico",
             ]
         else:
             opcoes_menu = [
@@ -802,6 +431,26 @@ with st.sidebar:
 usuario_logado = st.session_state["usuario"]
 digitador_logado = usuario_logado["nome_exibicao"]  # será usado como Digitador
 
+# ------------------------
+# MÓDULOS DAS TELAS
+# ------------------------
+# pandas (~1 s de import num processo novo) e os módulos que dependem dele
+# só são carregados depois do login: a tela de login sobe sem eles. As
+# funções acima que usam pd e companhia só são chamadas daqui para baixo.
+inicio_modulos = time.perf_counter()
+import pandas as pd
+
+from agregacao import agregar_recortes, performance_por_digitador
+from auditoria import ACOES, intervalo_logs, montar_filtro_logs, pagina_logs, usuarios_do_log
+from cache_propostas import metricas_cache_propostas
+from catalogos import TIPOS_PRODUTO, descricoes_ativas, ids_ativos, listar_catalogo
+from filtros import (
+    ESCOPOS_CPF, ORDENACOES, consultar_propostas, divergencias_cpf_stats, divergencias_propostas_diario,
+    intervalo_datas, montar_filtro, pagina_propostas, producao_diaria, resumir_propostas,
+)
+from importacao import importar_propostas, ler_planilha, validar_propostas
+registrar_partida("modulos_telas", time.perf_counter() - inicio_modulos)
+
 # ------------------------
 # TELA 1 - LANÇAMENTO DE PROPOSTAS
 # ------------------------
@@ -810,7 +459,7 @@ if menu == "📄 Lançamento de Propostas":
     parceiros_opcoes = get_parceiros_opcoes()
     bancos_opcoes = get_bancos_opcoes()
 
-    tipos_produto_lista = ["Selecione um Produto", "NOVO INSS", "REFIN", "CARTÃO", "FGTS", "SAQUE COMPLEMENTAR", "NOVO - CONVENIO PUBLICO", "REFIN - CONVENIO PUBLICO", "NOVO - AUMENTO", "SEGURO DE VIDA", "CREDITO PESSOAL", "CLT"]
+    tipos_produto_lista = ["Selecione um Produto"] + TIPOS_PRODUTO
 
       # ---------------------------
     # LINHA 1: Digitador | Data | Valor
@@ -901,9 +550,16 @@ if menu == "📄 Lançamento de Propostas":
                 data_str = data_proposta.strftime("%Y-%m-%d")
                 valor_num = valor if valor is not None else None
 
-                # insere proposta e CAPTURA O ID!!
-                nova_id = inserir_proposta(
-                    digitador=digitador_logado.strip(),
+                # proposta + LOG no mesmo commit (ou grava os dois, ou nenhum)
+                nova_id = inserir_proposta_com_log(
+                    usuario=usuario_logado["usuario"],
+                    detalhes=(
+                        f"digitador={digitador_logado.strip()}, "
+                        f"ade={ade.strip()}, cpf={cpf.strip()}, data={data_str}, "
+                        f"parceiro={parceiro.strip()}, tipo_produto={tipo_produto}, "
+                        f"valor={valor_num}, banco={banco.strip()}"
+                    ),
+                    digitador_id=usuario_logado["id"],
                     ade=ade.strip(),
                     cpf=cpf.strip(),
                     data_str=data_str,
@@ -913,22 +569,6 @@ if menu == "📄 Lançamento de Propostas":
                     banco=banco.strip(),
                 )
 
-                # 🔥 Registro no LOG
-                try:
-                    registrar_log_proposta(
-                        acao="INSERT",
-                        usuario=usuario_logado["usuario"],
-                        proposta_id=nova_id,
-                        detalhes=(
-                            f"digitador={digitador_logado.strip()}, "
-                            f"ade={ade.strip()}, cpf={cpf.strip()}, data={data_str}, "
-                            f"parceiro={parceiro.strip()}, tipo_produto={tipo_produto}, "
-                            f"valor={valor_num}, banco={banco.strip()}"
-                        ),
-                    )
-                except Exception as e_log:
-                    st.warning(f"⚠️ Proposta salva, mas não foi possível registrar o log: {e_log}")
-
                 st.success("✅ Proposta salva com sucesso!")
                 st.info(
                     "Você pode lançar várias propostas com o mesmo CPF e ADEs diferentes.\n"
@@ -944,19 +584,15 @@ if menu == "📄 Lançamento de Propostas":
 elif menu == "📊 Dashboard":
     st.subheader("📊 Dashboard")
 
-    df_all = carregar_propostas()
+    # período da base e listas de apoio lidos no mesmo snapshot do banco
+    with leitura() as conn:
+        data_min, data_max = intervalo_datas(conn)
+        parceiros_opcoes = get_parceiros_opcoes(conn)
+        bancos_opcoes = get_bancos_opcoes(conn)
 
-    if df_all.empty:
+    if data_min is None:
         st.info("Ainda não há propostas cadastradas.")
     else:
-        # Garante coluna de data como datetime
-        df_all["data_dt"] = pd.to_datetime(df_all["data"], errors="coerce")
-        data_min = df_all["data_dt"].min()
-        data_max = df_all["data_dt"].max()
-
-        if pd.isna(data_min) or pd.isna(data_max):
-            data_min = data_max = date.today()
-
         st.markdown("### 🔎 Filtros (Dashboard)")
 
         # Linha 1: datas
@@ -964,13 +600,13 @@ elif menu == "📊 Dashboard":
         with cold1:
             data_inicial = st.date_input(
                 "Data inicial",
-                value=data_min.date(),
+                value=data_min,
                 key="dash_data_ini"
             )
         with cold2:
             data_final = st.date_input(
                 "Data final",
-                value=data_max.date(),
+                value=data_max,
                 key="dash_data_fim"
             )
 
@@ -984,9 +620,7 @@ elif menu == "📊 Dashboard":
                 key="dash_digitador"
             )
 
-        parceiros_opcoes = get_parceiros_opcoes()
-        bancos_opcoes = get_bancos_opcoes()
-        tipos_produto_lista = ["Todos", "NOVO INSS", "REFIN", "CARTÃO", "FGTS", "SAQUE COMPLEMENTAR", "NOVO - CONVENIO PUBLICO", "REFIN - CONVENIO PUBLICO", "NOVO - AUMENTO", "SEGURO DE VIDA", "CREDITO PESSOAL", "CLT"]
+        tipos_produto_lista = ["Todos"] + TIPOS_PRODUTO
 
         with colf2:
             filtro_parceiro_sel = st.selectbox(
@@ -1019,49 +653,37 @@ elif menu == "📊 Dashboard":
             )
 
         # -------------------------
-        # Aplica filtros
+        # Aplica filtros (no SQLite: só as linhas filtradas saem do banco)
         # -------------------------
-        df = df_all.copy()
-
-        # filtro por data
-        df = df[
-            (df["data_dt"].dt.date >= data_inicial) &
-            (df["data_dt"].dt.date <= data_final)
-        ]
-
-        if filtro_digitador.strip():
-            df = df[
-                df["digitador"].str.contains(filtro_digitador.strip(), case=False, na=False)
-            ]
-
-        if filtro_parceiro_sel != "Todos":
-            df = df[df["parceiro"] == filtro_parceiro_sel]
-
-        if filtro_banco_sel != "Todos":
-            df = df[df["banco"] == filtro_banco_sel]
-
-        if filtro_tipo_produto != "Todos":
-            df = df[df["tipo_produto"] == filtro_tipo_produto]
-
-        if filtro_cpf.strip():
-            df = df[
-                df["cpf"].astype(str).str.contains(filtro_cpf.strip(), na=False)
-            ]
-
-        # Regra de CPF com mais de uma proposta (base geral)
-        cpf_counts = df_all["cpf"].value_counts()
-        df["ignorar_valor"] = df["cpf"].map(lambda c: cpf_counts.get(c, 0) > 1)
-        df["valor_considerado"] = np.where(
-            df["ignorar_valor"],
-            0,
-            df["valor"].fillna(0)
+        where, params = montar_filtro(
+            data_inicial,
+            data_final,
+            limites=(data_min, data_max),
+            digitador=filtro_digitador,
+            cpf=filtro_cpf,
+            parceiro=filtro_parceiro_sel,
+            banco=filtro_banco_sel,
+            tipo_produto=filtro_tipo_produto,
         )
+        # produção por dia e por combinação de dimensões, lida do rollup
+        # propostas_diario (valor considerado na regra de CPF da base geral);
+        # o filtro de CPF não existe no rollup e agrega as propostas filtradas
+        with leitura() as conn:
+            prod_dias, prod_dimensoes = producao_diaria(
+                where, params, conn, por_proposta=bool(filtro_cpf.strip())
+            )
 
-        if df.empty:
+        if prod_dias.empty:
             st.warning("Nenhum dado para exibir no dashboard com os filtros selecionados.")
         else:
-            total_valor_bruto = df["valor"].fillna(0).sum()
-            total_valor_considerado = df["valor_considerado"].sum()
+            # totais e os quatro recortes numa passada só (somas em centavos)
+            totais, recortes = agregar_recortes(
+                prod_dimensoes,
+                ["banco", "parceiro", "digitador", "tipo_produto"],
+                ["valor_centavos", "valor_considerado_centavos"],
+            )
+            total_valor_bruto = totais["valor_centavos"] / 100
+            total_valor_considerado = totais["valor_considerado_centavos"] / 100
 
             colr1, colr2 = st.columns(2)
             with colr1:
@@ -1080,88 +702,48 @@ elif menu == "📊 Dashboard":
             # ============================
             st.markdown("### 📊 Gráficos")
 
-            df_graf = df.copy()
-            df_graf["data_dt"] = pd.to_datetime(df_graf["data"], errors="coerce")
+            def producao_por(recorte: str) -> pd.Series:
+                """Valor considerado (R$) por valor do recorte, do maior para o menor."""
+                return (
+                    recortes[recorte]["valor_considerado_centavos"]
+                    .sort_values(ascending=False)
+                    .rename("valor_considerado")
+                    / 100
+                )
 
             colg1, colg2 = st.columns(2)
 
             # Produção por dia
             with colg1:
-                prod_dia = (
-                    df_graf.dropna(subset=["data_dt"])
-                          .groupby(df_graf["data_dt"].dt.date)["valor_considerado"]
-                          .sum()
-                          .reset_index(name="Valor Considerado")
+                st.markdown("**Produção por dia (Valor Considerado)**")
+                st.line_chart(
+                    (prod_dias.set_index("data")["valor_considerado_centavos"] / 100).rename("Valor Considerado")
                 )
-                prod_dia = prod_dia.sort_values("data_dt")
-
-                if not prod_dia.empty:
-                    st.markdown("**Produção por dia (Valor Considerado)**")
-                    st.line_chart(prod_dia.set_index("data_dt")["Valor Considerado"])
-                else:
-                    st.info("Sem dados suficientes para gráfico por dia.")
 
             # Produção por banco
             with colg2:
-                prod_banco = (
-                    df_graf.groupby("banco")["valor_considerado"]
-                           .sum()
-                           .sort_values(ascending=False)
-                           .head(10)
-                           .reset_index()
-                )
-
-                if not prod_banco.empty:
-                    st.markdown("**Top 10 Bancos por Valor Considerado**")
-                    st.bar_chart(prod_banco.set_index("banco")["valor_considerado"])
-                else:
-                    st.info("Sem dados suficientes para gráfico por banco.")
+                st.markdown("**Top 10 Bancos por Valor Considerado**")
+                st.bar_chart(producao_por("banco").head(10))
 
             colg3, colg4 = st.columns(2)
 
             # Produção por parceiro
             with colg3:
-                prod_parceiro = (
-                    df_graf.groupby("parceiro")["valor_considerado"]
-                           .sum()
-                           .sort_values(ascending=False)
-                           .head(10)
-                           .reset_index()
-                )
-
-                if not prod_parceiro.empty:
-                    st.markdown("**Top 10 Parceiros por Valor Considerado**")
-                    st.bar_chart(prod_parceiro.set_index("parceiro")["valor_considerado"])
-                else:
-                    st.info("Sem dados suficientes para gráfico por parceiro.")
+                st.markdown("**Top 10 Parceiros por Valor Considerado**")
+                st.bar_chart(producao_por("parceiro").head(10))
 
             # Produção por digitador
             with colg4:
-                prod_digitador = (
-                    df_graf.groupby("digitador")["valor_considerado"]
-                           .sum()
-                           .sort_values(ascending=False)
-                           .reset_index()
-                )
-
-                if not prod_digitador.empty:
-                    st.markdown("**Produção por Digitador (Valor Considerado)**")
-                    st.bar_chart(prod_digitador.set_index("digitador")["valor_considerado"])
-                else:
-                    st.info("Sem dados suficientes para gráfico por digitador.")
+                st.markdown("**Produção por Digitador (Valor Considerado)**")
+                st.bar_chart(producao_por("digitador"))
 
             # Nova linha de gráficos: produção por tipo de produto
             colg5, _ = st.columns(2)
             with colg5:
-                prod_tipo = (
-                    df_graf.groupby("tipo_produto")["valor_considerado"]
-                           .sum()
-                           .sort_values(ascending=False)
-                           .reset_index()
-                )
+                prod_tipo = producao_por("tipo_produto")
                 if not prod_tipo.empty:
                     st.markdown("**Produção por Tipo de Produto (Valor Considerado)**")
-                    st.bar_chart(prod_tipo.set_index("tipo_produto")["valor_considerado"])
+                    st.bar_chart(prod_tipo)
                 else:
                     st.info("Sem dados suficientes para gráfico por tipo de produto.")
 
@@ -1176,23 +758,17 @@ elif menu == "📊 Dashboard":
 elif menu == "📈 Performance por Digitador":
     st.subheader("📈 Performance por Digitador")
 
-    df_all = carregar_propostas()
+    # período da base e listas de apoio lidos no mesmo snapshot do banco
+    with leitura() as conn:
+        data_min, data_max = intervalo_datas(conn)
+        parceiros_opcoes = get_parceiros_opcoes(conn)
+        bancos_opcoes = get_bancos_opcoes(conn)
 
-    if df_all.empty:
+    if data_min is None:
         st.info("Ainda não há propostas cadastradas.")
     else:
-        # Trata datas
-        df_all["data_dt"] = pd.to_datetime(df_all["data"], errors="coerce")
-        data_min = df_all["data_dt"].min()
-        data_max = df_all["data_dt"].max()
-
-        if pd.isna(data_min) or pd.isna(data_max):
-            data_min = data_max = date.today()
-
         # Listas de apoio para filtros
-        parceiros_opcoes = get_parceiros_opcoes()
-        bancos_opcoes = get_bancos_opcoes()
-        tipos_produto_opcoes = ["Todos", "NOVO INSS", "REFIN", "CARTÃO", "FGTS", "SAQUE COMPLEMENTAR", "NOVO - CONVENIO PUBLICO", "REFIN - CONVENIO PUBLICO", "NOVO - AUMENTO", "SEGURO DE VIDA", "CREDITO PESSOAL", "CLT"]
+        tipos_produto_opcoes = ["Todos"] + TIPOS_PRODUTO
 
         st.markdown("### 🔎 Filtros de Performance")
 
@@ -1201,13 +777,13 @@ elif menu == "📈 Performance por Digitador":
         with colf1:
             data_inicial = st.date_input(
                 "Data inicial",
-                value=data_min.date(),
+                value=data_min,
                 key="perf_data_ini",
             )
         with colf2:
             data_final = st.date_input(
                 "Data final",
-                value=data_max.date(),
+                value=data_max,
                 key="perf_data_fim",
             )
 
@@ -1238,89 +814,90 @@ elif menu == "📈 Performance por Digitador":
                 key="perf_cpf",
             )
 
-        # Linha 3 – filtro textual de digitador
-        colf7, _ = st.columns([2, 2])
+        # Linha 3 – filtro textual de digitador / escopo da regra de CPF
+        colf7, colf8 = st.columns([2, 2])
         with colf7:
             filtro_digitador = st.text_input(
                 "Filtrar digitador (nome contém)",
                 placeholder="Opcional",
                 key="perf_digitador",
             )
+        with colf8:
+            escopo_regra = st.selectbox(
+                "Regra de CPF: contar propostas do CPF em",
+                list(ESCOPOS_CPF),
+                key="perf_escopo_cpf",
+                help="Base inteira é o mesmo critério do Dashboard e das Consultas.",
+            )
 
         # --------------------------
-        # Aplica filtros na base
+        # Aplica filtros na base (no SQLite): período escolhido e o período
+        # anterior de mesmo tamanho, para o crescimento
         # --------------------------
-        df = df_all.copy()
-        df["data_dt"] = pd.to_datetime(df["data"], errors="coerce")
-
-        # Filtro por data
-        df = df[
-            (df["data_dt"].dt.date >= data_inicial) &
-            (df["data_dt"].dt.date <= data_final)
-        ]
-
-        # Filtros opcionais
-        if filtro_digitador.strip():
-            df = df[df["digitador"].str.contains(filtro_digitador.strip(), case=False, na=False)]
-
-        if filtro_parceiro != "Todos":
-            df = df[df["parceiro"] == filtro_parceiro]
-
-        if filtro_banco != "Todos":
-            df = df[df["banco"] == filtro_banco]
+        filtros_perf = dict(
+            digitador=filtro_digitador,
+            cpf=filtro_cpf,
+            parceiro=filtro_parceiro,
+            banco=filtro_banco,
+            tipo_produto=filtro_tipo_produto,
+        )
+        where, params = montar_filtro(data_inicial, data_final, limites=(data_min, data_max), **filtros_perf)
 
-        if filtro_tipo_produto != "Todos":
-            df = df[df["tipo_produto"] == filtro_tipo_produto]
+        dias_periodo = (data_final - data_inicial).days + 1
+        anterior_fim = data_inicial - timedelta(days=1)
+        where_anterior, params_anterior = montar_filtro(
+            data_inicial - timedelta(days=dias_periodo), anterior_fim, **filtros_perf
+        )
 
-        if filtro_cpf.strip():
-            df = df[df["cpf"].str.contains(filtro_cpf.strip(), case=False, na=False)]
+        # já vem com a regra de CPF no escopo escolhido (em cada período):
+        # ignorar_valor, valor_considerado_centavos e valor_considerado
+        escopo_cpf = ESCOPOS_CPF[escopo_regra]
+        with leitura() as conn:
+            df = consultar_propostas(where, params, conn, escopo_cpf=escopo_cpf)
+            if anterior_fim >= data_min:
+                df_anterior = consultar_propostas(where_anterior, params_anterior, conn, escopo_cpf=escopo_cpf)
+            else:
+                df_anterior = df.iloc[:0]
 
         if df.empty:
             st.warning("Nenhum dado para exibir com os filtros selecionados.")
         else:
-            # Regra de CPF com mais de uma proposta (na base filtrada)
-            cpf_counts = df["cpf"].value_counts()
-            df["ignorar_valor"] = df["cpf"].map(lambda c: cpf_counts.get(c, 0) > 1)
-            df["valor_considerado"] = np.where(
-                df["ignorar_valor"],
-                0,
-                df["valor"].fillna(0),
-            )
-
             # --------------------------
-            # Agrupamento por digitador
+            # Agrupamento por digitador (bincount nos códigos, sem groupby)
             # --------------------------
-            df_perf = (
-                df.groupby("digitador")
-                .agg(
-                    qtd_propostas=("id", "count"),
-                    qtd_clientes=("cpf", lambda x: x.nunique()),
-                    valor_bruto=("valor", lambda x: x.fillna(0).sum()),
-                    valor_considerado=("valor_considerado", "sum"),
-                )
-                .reset_index()
-            )
-
-            # Evita divisão por zero
-            df_perf["ticket_medio"] = np.where(
-                df_perf["qtd_propostas"] > 0,
-                df_perf["valor_considerado"] / df_perf["qtd_propostas"],
-                0,
-            )
-
-            # Ordena por valor considerado (do maior para o menor)
-            df_perf = df_perf.sort_values("valor_considerado", ascending=False)
+            df_perf = performance_por_digitador(df, df_anterior, dias_periodo)
 
             st.markdown("### 📋 Tabela de performance por digitador")
             st.dataframe(
-                df_perf.style.format(
-                    {
-                        "valor_bruto": "R$ {:,.2f}",
-                        "valor_considerado": "R$ {:,.2f}",
-                        "ticket_medio": "R$ {:,.2f}",
-                    }
-                ),
+                df_perf,
                 use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "digitador": "Digitador",
+                    "qtd_propostas": st.column_config.NumberColumn("Propostas", format="%,d"),
+                    "qtd_clientes": st.column_config.NumberColumn("Clientes", format="%,d"),
+                    "dias_ativos": st.column_config.NumberColumn(
+                        "Dias ativos", format="%d", help="Dias do período com ao menos uma proposta"
+                    ),
+                    "valor_bruto": st.column_config.NumberColumn("Valor bruto", format="R$ %,.2f"),
+                    "valor_considerado": st.column_config.NumberColumn("Valor considerado", format="R$ %,.2f"),
+                    "ticket_medio": st.column_config.NumberColumn("Ticket médio", format="R$ %,.2f"),
+                    "media_diaria": st.column_config.NumberColumn(
+                        "Média diária", format="R$ %,.2f",
+                        help=f"Valor considerado por dia do período ({dias_periodo} dias)",
+                    ),
+                    "participacao": st.column_config.NumberColumn(
+                        "Participação", format="percent", help="Fatia do valor considerado de todos os digitadores"
+                    ),
+                    "crescimento": st.column_config.NumberColumn(
+                        "Crescimento", format="percent",
+                        help=(
+                            f"Valor considerado contra os {dias_periodo} dias anteriores "
+                            f"({data_inicial - timedelta(days=dias_periodo):%d/%m/%Y} a {anterior_fim:%d/%m/%Y}); "
+                            "vazio se o digitador não produziu nada no período anterior"
+                        ),
+                    ),
+                },
             )
 
             # --------------------------
@@ -1455,67 +1032,86 @@ elif menu == "🕒 Logs de Auditoria":
 
     st.subheader("🕒 Logs de Auditoria de Propostas")
 
-    conn = get_connection()
-    df_logs = pd.read_sql_query(
-        "SELECT id, proposta_id, acao, usuario, timestamp, detalhes FROM log_propostas ORDER BY id DESC;",
-        conn
-    )
-    conn.close()
+    # filtros, período e paginação no SQLite: só a página visível sai do banco
+    with leitura() as conn:
+        log_min, log_max = intervalo_logs(conn)
+        usuarios_log = usuarios_do_log(conn)
 
-    if df_logs.empty:
+    if log_min is None:
         st.info("Nenhum log registrado até o momento.")
     else:
-        # converte timestamp para datetime pra filtrar por data
-        df_logs["data_dt"] = pd.to_datetime(df_logs["timestamp"], errors="coerce")
-
         st.markdown("### 🔎 Filtros de logs")
 
         col_l1, col_l2, col_l3 = st.columns(3)
         with col_l1:
             filtro_acao = st.selectbox(
                 "Ação",
-                ["Todas", "INSERT", "UPDATE", "DELETE"],
+                ["Todas"] + ACOES,
                 key="log_acao"
             )
         with col_l2:
-            filtro_usuario = st.text_input(
-                "Usuário (login contém)",
+            filtro_usuario = st.selectbox(
+                "Usuário (login)",
+                ["Todos"] + usuarios_log,
                 key="log_usuario"
             )
         with col_l3:
             filtro_proposta = st.text_input(
-                "Proposta ID (contém)",
+                "Proposta ID",
+                placeholder="Ex: 10",
                 key="log_proposta_id"
             )
 
-        # filtros
-        df_view = df_logs.copy()
-
-        if filtro_acao != "Todas":
-            df_view = df_view[df_view["acao"] == filtro_acao]
+        col_l4, col_l5, col_l6 = st.columns(3)
+        with col_l4:
+            log_data_inicial = st.date_input("Data inicial", value=log_min, key="log_data_ini")
+        with col_l5:
+            log_data_final = st.date_input("Data final", value=log_max, key="log_data_fim")
+        with col_l6:
+            tamanho_pagina_log = st.selectbox(
+                "Linhas por página", TAMANHOS_PAGINA, index=1, key="log_tamanho_pagina"
+            )
 
-        if filtro_usuario.strip():
-            df_view = df_view[
-                df_view["usuario"].str.contains(filtro_usuario.strip(), case=False, na=False)
-            ]
+        proposta_log = filtro_proposta.strip()
+        if proposta_log and not proposta_log.isdigit():
+            st.warning("Proposta ID deve ter só números; filtro ignorado.")
+            proposta_log = ""
+
+        where_log, params_log = montar_filtro_logs(
+            acao=None if filtro_acao == "Todas" else filtro_acao,
+            usuario=None if filtro_usuario == "Todos" else filtro_usuario,
+            proposta_id=int(proposta_log) if proposta_log else None,
+            data_inicial=log_data_inicial,
+            data_final=log_data_final,
+            limites=(log_min, log_max),
+        )
+        paginas_log = paginas_visitadas("log_paginas", (where_log, tuple(params_log), tamanho_pagina_log))
 
-        if filtro_proposta.strip():
-            df_view = df_view[
-                df_view["proposta_id"].astype(str).str.contains(filtro_proposta.strip(), na=False)
-            ]
+        with leitura() as conn:
+            df_view, proxima_log = pagina_logs(
+                where_log, params_log, conn, tamanho=tamanho_pagina_log, apos=paginas_log[-1]
+            )
 
         st.markdown("### 📋 Logs registrados")
-        colunas_exibir = ["id", "proposta_id", "acao", "usuario", "timestamp", "detalhes"]
-        df_view = df_view[colunas_exibir].rename(columns={
-            "id": "ID Log",
-            "proposta_id": "ID Proposta",
-            "acao": "Ação",
-            "usuario": "Usuário",
-            "timestamp": "Data/Hora",
-            "detalhes": "Detalhes",
-        })
-
-        st.dataframe(df_view, use_container_width=True, height=500)
+        if df_view.empty:
+            st.warning("Nenhum log encontrado com os filtros informados.")
+        else:
+            df_view = df_view.rename(columns={
+                "id": "ID Log",
+                "proposta_id": "ID Proposta",
+                "acao": "Ação",
+                "usuario": "Usuário",
+                "timestamp": "Data/Hora",
+                "detalhes": "Detalhes",
+            })
+
+            st.dataframe(df_view, use_container_width=True, height=500)
+
+        navegacao_paginas(
+            "log_paginas",
+            proxima_log,
+            f"Página {len(paginas_log)} · {tamanho_pagina_log} linhas por página",
+        )
 
 # ------------------------
 # TELA 5 - CONSULTAS / RELATÓRIOS
@@ -1523,23 +1119,17 @@ elif menu == "🕒 Logs de Auditoria":
 elif menu == "📁 Consultas / Relatórios":
     st.subheader("📁 Consultas e Relatórios")
 
-    parceiros_opcoes = get_parceiros_opcoes()
-    bancos_opcoes = get_bancos_opcoes()
-    tipos_produto_lista = ["Todos", "NOVO INSS", "REFIN", "CARTÃO", "FGTS", "SAQUE COMPLEMENTAR", "NOVO - CONVENIO PUBLICO", "REFIN - CONVENIO PUBLICO", "NOVO - AUMENTO", "SEGURO DE VIDA", "CREDITO PESSOAL", "CLT"]
+    tipos_produto_lista = ["Todos"] + TIPOS_PRODUTO
 
-    df_all = carregar_propostas()
+    # período da base e listas de apoio lidos no mesmo snapshot do banco
+    with leitura() as conn:
+        parceiros_opcoes = get_parceiros_opcoes(conn)
+        bancos_opcoes = get_bancos_opcoes(conn)
+        data_min, data_max = intervalo_datas(conn)
 
-    if df_all.empty:
+    if data_min is None:
         st.info("Ainda não há propostas cadastradas.")
     else:
-        # trata datas
-        df_all["data_dt"] = pd.to_datetime(df_all["data"], errors="coerce")
-        data_min = df_all["data_dt"].min()
-        data_max = df_all["data_dt"].max()
-
-        if pd.isna(data_min) or pd.isna(data_max):
-            data_min = data_max = date.today()
-
         st.markdown("### 🔎 Filtros")
 
         # linha 1 de filtros
@@ -1547,13 +1137,13 @@ elif menu == "📁 Consultas / Relatórios":
         with cold1:
             data_inicial = st.date_input(
                 "Data inicial",
-                value=data_min.date(),
+                value=data_min,
                 key="rep_data_ini"
             )
         with cold2:
             data_final = st.date_input(
                 "Data final",
-                value=data_max.date(),
+                value=data_max,
                 key="rep_data_fim"
             )
 
@@ -1609,51 +1199,39 @@ elif menu == "📁 Consultas / Relatórios":
                 key="rep_tipo_produto"
             )
 
-        # aplica filtros
-        df = df_all.copy()
-        df["data_dt"] = pd.to_datetime(df["data"], errors="coerce")
-
-        df = df[
-            (df["data_dt"].dt.date >= data_inicial) &
-            (df["data_dt"].dt.date <= data_final)
-        ]
-
-        if filtro_cpf:
-            df = df[df["cpf"].str.contains(filtro_cpf, case=False, na=False)]
-        if filtro_ade:
-            df = df[df["ade"].str.contains(filtro_ade, case=False, na=False)]
-        if filtro_digitador:
-            df = df[df["digitador"].str.contains(filtro_digitador, case=False, na=False)]
-        if filtro_parceiro_sel != "Todos":
-            df = df[df["parceiro"] == filtro_parceiro_sel]
-        if filtro_banco_sel != "Todos":
-            df = df[df["banco"] == filtro_banco_sel]
-        if filtro_id:
-            df = df[df["id"].astype(str).str.contains(filtro_id, na=False)]
-        if filtro_tipo_produto != "Todos":
-            df = df[df["tipo_produto"] == filtro_tipo_produto]
-
-        # regra de CPF com mais de uma proposta
-        cpf_counts = df_all["cpf"].value_counts()
-        df["ignorar_valor"] = df["cpf"].map(lambda c: cpf_counts.get(c, 0) > 1)
-        df["valor_considerado"] = np.where(
-            df["ignorar_valor"],
-            0,
-            df["valor"].fillna(0)
+        # aplica filtros (no SQLite: só as linhas filtradas saem do banco)
+        where, params = montar_filtro(
+            data_inicial,
+            data_final,
+            limites=(data_min, data_max),
+            digitador=filtro_digitador,
+            cpf=filtro_cpf,
+            ade=filtro_ade,
+            id_contem=filtro_id,
+            parceiro=filtro_parceiro_sel,
+            banco=filtro_banco_sel,
+            tipo_produto=filtro_tipo_produto,
         )
+        # o resultado não é carregado inteiro: totais por agregação no
+        # SQLite e só a página visível sai do banco
+        with leitura() as conn:
+            resumo = resumir_propostas(where, params, conn)
 
         st.markdown("### 📋 Resultados")
 
-        if df.empty:
+        if resumo["qtd"] == 0:
             st.warning("Nenhuma proposta encontrada com os filtros informados.")
         else:
-            total_valor_bruto = df["valor"].fillna(0).sum()
-            total_valor_considerado = df["valor_considerado"].sum()
+            # somas exatas em centavos
+            total_valor_bruto = resumo["valor_centavos"] / 100
+            total_valor_considerado = resumo["valor_considerado_centavos"] / 100
 
-            colr1, colr2 = st.columns(2)
+            colr1, colr2, colr3 = st.columns(3)
             with colr1:
-                st.metric("Soma dos valores (bruto)", f"R$ {total_valor_bruto:,.2f}")
+                st.metric("Propostas encontradas", f"{resumo['qtd']:,}".replace(",", "."))
             with colr2:
+                st.metric("Soma dos valores (bruto)", f"R$ {total_valor_bruto:,.2f}")
+            with colr3:
                 st.metric(
                     "Soma dos valores (considerando regra de CPF)",
                     f"R$ {total_valor_considerado:,.2f}"
@@ -1665,6 +1243,32 @@ elif menu == "📁 Consultas / Relatórios":
                 "para esse cliente."
             )
 
+            # --------- PAGINAÇÃO ---------
+            colo1, colo2, colo3, _ = st.columns(4)
+            with colo1:
+                ordem = st.selectbox("Ordenar por", list(ORDENACOES), key="rep_ordem")
+            with colo2:
+                sentido = st.selectbox("Sentido", ["Decrescente", "Crescente"], key="rep_sentido")
+            with colo3:
+                tamanho_pagina = st.selectbox(
+                    "Linhas por página", TAMANHOS_PAGINA, index=1, key="rep_tamanho_pagina"
+                )
+
+            paginas = paginas_visitadas(
+                "rep_paginas", (where, tuple(params), ordem, sentido, tamanho_pagina)
+            )
+
+            with leitura() as conn:
+                df, proxima = pagina_propostas(
+                    where,
+                    params,
+                    conn,
+                    ordem=ordem,
+                    crescente=sentido == "Crescente",
+                    tamanho=tamanho_pagina,
+                    apos=paginas[-1],
+                )
+
             # ============================
             # EDIÇÃO / EXCLUSÃO DE PROPOSTA
             # ============================
@@ -1673,10 +1277,10 @@ elif menu == "📁 Consultas / Relatórios":
             ids_disponiveis = df["id"].sort_values().tolist()
 
             if not ids_disponiveis:
-                st.info("Nenhuma proposta disponível para edição com os filtros atuais.")
+                st.info("Nenhuma proposta nesta página. Volte para a primeira página.")
             else:
                 id_escolhido = st.selectbox(
-                    "Selecione o ID da proposta para editar ou excluir",
+                    "Selecione o ID da proposta para editar ou excluir (página atual)",
                     ids_disponiveis,
                     format_func=lambda x: f"ID {x}"
                 )
@@ -1688,11 +1292,23 @@ elif menu == "📁 Consultas / Relatórios":
 
                     # Digitador / ADE / CPF
                     with col_e1:
-                        digitador_edit = st.text_input(
+                        # digitador agora é um usuário cadastrado (digitador_id)
+                        df_digitadores = listar_usuarios()
+                        ids_digitadores = df_digitadores["id"].tolist()
+                        nomes_digitadores = dict(zip(df_digitadores["id"], df_digitadores["nome_exibicao"]))
+                        if registro["digitador_id"] in ids_digitadores:
+                            idx_digitador = ids_digitadores.index(registro["digitador_id"])
+                        else:
+                            idx_digitador = 0
+
+                        digitador_id_edit = st.selectbox(
                             "Digitador",
-                            value=str(registro["digitador"] or ""),
+                            ids_digitadores,
+                            index=idx_digitador,
+                            format_func=lambda x: nomes_digitadores.get(x, f"ID {x}"),
                             key=f"edit_digitador_{id_escolhido}",
                         )
+                        digitador_edit = nomes_digitadores.get(digitador_id_edit, "")
                         ade_edit = st.text_input(
                             "ADE",
                             value=str(registro["ade"] or ""),
@@ -1706,10 +1322,7 @@ elif menu == "📁 Consultas / Relatórios":
 
                     # Data / Parceiro / Banco / Tipo
                     with col_e2:
-                        try:
-                            data_base = pd.to_datetime(registro["data"]).date()
-                        except Exception:
-                            data_base = date.today()
+                        data_base = registro["data"].date()
 
                         data_edit = st.date_input(
                             "Data da proposta",
@@ -1717,11 +1330,6 @@ elif menu == "📁 Consultas / Relatórios":
                             key=f"edit_data_{id_escolhido}",
                         )
 
-                        # garante listas atualizadas
-                        parceiros_opcoes = get_parceiros_opcoes()
-                        bancos_opcoes = get_bancos_opcoes()
-                        tipos_produto_base = ["NOVO INSS", "REFIN", "CARTÃO", "FGTS", "SAQUE COMPLEMENTAR", "NOVO - CONVENIO PUBLICO", "REFIN - CONVENIO PUBLICO", "NOVO - AUMENTO", "SEGURO DE VIDA", "CREDITO PESSOAL", "CLT"]
-
                         # parceiro atual da proposta
                         parceiro_val = str(registro["parceiro"] or "")
                         if parceiro_val in parceiros_opcoes:
@@ -1752,23 +1360,24 @@ elif menu == "📁 Consultas / Relatórios":
 
                         # tipo de produto atual
                         tipo_atual = str(registro.get("tipo_produto", "") or "")
-                        if tipo_atual in tipos_produto_base:
-                            idx_tipo = tipos_produto_base.index(tipo_atual)
+                        if tipo_atual in TIPOS_PRODUTO:
+                            idx_tipo = TIPOS_PRODUTO.index(tipo_atual)
                         else:
                             idx_tipo = 0
 
                         tipo_produto_edit = st.selectbox(
                             "Tipo de produto",
-                            tipos_produto_base,
+                            TIPOS_PRODUTO,
                             index=idx_tipo,
                             key=f"edit_tipo_produto_{id_escolhido}",
                         )
 
                     # Valor / Botões
                     with col_e3:
+                        # mostra no mesmo formato aceito na digitação (1500,00)
                         valor_atual = (
-                            registro["valor"]
-                            if pd.notna(registro["valor"])
+                            f"{registro['valor_centavos'] / 100:.2f}".replace(".", ",")
+                            if pd.notna(registro["valor_centavos"])
                             else ""
                         )
                         valor_edit_str = st.text_input(
@@ -1823,14 +1432,25 @@ elif menu == "📁 Consultas / Relatórios":
                                 # monta snapshot antes
                                 detalhes_antes = (
                                     f"ANTES: digitador={registro['digitador']}, "
-                                    f"ade={registro['ade']}, cpf={registro['cpf']}, data={registro['data']}, "
+                                    f"ade={registro['ade']}, cpf={registro['cpf']}, data={registro['data']:%Y-%m-%d}, "
                                     f"parceiro={registro['parceiro']}, tipo_produto={registro.get('tipo_produto','')}, "
                                     f"valor={registro['valor']}, banco={registro['banco']}"
                                 )
 
-                                atualizar_proposta(
+                                # snapshot depois
+                                detalhes_depois = (
+                                    f"DEPOIS: digitador={digitador_edit.strip()}, "
+                                    f"ade={ade_edit.strip()}, cpf={cpf_edit.strip()}, data={data_edit.strftime('%Y-%m-%d')}, "
+                                    f"parceiro={parceiro_edit.strip()}, tipo_produto={tipo_produto_edit}, "
+                                    f"valor={valor_num}, banco={banco_edit.strip()}"
+                                )
+
+                                # alteração + LOG no mesmo commit
+                                atualizar_proposta_com_log(
                                     id_proposta=id_escolhido,
-                                    digitador=digitador_edit.strip(),
+                                    usuario=usuario_logado["usuario"],
+                                    detalhes=f"{detalhes_antes} | {detalhes_depois}",
+                                    digitador_id=digitador_id_edit,
                                     ade=ade_edit.strip(),
                                     cpf=cpf_edit.strip(),
                                     data_str=data_edit.strftime("%Y-%m-%d"),
@@ -1840,24 +1460,6 @@ elif menu == "📁 Consultas / Relatórios":
                                     banco=banco_edit.strip(),
                                 )
 
-                                # snapshot depois
-                                detalhes_depois = (
-                                    f"DEPOIS: digitador={digitador_edit.strip()}, "
-                                    f"ade={ade_edit.strip()}, cpf={cpf_edit.strip()}, data={data_edit.strftime('%Y-%m-%d')}, "
-                                    f"parceiro={parceiro_edit.strip()}, tipo_produto={tipo_produto_edit}, "
-                                    f"valor={valor_num}, banco={banco_edit.strip()}"
-                                )
-
-                                try:
-                                    registrar_log_proposta(
-                                        acao="UPDATE",
-                                        usuario=usuario_logado["usuario"],
-                                        proposta_id=id_escolhido,
-                                        detalhes=f"{detalhes_antes} | {detalhes_depois}",
-                                    )
-                                except Exception as e_log:
-                                    st.warning(f"Atualizou, mas não conseguiu registrar log: {e_log}")
-
                                 st.success("✅ Proposta atualizada com sucesso!")
                                 st.rerun()
                             except Exception as e:
@@ -1871,22 +1473,17 @@ elif menu == "📁 Consultas / Relatórios":
                             # snapshot antes de excluir
                             detalhes_antes = (
                                 f"EXCLUINDO: digitador={registro['digitador']}, "
-                                f"ade={registro['ade']}, cpf={registro['cpf']}, data={registro['data']}, "
+                                f"ade={registro['ade']}, cpf={registro['cpf']}, data={registro['data']:%Y-%m-%d}, "
                                 f"parceiro={registro['parceiro']}, tipo_produto={registro.get('tipo_produto','')}, "
                                 f"valor={registro['valor']}, banco={registro['banco']}"
                             )
 
-                            excluir_proposta_bd(id_escolhido)
-
-                            try:
-                                registrar_log_proposta(
-                                    acao="DELETE",
-                                    usuario=usuario_logado["usuario"],
-                                    proposta_id=id_escolhido,
-                                    detalhes=detalhes_antes,
-                                )
-                            except Exception as e_log:
-                                st.warning(f"Excluiu, mas não conseguiu registrar log: {e_log}")
+                            # exclusão + LOG no mesmo commit
+                            excluir_proposta_com_log(
+                                id_proposta=id_escolhido,
+                                usuario=usuario_logado["usuario"],
+                                detalhes=detalhes_antes,
+                            )
 
                             st.success("🗑 Proposta excluída com sucesso!")
                             st.rerun()
@@ -1894,33 +1491,23 @@ elif menu == "📁 Consultas / Relatórios":
                             st.error(f"Erro ao excluir proposta: {e}")
 
             # --------- TABELA FINAL ---------
-            colunas_ordem = [
-                "id", "digitador", "ade", "cpf", "data",
-                "parceiro", "tipo_produto", "banco", "valor",
-                "valor_considerado", "ignorar_valor"
-            ]
-            colunas_existentes = [c for c in colunas_ordem if c in df.columns]
-            df_exibe = df[colunas_existentes].copy()
-
-            df_exibe = df_exibe.rename(columns={
-                "id": "ID",
-                "digitador": "Digitador",
-                "ade": "ADE",
-                "cpf": "CPF",
-                "data": "Data",
-                "parceiro": "Parceiro",
-                "tipo_produto": "Tipo de Produto",
-                "banco": "Banco",
-                "valor": "Valor",
-                "valor_considerado": "Valor Considerado",
-                "ignorar_valor": "Ignorar Valor?"
-            })
+            total_paginas = -(-resumo["qtd"] // tamanho_pagina)
+            st.dataframe(
+                tabela_consulta(df),
+                use_container_width=True,
+                column_config={"Data": st.column_config.DateColumn(format="DD/MM/YYYY")},
+            )
 
-            st.dataframe(df_exibe, use_container_width=True)
+            navegacao_paginas(
+                "rep_paginas",
+                proxima,
+                f"Página {len(paginas)} de {total_paginas} · {tamanho_pagina} linhas por página",
+            )
 
             # -------------------------------------------------
             # 📥 Exportar dados filtrados (Excel e CSV)
             # -------------------------------------------------
+            # o arquivo com o resultado inteiro só é montado no clique
             st.markdown("### 📥 Exportar dados filtrados")
 
             col_exp1, col_exp2 = st.columns(2)
@@ -1928,12 +1515,9 @@ elif menu == "📁 Consultas / Relatórios":
             # 🔹 Exportar para Excel (.xlsx)
             with col_exp1:
                 try:
-                    buffer = io.BytesIO()
-                    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-                        df_exibe.to_excel(writer, index=False, sheet_name="Propostas")
                     st.download_button(
                         label="⬇️ Baixar Excel (.xlsx)",
-                        data=buffer.getvalue(),
+                        data=lambda: exportar_consulta(where, params, "xlsx"),
                         file_name="propostas_filtradas.xlsx",
                         mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                         key="btn_export_excel",
@@ -1944,10 +1528,9 @@ elif menu == "📁 Consultas / Relatórios":
             # 🔹 Exportar para CSV (.csv)
             with col_exp2:
                 try:
-                    csv = df_exibe.to_csv(index=False).encode("utf-8-sig")
                     st.download_button(
                         label="⬇️ Baixar CSV (.csv)",
-                        data=csv,
+                        data=lambda: exportar_consulta(where, params, "csv"),
                         file_name="propostas_filtradas.csv",
                         mime="text/csv",
                         key="btn_export_csv",
@@ -2101,6 +1684,295 @@ elif menu == "🏦 Cadastro de Bancos":
                 except Exception as e:
                     st.error(f"Erro ao aplicar ação: {e}")
 
+# ------------------------
+# TELA 8 - Importação de Propostas (CSV / XLSX)
+# ------------------------
+elif menu == "📥 Importar Propostas":
+    if usuario_logado["perfil"] != "admin":
+        st.error("Apenas usuários com perfil **admin** podem importar propostas.")
+        st.stop()
+
+    st.subheader("📥 Importação de Propostas em Lote")
+    st.markdown(
+        "Envie uma planilha **.csv** ou **.xlsx** com as colunas "
+        "`ADE`, `CPF`, `Data`, `Parceiro`, `Banco` e, opcionalmente, "
+        "`Tipo de Produto`, `Valor` e `Digitador`. "
+        "Se não houver coluna Digitador, as propostas ficam no seu nome."
+    )
+
+    arquivo = st.file_uploader("Planilha de propostas", type=["csv", "xlsx"], key="imp_arquivo")
+
+    if arquivo is not None:
+        try:
+            df_planilha = ler_planilha(arquivo, arquivo.name)
+        except Exception as e:
+            st.error(f"Não foi possível ler a planilha: {e}")
+            st.stop()
+
+        df_usr_imp = listar_usuarios().drop_duplicates("nome_exibicao")
+        try:
+            df_validas, df_erros = validar_propostas(
+                df_planilha,
+                parceiros_ativos=ids_ativos("parceiros"),
+                bancos_ativos=ids_ativos("bancos"),
+                digitadores=dict(zip(df_usr_imp["nome_exibicao"], df_usr_imp["id"])),
+                tipos_produto=TIPOS_PRODUTO,
+                digitador_padrao=digitador_logado,
+            )
+        except Exception as e:
+            st.error(f"Não foi possível validar a planilha: {e}")
+            st.stop()
+
+        coli1, coli2, coli3 = st.columns(3)
+        with coli1:
+            st.metric("Linhas na planilha", f"{len(df_planilha)}")
+        with coli2:
+            st.metric("Válidas", f"{len(df_validas)}")
+        with coli3:
+            st.metric("Com erro", f"{len(df_erros)}")
+
+        if not df_erros.empty:
+            st.markdown("### ⚠️ Linhas com erro (não serão importadas)")
+            st.dataframe(
+                df_erros.rename(columns={"linha": "Linha da planilha", "erro": "Erros"}),
+                use_container_width=True,
+                height=300,
+            )
+            st.download_button(
+                label="⬇️ Baixar relatório de erros (.csv)",
+                data=df_erros.to_csv(index=False).encode("utf-8-sig"),
+                file_name="erros_importacao.csv",
+                mime="text/csv",
+                key="btn_imp_erros",
+            )
+
+        if not df_validas.empty:
+            st.markdown("### 📋 Prévia das propostas válidas")
+            st.dataframe(df_validas.head(100), use_container_width=True)
+
+            if st.button(f"Importar {len(df_validas)} propostas válidas", key="btn_importar"):
+                try:
+                    qtd = importar_propostas(
+                        df_validas,
+                        usuario=usuario_logado["usuario"],
+                        nome_arquivo=arquivo.name,
+                    )
+                    st.success(f"✅ {qtd} propostas importadas com sucesso!")
+                except Exception as e:
+                    st.error(f"❌ Erro ao importar propostas (nada foi gravado): {e}")
+
+# ------------------------
+# TELA 9 - Diagnóstico
+# ------------------------
+elif menu == "🩺 Diagnóstico":
+    if usuario_logado["perfil"] != "admin":
+        st.error("Apenas usuários com perfil **admin** podem ver o diagnóstico.")
+        st.stop()
+
+    st.subheader("🩺 Diagnóstico do Sistema")
+
+    with conexao() as conn:
+        st.caption(f"Versão do schema do banco: {versao_schema(conn)}")
+        planos = verificar_planos(conn)
+
+    st.markdown("### 🔌 Pool de conexões")
+    for titulo_pool, somente_leitura in [("Leitura (snapshots, mode=ro)", True), ("Leitura e escrita", False)]:
+        stats_pool = estatisticas_pool(somente_leitura)
+        st.caption(titulo_pool)
+
+        colp1, colp2, colp3, colp4 = st.columns(4)
+        with colp1:
+            st.metric("Conexões abertas", f"{stats_pool['abertas']} / {stats_pool['livres']} livres")
+        with colp2:
+            st.metric("Hits / Misses", f"{stats_pool['hits']} / {stats_pool['misses']}")
+        with colp3:
+            st.metric("Taxa de reaproveitamento", f"{stats_pool['taxa_hit']:.1%}")
+        with colp4:
+            st.metric(
+                "Esperas por conexão",
+                f"{stats_pool['esperas']}",
+                help=(
+                    f"Tempo médio: {stats_pool['tempo_espera_medio'] * 1000:.1f} ms · "
+                    f"máximo: {stats_pool['tempo_espera_max'] * 1000:.1f} ms"
+                ),
+            )
+
+    st.markdown("### 🧠 Cache de propostas")
+    stats_cache = metricas_cache_propostas()
+
+    colc1, colc2, colc3, colc4 = st.columns(4)
+    with colc1:
+        st.metric(
+            "Linhas em memória",
+            f"{stats_cache['linhas']:,}".replace(",", "."),
+            help=f"Ocupação do DataFrame: {stats_cache['memoria_mb']:.1f} MB",
+        )
+    with colc2:
+        st.metric(
+            "Cargas completas",
+            f"{stats_cache['cargas_completas']}",
+            help=f"Pelo SQL. A partir do snapshot colunar em disco: {stats_cache['cargas_snapshot']}",
+        )
+    with colc3:
+        st.metric(
+            "Sincronizações incrementais",
+            f"{stats_cache['sincronizacoes_delta']}",
+            help=f"Propostas aplicadas por delta: {stats_cache['linhas_delta']}",
+        )
+    with colc4:
+        st.metric("Última sincronização", f"{stats_cache['ultima_sincronizacao'] * 1000:.1f} ms")
+
+    st.markdown("### ✍️ Fila de escrita")
+    stats_escrita = metricas_escrita()
+
+    cole1, cole2, cole3, cole4 = st.columns(4)
+    with cole1:
+        st.metric(
+            "Profundidade da fila",
+            f"{stats_escrita['profundidade']}",
+            help=f"Máxima já observada: {stats_escrita['profundidade_max']}",
+        )
+    with cole2:
+        st.metric(
+            "Gravações / commits",
+            f"{stats_escrita['gravacoes']} / {stats_escrita['commits']}",
+            help=(
+                f"Gravações com erro: {stats_escrita['gravacoes_com_erro']} · "
+                f"quedas da thread de escrita: {stats_escrita['falhas_thread']}"
+                + (f" (última: {stats_escrita['ultima_falha']})" if stats_escrita["ultima_falha"] else "")
+            ),
+        )
+    with cole3:
+        st.metric(
+            "Lote médio (group commit)",
+            f"{stats_escrita['tamanho_medio_lote']:.1f}",
+            help=f"Maior lote: {stats_escrita['maior_lote']}",
+        )
+    with cole4:
+        st.metric(
+            "Latência do commit",
+            f"{stats_escrita['latencia_commit_media'] * 1000:.1f} ms",
+            help=(
+                f"Máxima: {stats_escrita['latencia_commit_max'] * 1000:.1f} ms · "
+                f"espera média na fila até o commit: {stats_escrita['espera_media'] * 1000:.1f} ms"
+            ),
+        )
+
+    st.markdown("### 🗂 Índices (EXPLAIN QUERY PLAN)")
+    df_planos = pd.DataFrame(planos)
+    sem_indice = df_planos[~df_planos["usa_indice"]]
+    if sem_indice.empty:
+        st.success("Todas as consultas de filtro estão usando os índices esperados.")
+    else:
+        st.warning(
+            "Consultas fazendo varredura completa: "
+            + ", ".join(sem_indice["indice"].tolist())
+        )
+    st.dataframe(
+        df_planos.rename(columns={
+            "indice": "Índice",
+            "usa_indice": "Usa índice?",
+            "plano": "Plano",
+        }),
+        use_container_width=True,
+    )
+
+    st.markdown("### 🧮 Quantidade de propostas por CPF (cpf_stats)")
+    st.caption(
+        "Mantida por triggers para a regra do valor considerado. A conferência "
+        "reconta todas as propostas por CPF: use só quando precisar."
+    )
+    if st.button("Conferir cpf_stats", key="diag_cpf_stats"):
+        with leitura() as conn:
+            divergentes = divergencias_cpf_stats(conn)
+        if divergentes:
+            st.error(f"{divergentes} CPF(s) com contagem divergente em cpf_stats.")
+        else:
+            st.success("cpf_stats confere com a tabela de propostas.")
+
+    st.markdown("### 📅 Produção diária do Dashboard (propostas_diario)")
+    st.caption(
+        "Rollup por dia, banco, parceiro, digitador e tipo de produto, mantido por "
+        "triggers (inclusive o valor considerado de propostas antigas quando o CPF "
+        "ganha ou perde propostas). A conferência recalcula tudo a partir das propostas."
+    )
+    if st.button("Conferir propostas_diario", key="diag_propostas_diario"):
+        with leitura() as conn:
+            divergentes = divergencias_propostas_diario(conn)
+        if divergentes:
+            st.error(f"{divergentes} linha(s) divergente(s) em propostas_diario.")
+        else:
+            st.success("propostas_diario confere com a tabela de propostas.")
+
+    st.markdown("### 🧹 Backup e manutenção")
+    colm1, colm2, _ = st.columns([1, 1, 2])
+    with colm1:
+        if st.button("Fazer backup agora", key="diag_backup"):
+            solicitar_manutencao("backup")
+            st.success("Backup agendado; acompanhe na tabela abaixo.")
+    with colm2:
+        if st.button("Rodar manutenção agora", key="diag_manutencao"):
+            for tarefa in ["optimize", "checkpoint", "incremental_vacuum", "limpar_alteracoes", "snapshot_colunar"]:
+                solicitar_manutencao(tarefa)
+            st.success("Manutenção agendada; acompanhe na tabela abaixo.")
+
+    df_manut = pd.DataFrame(metricas_manutencao())
+    for col in ["ultima_duracao", "duracao_max", "passo_max"]:
+        df_manut[col] = df_manut[col] * 1000
+    st.dataframe(
+        df_manut[[
+            "tarefa", "execucoes", "erros", "ultima_execucao", "ultima_duracao",
+            "duracao_max", "passo_max", "proxima_em", "ultimo_resultado", "ultimo_erro",
+        ]].rename(columns={
+            "tarefa": "Tarefa",
+            "execucoes": "Execuções",
+            "erros": "Erros",
+            "ultima_execucao": "Última execução",
+            "ultima_duracao": "Última duração (ms)",
+            "duracao_max": "Duração máx. (ms)",
+            "passo_max": "Maior passo (ms)",
+            "proxima_em": "Próxima em (s)",
+            "ultimo_resultado": "Resultado",
+            "ultimo_erro": "Último erro",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(
+        "“Maior passo” é o maior tempo contínuo segurando o banco: um passo do "
+        "backup, o ANALYZE ou o incremental_vacuum na fila de escrita, ou o checkpoint."
+    )
+
+    st.markdown("### 🚀 Partida do app")
+    df_partida = pd.DataFrame(metricas_partida())
+    for col in ["orcamento", "primeira", "ultima", "maxima"]:
+        df_partida[col] = df_partida[col] * 1000
+    estouradas = df_partida.loc[~df_partida["dentro_orcamento"], "etapa"].tolist()
+    if estouradas:
+        st.warning(f"Etapas acima do orçamento de tempo: {', '.join(estouradas)}")
+    else:
+        st.success("Partida dentro do orçamento de tempo.")
+    st.dataframe(
+        df_partida[[
+            "etapa", "orcamento", "primeira", "ultima", "maxima", "execucoes", "dentro_orcamento",
+        ]].rename(columns={
+            "etapa": "Etapa",
+            "orcamento": "Orçamento (ms)",
+            "primeira": "Primeira (ms)",
+            "ultima": "Última (ms)",
+            "maxima": "Máxima (ms)",
+            "execucoes": "Execuções",
+            "dentro_orcamento": "Dentro do orçamento?",
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.caption(
+        "“login”: do início do script até a sidebar de login desenhada. "
+        "“modulos_telas”: import do pandas e dos módulos das telas, feito depois do "
+        "login; a primeira execução é a do processo recém-iniciado."
+    )
+
 # ================================
 # RODAPÉ FIXO (INFORMAÇÕES DO SISTEMA)
 # ================================
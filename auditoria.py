@@ -0,0 +1,124 @@
+"""
+Consulta do log de auditoria (log_propostas) direto no SQLite, uma página
+por vez.
+
+O log só recebe INSERTs, com o horário da gravação, então id e timestamp
+crescem juntos. montar_filtro_logs() transforma o período numa faixa de
+ids (as pontas saem do idx_log_propostas_timestamp) e os demais filtros
+são igualdades com índice próprio (migrações 2 e 7). Como todo índice
+secundário termina no rowid, "igualdade + faixa de id" já vem na ordem de
+id: cada página é uma descida no índice, sem ordenar, qualquer que seja o
+tamanho do log.
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+
+ACOES = ["INSERT", "UPDATE", "DELETE"]
+
+SQL_LOGS = "SELECT id, proposta_id, acao, usuario, timestamp, detalhes FROM log_propostas"
+
+
+def intervalo_logs(conn) -> tuple:
+    """(primeira, última) data do log, ou (None, None) se estiver vazio. Usa idx_log_propostas_timestamp."""
+    # um MIN/MAX por SELECT: só assim o SQLite lê a ponta do índice em vez
+    # de varrer a tabela
+    menor, maior = conn.execute(
+        "SELECT (SELECT MIN(timestamp) FROM log_propostas), (SELECT MAX(timestamp) FROM log_propostas);"
+    ).fetchone()
+    if menor is None:
+        return None, None
+    return date.fromisoformat(menor[:10]), date.fromisoformat(maior[:10])
+
+
+def usuarios_do_log(conn) -> list[str]:
+    """
+    Logins distintos do log (inclusive de usuários já excluídos). Salta de
+    um login para o próximo no idx_log_propostas_usuario em vez de varrer
+    o índice inteiro como faria um SELECT DISTINCT.
+    """
+    linhas = conn.execute(
+        """
+        WITH RECURSIVE u(usuario) AS (
+            SELECT MIN(usuario) FROM log_propostas
+            UNION ALL
+            SELECT (SELECT MIN(usuario) FROM log_propostas WHERE usuario > u.usuario)
+            FROM u
+            WHERE u.usuario IS NOT NULL
+        )
+        SELECT usuario FROM u WHERE usuario IS NOT NULL;
+        """
+    ).fetchall()
+    return [usuario for (usuario,) in linhas]
+
+
+def montar_filtro_logs(
+    acao: str | None = None,
+    usuario: str | None = None,
+    proposta_id: int | None = None,
+    data_inicial: date | None = None,
+    data_final: date | None = None,
+    limites: tuple | None = None,
+) -> tuple[str, list]:
+    """
+    Devolve (where, params) para log_propostas. where vazio = sem filtro.
+
+    - None não filtra
+    - limites: (primeira, última) data do log; se o período cobre tudo, o
+      filtro de período é omitido
+    """
+    condicoes, params = [], []
+
+    if acao:
+        condicoes.append("acao = ?")
+        params.append(acao)
+
+    if usuario:
+        condicoes.append("usuario = ?")
+        params.append(usuario)
+
+    if proposta_id is not None:
+        condicoes.append("proposta_id = ?")
+        params.append(int(proposta_id))
+
+    if data_inicial is not None and (limites is None or data_inicial > limites[0]):
+        # sem log no período, a subconsulta dá NULL e nenhuma linha passa
+        condicoes.append(
+            "id >= (SELECT id FROM log_propostas WHERE timestamp >= ? ORDER BY timestamp LIMIT 1)"
+        )
+        params.append(data_inicial.isoformat())
+
+    if data_final is not None and (limites is None or data_final < limites[1]):
+        condicoes.append(
+            "id <= (SELECT id FROM log_propostas WHERE timestamp < ? ORDER BY timestamp DESC LIMIT 1)"
+        )
+        params.append((data_final + timedelta(days=1)).isoformat())
+
+    return " AND ".join(condicoes), params
+
+
+def pagina_logs(where: str, params: list, conn, tamanho: int = 50, apos: int | None = None) -> tuple[pd.DataFrame, int | None]:
+    """
+    Uma página do log, do mais recente para o mais antigo.
+
+    Paginação por keyset: `apos` é o id da última linha da página anterior
+    (None na primeira). Devolve (página, id para a próxima página ou None
+    se esta é a última).
+    """
+    condicoes, valores = ([f"({where})"], list(params)) if where else ([], [])
+    if apos is not None:
+        condicoes.append("id < ?")
+        valores.append(int(apos))
+    filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+    # uma linha a mais só para saber se existe próxima página
+    df = pd.read_sql_query(
+        f"{SQL_LOGS} {filtro} ORDER BY id DESC LIMIT ?;",
+        conn,
+        params=valores + [tamanho + 1],
+    )
+    proxima = None
+    if len(df) > tamanho:
+        df = df.iloc[:tamanho]
+        proxima = int(df["id"].iloc[-1])
+    return df, proxima
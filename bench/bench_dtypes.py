@@ -0,0 +1,63 @@
+"""
+Tipos compactos no DataFrame das propostas em memória.
+
+Compara o frame com os tipos anteriores (textos como "str", ids int64)
+com o de tipar_propostas (dimensões e cpf como category, ids int32):
+memória (memory_usage deep) e as operações típicas das telas.
+
+    python bench/bench_dtypes.py PASTA
+"""
+import sys
+
+import comum
+
+
+def operacoes(df, contar_por_cpf):
+    return {
+        "groupby banco sum": lambda: df.groupby("banco", observed=True)["valor_centavos"].sum(),
+        "groupby digitador agg": lambda: df.groupby("digitador", observed=True).agg(
+            qtd=("id", "count"), valor=("valor_centavos", "sum"), clientes=("cpf", "nunique")
+        ),
+        "groupby parceiro+tipo sum": lambda: df.groupby(["parceiro", "tipo_produto"], observed=True)[
+            "valor_centavos"
+        ].sum(),
+        "filtro banco ==": lambda: df[df["banco"] == df["banco"].iloc[0]],
+        "contagem por CPF": lambda: contar_por_cpf(df["cpf"]),
+    }
+
+
+def main(pasta: str):
+    comum.entrar_na_base(pasta)
+    import pandas as pd
+
+    import filtros
+    from cache_propostas import TIPOS_COLUNAS, get_cache_propostas
+    from db import leitura
+
+    with leitura() as conn:
+        depois = get_cache_propostas().obter(conn)
+    tipos_antes = {
+        coluna: "str" if tipo == "category" else "int64" if tipo == "int32" else tipo
+        for coluna, tipo in TIPOS_COLUNAS.items()
+    }
+    antes = depois.astype(tipos_antes)
+
+    print(f"{len(depois)} propostas, {depois['cpf'].nunique()} CPFs distintos")
+    print(f"{'memory_usage(deep=True)':<45} {antes.memory_usage(deep=True).sum() / 2**20:8.1f} MB"
+          f" -> {depois.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+
+    # contagem por CPF de antes: value_counts + map
+    contar_antes = lambda cpf: cpf.map(cpf.value_counts())  # noqa: E731
+    medidas_antes = operacoes(antes, contar_antes)
+    medidas_depois = operacoes(depois, filtros._contar_por_cpf)
+    for nome in medidas_antes:
+        r_antes = comum.medir(f"{nome} (antes)", medidas_antes[nome])
+        r_depois = comum.medir(f"{nome} (depois)", medidas_depois[nome])
+        if nome == "contagem por CPF":
+            assert (r_antes.to_numpy() == r_depois).all()
+        else:
+            assert len(r_antes) == len(r_depois)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
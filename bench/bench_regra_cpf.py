@@ -0,0 +1,53 @@
+"""
+Motor único da regra do valor considerado (aplicar_regra_cpf).
+
+Sobre a base inteira em memória, compara a regra antiga da Performance
+(value_counts do CPF + map com lambda por linha) com os escopos de
+aplicar_regra_cpf, conferindo os valores:
+
+- periodo: mesmo resultado da regra antiga
+- banco: igual a groupby([cpf, banco_id]).transform("size")
+- base: com qtd_cpf já calculado (cpf_stats no SQL)
+
+    python bench/bench_regra_cpf.py PASTA
+"""
+import sys
+
+import comum
+
+import numpy as np
+
+
+def regra_antiga(df):
+    cpf_counts = df["cpf"].value_counts()
+    df["ignorar_valor"] = df["cpf"].map(lambda c: cpf_counts.get(c, 0) > 1)
+    df["valor_considerado_centavos"] = np.where(df["ignorar_valor"], 0, df["valor_centavos"].fillna(0))
+    df["valor_considerado"] = df["valor_considerado_centavos"] / 100
+    return df
+
+
+def main(pasta: str):
+    comum.entrar_na_base(pasta)
+    import filtros
+    from cache_propostas import get_cache_propostas
+    from db import leitura
+
+    with leitura() as conn:
+        base = get_cache_propostas().obter(conn).copy(deep=False)
+    print(f"{len(base)} propostas")
+
+    antiga = comum.medir("antes: value_counts + map(lambda)", lambda: regra_antiga(base.copy(deep=False)), 1)
+    periodo = comum.medir("periodo", lambda: filtros.aplicar_regra_cpf(base.copy(deep=False), "periodo"))
+    assert (periodo["valor_considerado_centavos"].to_numpy() == antiga["valor_considerado_centavos"].to_numpy()).all()
+
+    banco = comum.medir("banco", lambda: filtros.aplicar_regra_cpf(base.copy(deep=False), "banco"))
+    esperado = base.groupby(["cpf", "banco_id"], observed=True)["id"].transform("size")
+    assert (banco["qtd_cpf"].to_numpy() == esperado.to_numpy()).all()
+
+    com_qtd = base.copy(deep=False)
+    com_qtd["qtd_cpf"] = filtros._contar_por_cpf(com_qtd["cpf"])
+    comum.medir("base (qtd_cpf pronto)", lambda: filtros.aplicar_regra_cpf(com_qtd.copy(deep=False), "base"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
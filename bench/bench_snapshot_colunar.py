@@ -0,0 +1,86 @@
+"""
+Snapshot colunar das propostas mapeado em memória.
+
+Na pasta da base (o snapshot é regravado em PASTA/propostas_colunas):
+
+- carga completa pelo SQL (read_sql_query da vw_propostas + tipagem)
+- gravação do snapshot e abertura dele com np.memmap
+- carga de um cache novo (processo recém-iniciado) a partir do snapshot,
+  igual à do SQL coluna a coluna, e depois de 3 alterações (snapshot +
+  delta do log)
+- groupby no frame mapeado contra o frame em memória
+
+Altera 3 propostas da base (update, delete e insert) para medir o delta.
+
+    python bench/bench_snapshot_colunar.py PASTA
+"""
+import shutil
+import sys
+
+import comum
+
+
+def _comparar(df, esperado):
+    """Mesmos valores coluna a coluna (categorias e arrays mapeados comparados pelo conteúdo)."""
+    import pandas as pd
+
+    def normalizar(frame):
+        return frame.astype({c: object for c in frame.select_dtypes("category")}).copy()
+
+    pd.testing.assert_frame_equal(normalizar(df), normalizar(esperado))
+
+
+def main(pasta: str):
+    comum.entrar_na_base(pasta)
+    import pandas as pd
+
+    from cache_propostas import CachePropostas
+    from db import executar_escrita, leitura
+    from snapshot_colunar import PASTA_SNAPSHOT, abrir_snapshot, gravar_snapshot
+
+    shutil.rmtree(PASTA_SNAPSHOT, ignore_errors=True)
+
+    def carga_nova():
+        cache = CachePropostas()
+        with leitura() as conn:
+            df = cache.obter(conn)
+        return cache, df
+
+    cache_sql, df_sql = comum.medir("carga pelo SQL (read_sql + tipagem)", carga_nova, repeticoes=1)
+    df, versao, ultimo_seq = cache_sql.estado()
+    manifesto = comum.medir("gravar_snapshot", lambda: gravar_snapshot(df, versao, ultimo_seq), repeticoes=1)
+    print(f"{len(df)} propostas, {manifesto['bytes'] / 2**20:.1f} MB em disco")
+    mapeado, _ = comum.medir("abrir_snapshot (memmap)", abrir_snapshot)
+
+    cache, df_snapshot = comum.medir("cache novo a partir do snapshot", carga_nova)
+    assert cache.metricas()["cargas_snapshot"] == 1
+    _comparar(df_snapshot, df_sql)
+
+    def alterar(conn):
+        ids = [i for (i,) in conn.execute("SELECT id FROM propostas ORDER BY id DESC LIMIT 3;")]
+        conn.execute("UPDATE propostas SET valor_centavos = valor_centavos + 1 WHERE id = ?;", (ids[0],))
+        conn.execute("DELETE FROM propostas WHERE id = ?;", (ids[1],))
+        conn.execute(
+            """
+            INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+            SELECT digitador_id, 'BENCH', cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id
+            FROM propostas WHERE id = ?;
+            """,
+            (ids[2],),
+        )
+
+    executar_escrita(alterar)
+    _, df_delta = comum.medir("cache novo: snapshot + delta de 3 alterações", carga_nova)
+    with leitura() as conn:
+        from cache_propostas import SQL_PROPOSTAS, tipar_propostas
+
+        esperado = tipar_propostas(pd.read_sql_query(SQL_PROPOSTAS + " ORDER BY id DESC;", conn))
+    _comparar(df_delta, esperado)
+
+    for nome, frame in [("em memória", df_sql), ("mapeado", mapeado)]:
+        comum.medir(f"groupby banco sum ({nome})", lambda: frame.groupby("banco", observed=True)["valor_centavos"].sum())
+        comum.medir(f"value_counts cpf ({nome})", lambda: frame["cpf"].value_counts())
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -0,0 +1,68 @@
+"""
+Um snapshot imutável das propostas compartilhado pelas sessões.
+
+Simula N sessões que rodam o Dashboard no período inteiro e seguram os
+frames ao mesmo tempo, medindo com tracemalloc a memória alocada além do
+cache do processo:
+
+- antes: cada sessão copiava o frame (consultar_propostas devolvia cópia),
+  recalculava as colunas da regra de CPF e ainda fazia df_graf = df.copy()
+- depois: cada sessão recebe uma cópia rasa de filtros.consultar_propostas
+
+    python bench/bench_snapshot_compartilhado.py PASTA [SESSOES]
+"""
+import sys
+import tracemalloc
+
+import comum
+
+import numpy as np
+
+
+def sessao_antes(base):
+    df = base.copy()
+    df["ignorar_valor"] = df["qtd_cpf"] > 1
+    df["valor_considerado_centavos"] = np.where(df["ignorar_valor"], 0, df["valor_centavos"].fillna(0))
+    df["valor_considerado"] = df["valor_considerado_centavos"] / 100
+    df_graf = df.copy()
+    return df, df_graf
+
+
+def sessao_depois(conn):
+    import filtros
+
+    df = filtros.consultar_propostas("", [], conn)
+    df_graf = df
+    return df, df_graf
+
+
+def medir_sessoes(nome, sessoes, rodar):
+    tracemalloc.start()
+    guardadas = [rodar() for _ in range(sessoes)]
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{nome:<20} {atual / 2**20:10.2f} MB em {sessoes} sessões ({atual / 2**20 / sessoes:.2f} MB por sessão)")
+    return guardadas
+
+
+def main(pasta: str, sessoes: int):
+    comum.entrar_na_base(pasta)
+    import filtros
+    from cache_propostas import get_cache_propostas
+    from db import leitura
+
+    with leitura() as conn:
+        # cache do processo e snapshot com a regra de CPF, montados uma vez
+        # (fora da medição, nos dois casos)
+        base = get_cache_propostas().obter(conn).copy(deep=False)
+        base["qtd_cpf"] = filtros._contar_por_cpf(base["cpf"])
+        compartilhado = filtros.consultar_propostas("", [], conn)
+        print(f"{len(base)} propostas; snapshot compartilhado: "
+              f"{compartilhado.memory_usage(deep=True).sum() / 2**20:.1f} MB (uma vez por processo)")
+
+        medir_sessoes("antes (cópias)", sessoes, lambda: sessao_antes(base))
+        medir_sessoes("depois (rasas)", sessoes, lambda: sessao_depois(conn))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 10)
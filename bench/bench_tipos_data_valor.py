@@ -0,0 +1,48 @@
+"""
+Data como número do dia e valor em centavos inteiros.
+
+Compara, em N linhas sintéticas (padrão 1M, ~650 dias distintos):
+
+- conversão da coluna data: pd.to_datetime no texto ISO (antes) contra a
+  conversão de unidade do número do dia (tipar_propostas)
+- filtro de período: comparação de .dt.date com objetos date (antes)
+  contra comparação direta em datetime64
+
+    python bench/bench_tipos_data_valor.py [N]
+"""
+import sys
+from datetime import date
+
+import comum
+
+import numpy as np
+import pandas as pd
+
+
+def main(n: int):
+    rng = np.random.default_rng(0)
+    dias = rng.integers(19723, 19723 + 650, n)            # 2024-01-01 em diante
+    texto = pd.Series(pd.to_datetime(dias, unit="D").strftime("%Y-%m-%d"))
+    numeros = pd.Series(dias)
+    inicio, fim = date(2025, 3, 1), date(2025, 3, 31)
+    print(f"{n} linhas")
+
+    antes = comum.medir("data: pd.to_datetime(texto ISO)", lambda: pd.to_datetime(texto, errors="coerce"))
+    depois = comum.medir("data: to_datetime(dia, unit='D')", lambda: pd.to_datetime(numeros, unit="D"))
+    assert (antes == depois).all()
+
+    df = pd.DataFrame({"data": depois})
+    filtrado_antes = comum.medir(
+        "período: .dt.date entre date(...)",
+        lambda: df[(df["data"].dt.date >= inicio) & (df["data"].dt.date <= fim)],
+    )
+    ini64, fim64 = pd.Timestamp(inicio), pd.Timestamp(fim)
+    filtrado_depois = comum.medir(
+        "período: datetime64 entre Timestamp(...)",
+        lambda: df[(df["data"] >= ini64) & (df["data"] <= fim64)],
+    )
+    assert filtrado_antes.index.equals(filtrado_depois.index)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,34 @@
+"""
+Apoio dos benchmarks: cronômetro e abertura de uma base gerada por
+gerar_base.py. Os scripts rodam fora do app, com a raiz do repositório no
+sys.path e o diretório da base como diretório atual (o db.DB_PATH é
+relativo).
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+
+def entrar_na_base(pasta: str):
+    """Muda para a pasta com o propostas.db e deixa o schema atualizado."""
+    os.chdir(pasta)
+    if not os.path.exists("propostas.db"):
+        raise SystemExit(f"{pasta}/propostas.db não existe; gere com bench/gerar_base.py {pasta} N")
+    import migracoes
+
+    migracoes.garantir_schema()
+
+
+def medir(nome: str, funcao, repeticoes: int = 3):
+    """Roda funcao repeticoes vezes, imprime o melhor tempo (ms) e devolve o último resultado."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    print(f"{nome:<45} {min(tempos) * 1000:10.1f} ms")
+    return resultado
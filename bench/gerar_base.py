@@ -0,0 +1,69 @@
+"""
+Gera PASTA/propostas.db com N propostas sintéticas, gravadas pela
+importação (mesmo caminho do app: triggers, cpf_stats e propostas_diario
+mantidos).
+
+    python bench/gerar_base.py PASTA N [SEMENTE]
+
+Cerca de N/2 CPFs distintos (~40% deles repetidos), 30 digitadores,
+todos os parceiros e bancos iniciais e ~650 dias a partir de 2024-01-01.
+"""
+import os
+import sys
+import time
+
+import comum  # noqa: F401  (raiz do repositório no sys.path)
+
+import numpy as np
+import pandas as pd
+
+LOTE = 200_000
+
+
+def gerar(n: int, semente: int = 0):
+    import db
+    import importacao
+    import migracoes
+    from catalogos import TIPOS_PRODUTO
+
+    migracoes.garantir_schema()
+    rng = np.random.default_rng(semente)
+    with db.conexao() as conn:
+        parceiros = dict(conn.execute("SELECT descricao, id FROM parceiros WHERE ativo = 1;").fetchall())
+        bancos = dict(conn.execute("SELECT descricao, id FROM bancos WHERE ativo = 1;").fetchall())
+    nomes = [f"Digitador {i}" for i in range(1, 31)]
+    db.executar_escrita(lambda conn: conn.executemany(
+        "INSERT OR IGNORE INTO usuarios (usuario, nome_exibicao, senha_hash, perfil) VALUES (?, ?, '!', 'digitador');",
+        [(f"dig{i}", nome) for i, nome in enumerate(nomes, start=1)],
+    ))
+    with db.conexao() as conn:
+        digitadores = dict(conn.execute("SELECT nome_exibicao, id FROM usuarios;").fetchall())
+
+    descricoes_parceiros = [p for p in parceiros if p != "Selecione o parceiro"]
+    planilha = pd.DataFrame({
+        "digitador": rng.choice(nomes, n),
+        "ade": rng.integers(1, 10**9, n).astype(str),
+        "cpf": rng.integers(10**9, 10**9 + n // 2, n).astype(str),
+        "data": (pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 650, n), unit="D")).strftime("%Y-%m-%d"),
+        "parceiro": rng.choice(descricoes_parceiros, n),
+        "banco": rng.choice(list(bancos), n),
+        "tipo_produto": rng.choice(TIPOS_PRODUTO, n),
+        "valor": pd.Series(np.round(rng.uniform(100, 9000, n), 2).astype(str)).str.replace(".", ",", regex=False),
+    })
+    validas, erros = importacao.validar_propostas(
+        planilha, parceiros, bancos, digitadores, TIPOS_PRODUTO, "Administrador"
+    )
+    if not erros.empty:
+        raise SystemExit(erros.head().to_string())
+    for inicio in range(0, len(validas), LOTE):
+        importacao.importar_propostas(validas.iloc[inicio:inicio + LOTE], "admin", "gerar_base")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        raise SystemExit(__doc__)
+    os.makedirs(sys.argv[1], exist_ok=True)
+    os.chdir(sys.argv[1])
+    inicio = time.perf_counter()
+    gerar(int(sys.argv[2]), int(sys.argv[3]) if len(sys.argv) > 3 else 0)
+    print(f"{sys.argv[2]} propostas geradas em {time.perf_counter() - inicio:.1f} s")
@@ -0,0 +1,331 @@
+"""
+Cache em memória das propostas, compartilhado por todas as sessões do
+processo e atualizado de forma incremental.
+
+Triggers (migração 6) registram em propostas_alteracoes o id de cada
+proposta inserida, alterada ou excluída. Quando o contador de versão muda,
+o cache lê só as alterações posteriores à última sincronizada e as aplica
+no DataFrame em memória: ids novos entram no topo, alterados são
+substituídos na posição e excluídos saem. Só relê a tabela inteira na
+primeira carga, quando um cadastro usado pela vw_propostas muda (nome de
+parceiro, banco ou digitador) ou quando o log já foi limpo além do ponto
+do cache.
+
+Numa carga completa, o cache parte do snapshot colunar em disco
+(snapshot_colunar, mapeado com np.memmap) quando ele é dos mesmos
+cadastros e o log ainda cobre o que mudou depois dele: só as alterações
+posteriores saem do SQLite. materializar_snapshot() é a tarefa da
+manutenção que regrava o snapshot a partir do cache.
+
+O DataFrame publicado nunca é alterado: cada sincronização monta um novo
+e troca a referência.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from db import leitura, versao_atrasada, versao_dados
+from snapshot_colunar import PASTA_SNAPSHOT, abrir_snapshot, gravar_snapshot, ler_manifesto
+
+# O DataFrame do cache é entregue às sessões por cópia rasa: só é seguro
+# com copy-on-write, padrão (e sem como desligar) a partir do pandas 3,
+# exigido no requirements.txt. No pandas 2 a alteração in-place de uma
+# sessão mudaria os dados de todas, então liga explicitamente.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Cadastros lidos pela vw_propostas: mudança em qualquer um recarrega tudo
+TABELAS_CADASTRO = ("parceiros", "bancos", "usuarios")
+
+SQL_PROPOSTAS = "SELECT * FROM vw_propostas"
+
+# Acima disso de propostas já em memória alteradas/excluídas num delta
+# (ex.: UPDATE em massa), recarregar tudo sai mais barato que fatiar
+LIMITE_DELTA = 2000
+CONSOLIDAR_A_CADA = 10_000
+
+# Tipos fixos das colunas: o read_sql deduz pelo conteúdo (um delta com
+# tudo NULL viria como object) e o delta precisa casar com o cache.
+# - dimensões de baixa cardinalidade como category: groupby e igualdade
+#   rodam nos códigos inteiros
+# - cpf também como category (dicionário): códigos int32 + cada CPF
+#   guardado uma vez, sem perder zeros à esquerda nem textos fora do
+#   padrão; a contagem por CPF vira um bincount dos códigos
+# - ids em int32
+TIPOS_COLUNAS = {
+    "id": "int32",
+    "digitador": "category",
+    "ade": "str",
+    "cpf": "category",
+    "parceiro": "category",
+    "tipo_produto": "category",
+    "valor_centavos": "Int64",
+    "valor": "float64",
+    "banco": "category",
+    "digitador_id": "int32",
+    "parceiro_id": "int32",
+    "banco_id": "int32",
+}
+
+COLUNAS_CATEGORIA = [c for c, tipo in TIPOS_COLUNAS.items() if tipo == "category"]
+
+
+def tipar_propostas(df: pd.DataFrame) -> pd.DataFrame:
+    """data (número do dia) -> datetime64, valor_centavos -> Int64 e o resto em TIPOS_COLUNAS."""
+    df = df.astype(TIPOS_COLUNAS)
+    df["data"] = pd.to_datetime(df["data"].astype("int64"), unit="D")
+    return df
+
+
+def _categorias_em_codigos(base: pd.DataFrame, novos: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame, dict]:
+    """
+    Troca as colunas category da base e do delta pelos códigos inteiros,
+    numa numeração comum, e devolve os dtypes para remontar depois do
+    concat. Valores novos (ex.: CPF ainda não visto) entram no fim das
+    categorias da base, sem mudar os códigos existentes.
+
+    O concat de category compara as categorias por hash a cada pedaço; com
+    centenas de milhares de CPFs isso custava mais que o delta inteiro.
+    """
+    base = base.copy(deep=False)
+    novos = novos.copy(deep=False)
+    tipos = {}
+    for coluna in COLUNAS_CATEGORIA:
+        tipo = base[coluna].dtype
+        faltando = novos[coluna].cat.categories.difference(tipo.categories)
+        if len(faltando):
+            tipo = pd.CategoricalDtype(tipo.categories.append(faltando))
+        tipos[coluna] = tipo
+        base[coluna] = base[coluna].cat.codes
+        novos[coluna] = novos[coluna].astype(tipo).cat.codes
+    return base, novos, tipos
+
+
+def _codigos_em_categorias(df: pd.DataFrame, tipos: dict) -> pd.DataFrame:
+    for coluna, tipo in tipos.items():
+        df[coluna] = pd.Categorical.from_codes(df[coluna].to_numpy(), dtype=tipo, validate=False)
+    return df
+
+
+def _consolidar(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cada delta deixa as colunas de texto (pyarrow) em mais pedaços e as
+    categorias acumulam valores que já saíram da base; de tempos em tempos
+    as duas coisas são refeitas.
+    """
+    texto = [c for c, tipo in TIPOS_COLUNAS.items() if tipo == "str"]
+    df = df.astype({c: object for c in texto}).astype({c: "str" for c in texto})
+    for coluna in COLUNAS_CATEGORIA:
+        df[coluna] = df[coluna].cat.remove_unused_categories()
+    return df
+
+
+class CachePropostas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._df = None
+        self._versao = None
+        self._ultimo_seq = 0
+        self._deltas_desde_consolidacao = 0
+        self._stats = {
+            "cargas_completas": 0,
+            "cargas_snapshot": 0,
+            "sincronizacoes_delta": 0,
+            "linhas_delta": 0,
+            "ultima_sincronizacao": 0.0,
+        }
+
+    def obter(self, conn) -> pd.DataFrame:
+        """
+        Devolve o DataFrame das propostas (ordenado por id desc) no estado
+        do snapshot de `conn`, sincronizando antes se houve gravação.
+
+        O cache só anda para a frente: se o snapshot de `conn` é anterior
+        ao do cache (outra sessão sincronizou depois que ele foi aberto),
+        devolve o estado mais novo, sem voltar a versão nem recarregar
+        num snapshot velho.
+        """
+        versao = versao_dados(conn, ("propostas",) + TABELAS_CADASTRO)
+        df = self._df
+        if df is not None and versao == self._versao:
+            return df
+
+        with self._lock:
+            if self._df is not None and (versao == self._versao or versao_atrasada(versao, self._versao)):
+                return self._df
+            inicio = time.perf_counter()
+            if self._df is None or versao[1:] != self._versao[1:] or not self._delta_ou_falha(conn):
+                self._carregar_tudo(conn, versao)
+            self._versao = versao
+            self._stats["ultima_sincronizacao"] = time.perf_counter() - inicio
+            return self._df
+
+    def _carregar_tudo(self, conn, versao):
+        if self._carregar_snapshot(conn, versao):
+            return
+        # seq lido no mesmo snapshot da tabela: as próximas sincronizações
+        # partem exatamente daqui
+        (ultimo_seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM propostas_alteracoes;").fetchone()
+        self._df = tipar_propostas(pd.read_sql_query(SQL_PROPOSTAS + " ORDER BY id DESC;", conn))
+        self._ultimo_seq = ultimo_seq
+        self._deltas_desde_consolidacao = 0
+        self._stats["cargas_completas"] += 1
+
+    def _carregar_snapshot(self, conn, versao) -> bool:
+        """
+        Carga a partir do snapshot colunar + delta do log desde ele. False =
+        não há snapshot utilizável (outros cadastros, banco mais antigo que
+        o snapshot ou log já limpo além dele) e a carga vai pelo SQL.
+        """
+        try:
+            aberto = abrir_snapshot()
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if aberto is None:
+            return False
+        df, manifesto = aberto
+        versao_snapshot, ultimo_seq = tuple(manifesto["versao"]), manifesto["ultimo_seq"]
+        (maior_seq,) = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM propostas_alteracoes;").fetchone()
+        if versao_snapshot[1:] != versao[1:] or versao_snapshot[0] > versao[0] or ultimo_seq > maior_seq:
+            return False
+
+        anterior = (self._df, self._ultimo_seq)
+        self._df, self._ultimo_seq = df, ultimo_seq
+        if not self._delta_ou_falha(conn):
+            self._df, self._ultimo_seq = anterior
+            return False
+        self._deltas_desde_consolidacao = 0
+        self._stats["cargas_snapshot"] += 1
+        return True
+
+    def _delta_ou_falha(self, conn) -> bool:
+        # qualquer surpresa no merge cai para a carga completa; o cache só é
+        # trocado no fim de _aplicar_delta, então nada fica pela metade
+        try:
+            return self._aplicar_delta(conn)
+        except (TypeError, ValueError, KeyError):
+            return False
+
+    def _aplicar_delta(self, conn) -> bool:
+        """Aplica as alterações desde o último seq. False = precisa recarregar tudo."""
+        menor_seq, maior_seq = conn.execute(
+            "SELECT MIN(seq), MAX(seq) FROM propostas_alteracoes;"
+        ).fetchone()
+        if maior_seq is None or maior_seq <= self._ultimo_seq:
+            # nada depois do cache (um snapshot anterior a ele já saiu em obter)
+            return True
+        if menor_seq > self._ultimo_seq + 1:
+            # o log foi limpo além do ponto do cache
+            return False
+
+        intervalo = (self._ultimo_seq, maior_seq)
+        ids = pd.read_sql_query(
+            "SELECT DISTINCT proposta_id FROM propostas_alteracoes WHERE seq > ? AND seq <= ?;",
+            conn,
+            params=intervalo,
+        )["proposta_id"].to_numpy()
+        novos = tipar_propostas(pd.read_sql_query(
+            SQL_PROPOSTAS
+            + " WHERE id IN (SELECT proposta_id FROM propostas_alteracoes WHERE seq > ? AND seq <= ?)"
+            + " ORDER BY id DESC;",
+            conn,
+            params=intervalo,
+        ))
+
+        base, novos, tipos = _categorias_em_codigos(self._df, novos)
+        ids_base = base["id"].to_numpy()
+        maior_id = ids_base[0] if len(ids_base) else 0
+
+        # base ordenada por id desc: posição de cada id alterado por busca binária
+        existentes = ids[ids <= maior_id]
+        posicoes = np.searchsorted(-ids_base, -existentes)
+        achou = posicoes < len(ids_base)
+        achou[achou] = ids_base[posicoes[achou]] == existentes[achou]
+        posicoes = np.sort(posicoes[achou])
+        if len(posicoes) > LIMITE_DELTA:
+            return False
+
+        # Monta o novo DataFrame por fatias da base (sem reescrever colunas
+        # inteiras): inseridos no topo, alterados trocados na mesma posição
+        # e excluídos simplesmente pulados. AUTOINCREMENT garante que os ids
+        # inseridos são maiores que qualquer um do cache.
+        novos_por_id = novos.set_index("id", drop=False)
+        pecas = [novos[novos["id"] > maior_id]]
+        inicio = 0
+        for posicao in posicoes:
+            pecas.append(base.iloc[inicio:posicao])
+            id_alterado = ids_base[posicao]
+            if id_alterado in novos_por_id.index:
+                pecas.append(novos_por_id.loc[[id_alterado]])
+            inicio = posicao + 1
+        pecas.append(base.iloc[inicio:])
+        df = _codigos_em_categorias(pd.concat(pecas, ignore_index=True), tipos)
+
+        self._deltas_desde_consolidacao += 1
+        if self._deltas_desde_consolidacao >= CONSOLIDAR_A_CADA:
+            df = _consolidar(df)
+            self._deltas_desde_consolidacao = 0
+
+        self._df = df
+        self._ultimo_seq = maior_seq
+        self._stats["sincronizacoes_delta"] += 1
+        self._stats["linhas_delta"] += len(ids)
+        return True
+
+    def estado(self) -> tuple:
+        """(DataFrame, versão, último seq) coerentes entre si, do último sincronizado."""
+        with self._lock:
+            return self._df, self._versao, self._ultimo_seq
+
+    def metricas(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["linhas"] = 0 if self._df is None else len(self._df)
+            stats["memoria_mb"] = 0.0 if self._df is None else self._df.memory_usage(deep=True).sum() / 2**20
+            stats["ultimo_seq"] = self._ultimo_seq
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache_propostas() -> CachePropostas:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CachePropostas()
+    return _cache
+
+
+def metricas_cache_propostas() -> dict:
+    return get_cache_propostas().metricas()
+
+
+def materializar_snapshot(pasta: str = PASTA_SNAPSHOT) -> dict:
+    """
+    Tarefa da manutenção: sincroniza o cache e grava o estado dele como
+    snapshot colunar, se o manifesto em disco ainda não é desse estado.
+    """
+    inicio = time.perf_counter()
+    cache = get_cache_propostas()
+    with leitura() as conn:
+        cache.obter(conn)
+    passo = time.perf_counter() - inicio
+    df, versao, ultimo_seq = cache.estado()
+
+    try:
+        manifesto = ler_manifesto(pasta)
+    except ValueError:
+        manifesto = None
+    if manifesto is not None and tuple(manifesto["versao"]) == versao and manifesto["ultimo_seq"] == ultimo_seq:
+        return {"passo_max": passo, "obs": f"snapshot {manifesto['geracao']} já atualizado"}
+
+    manifesto = gravar_snapshot(df, versao, ultimo_seq, pasta)
+    return {
+        "passo_max": passo,
+        "obs": f"{manifesto['linhas']} linhas, {manifesto['bytes'] / 2**20:.1f} MB em {manifesto['geracao']}",
+    }
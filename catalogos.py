@@ -0,0 +1,77 @@
+"""
+Listas de apoio das telas (parceiros, bancos e tipos de produto) em
+memória, compartilhadas por todas as sessões do processo.
+
+Parceiros e bancos só mudam pelas telas de cadastro (inserir, ativar /
+desativar e excluir). Cada lista fica guardada junto com o contador de
+versão da tabela (versao_dados, migração 5); os triggers incrementam o
+contador no mesmo commit da gravação, venha ela deste processo ou de
+outro. Validar a lista custa uma leitura da versao_dados por chamada, em
+vez da consulta + ordenação a cada rerun, e a primeira leitura depois de
+um cadastro já enxerga a lista nova.
+"""
+import threading
+
+import pandas as pd
+
+from db import leitura, versao_dados
+
+# Tipos de produto aceitos no lançamento, na edição e na importação
+TIPOS_PRODUTO = [
+    "NOVO INSS",
+    "REFIN",
+    "CARTÃO",
+    "FGTS",
+    "SAQUE COMPLEMENTAR",
+    "NOVO - CONVENIO PUBLICO",
+    "REFIN - CONVENIO PUBLICO",
+    "NOVO - AUMENTO",
+    "SEGURO DE VIDA",
+    "CREDITO PESSOAL",
+    "CLT",
+]
+
+TABELAS_CATALOGO = ("parceiros", "bancos")
+
+# tabela -> (versão, DataFrame id/descricao/ativo, descrições ativas, descrição -> id dos ativos)
+_catalogos = {}
+_catalogos_lock = threading.Lock()
+
+
+def _catalogo(tabela: str, conn=None) -> tuple:
+    if tabela not in TABELAS_CATALOGO:
+        raise ValueError(f"Catálogo desconhecido: {tabela}")
+
+    with leitura(conn) as conn:
+        (versao,) = versao_dados(conn, (tabela,))
+        atual = _catalogos.get(tabela)
+        if atual is not None and atual[0] == versao:
+            return atual
+        # ORDER BY no SQLite (BINARY) = mesma ordem do sort de strings do Python
+        df = pd.read_sql_query(f"SELECT id, descricao, ativo FROM {tabela} ORDER BY descricao;", conn)
+
+    ativos = df[df["ativo"] == 1]
+    entrada = (
+        versao,
+        df,
+        tuple(ativos["descricao"]),
+        dict(zip(ativos["descricao"], ativos["id"].tolist())),
+    )
+    with _catalogos_lock:
+        _catalogos[tabela] = entrada
+    return entrada
+
+
+def listar_catalogo(tabela: str, conn=None) -> pd.DataFrame:
+    """Todos os registros (ativos e inativos) com id, descricao e ativo, por descrição."""
+    return _catalogo(tabela, conn)[1].copy(deep=False)
+
+
+def descricoes_ativas(tabela: str, conn=None) -> list[str]:
+    """Descrições dos registros ativos, em ordem alfabética."""
+    return list(_catalogo(tabela, conn)[2])
+
+
+def ids_ativos(tabela: str, conn=None) -> dict[str, int]:
+    """Descrição -> id dos registros ativos."""
+    return dict(_catalogo(tabela, conn)[3])
@@ -0,0 +1,503 @@
+"""
+Acesso ao SQLite compartilhado por todo o processo.
+
+O Streamlit reexecuta o app.py a cada interação, então qualquer objeto
+criado lá é descartado no rerun seguinte. Este módulo é importado uma vez
+por processo e guarda o pool de conexões já configuradas (PRAGMAs
+aplicados uma única vez por conexão).
+"""
+import functools
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal
+
+DB_PATH = "propostas.db"
+
+# Quantidade máxima de conexões abertas ao mesmo tempo
+TAMANHO_POOL = 8
+
+# Tempo máximo (s) esperando uma conexão livre antes de desistir
+TIMEOUT_POOL = 30
+
+PRAGMAS = (
+    # só tem efeito em banco novo (antes da primeira tabela e do WAL); deixa
+    # o PRAGMA incremental_vacuum da manutenção devolver páginas livres
+    "PRAGMA auto_vacuum=INCREMENTAL;",
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA cache_size=-32000;",      # ~32 MB de cache de páginas por conexão
+    "PRAGMA mmap_size=268435456;",    # 256 MB mapeados em memória
+    "PRAGMA busy_timeout=10000;",     # espera até 10s por lock antes de falhar
+    "PRAGMA temp_store=MEMORY;",
+)
+
+# Conexões de leitura (mode=ro) não podem mudar o journal_mode; o WAL já
+# fica gravado no arquivo pelas conexões de escrita
+PRAGMAS_LEITURA = (
+    "PRAGMA cache_size=-32000;",
+    "PRAGMA mmap_size=268435456;",
+    "PRAGMA busy_timeout=10000;",
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA query_only=1;",
+)
+
+
+# propostas.data é gravada como número de dias desde 1970-01-01
+EPOCA = date(1970, 1, 1)
+
+
+def data_para_dia(valor) -> int:
+    """Converte date/datetime ou texto ISO (AAAA-MM-DD) para o número do dia."""
+    if isinstance(valor, str):
+        valor = date.fromisoformat(valor[:10])
+    if hasattr(valor, "date") and callable(valor.date):
+        valor = valor.date()
+    return valor.toordinal() - EPOCA.toordinal()
+
+
+def dia_para_data(dia: int) -> date:
+    """Inverso de data_para_dia."""
+    return date.fromordinal(EPOCA.toordinal() + dia)
+
+
+def _contem(texto, termo) -> bool:
+    """contem(texto, termo) no SQL: "contém" sem diferenciar maiúsculas, inclusive acentuadas."""
+    if texto is None or termo is None:
+        return False
+    return termo.casefold() in texto.casefold()
+
+
+def reais_para_centavos(valor) -> int | None:
+    """
+    Converte um valor em reais para centavos inteiros (None continua None).
+
+    Única regra de arredondamento do app (Lançamento, Edição, importação e
+    migração 4, onde é a função SQL reais_para_centavos): o valor é lido
+    como decimal pelo texto e o meio centavo vai para cima, então 0.285
+    vira 29 e 2.675 vira 268 (float * 100 com round daria 28 e 267).
+    """
+    if valor is None:
+        return None
+    return int((Decimal(str(valor)) * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def get_connection(caminho: str = DB_PATH, somente_leitura: bool = False):
+    """Abre uma conexão nova já com os PRAGMAs de desempenho aplicados."""
+    if somente_leitura:
+        conn = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, check_same_thread=False)
+        pragmas = PRAGMAS_LEITURA
+    else:
+        conn = sqlite3.connect(caminho, check_same_thread=False)
+        pragmas = PRAGMAS
+    for pragma in pragmas:
+        conn.execute(pragma)
+    conn.create_function("contem", 2, _contem, deterministic=True)
+    conn.create_function("reais_para_centavos", 1, reais_para_centavos, deterministic=True)
+    return conn
+
+
+class PoolConexoes:
+    """
+    Pool de conexões reutilizáveis.
+
+    - hits: conexão entregue a partir de uma já aberta
+    - misses: foi preciso abrir uma conexão nova
+    - esperas / tempo_espera: quantas vezes e por quanto tempo alguém
+      aguardou o pool liberar uma conexão
+    """
+
+    def __init__(self, caminho: str = DB_PATH, tamanho: int = TAMANHO_POOL, somente_leitura: bool = False):
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self.somente_leitura = somente_leitura
+        self._livres = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._abertas = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "esperas": 0,
+            "tempo_espera_total": 0.0,
+            "tempo_espera_max": 0.0,
+        }
+
+    def obter(self, timeout: float = TIMEOUT_POOL):
+        try:
+            conn = self._livres.get_nowait()
+            with self._lock:
+                self._stats["hits"] += 1
+            return conn
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            pode_abrir = self._abertas < self.tamanho
+            if pode_abrir:
+                self._abertas += 1
+                self._stats["misses"] += 1
+
+        if pode_abrir:
+            try:
+                return get_connection(self.caminho, self.somente_leitura)
+            except Exception:
+                with self._lock:
+                    self._abertas -= 1
+                raise
+
+        # Pool cheio: aguarda alguém devolver uma conexão
+        inicio = time.perf_counter()
+        try:
+            conn = self._livres.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"Nenhuma conexão livre no pool após {timeout}s "
+                f"({self.tamanho} conexões em uso)."
+            )
+        espera = time.perf_counter() - inicio
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["esperas"] += 1
+            self._stats["tempo_espera_total"] += espera
+            self._stats["tempo_espera_max"] = max(self._stats["tempo_espera_max"], espera)
+        return conn
+
+    def devolver(self, conn):
+        # Nunca devolve ao pool uma conexão com transação pendurada
+        if conn.in_transaction:
+            conn.rollback()
+        self._livres.put(conn)
+
+    def descartar(self, conn):
+        """Fecha uma conexão com problema em vez de devolvê-la ao pool."""
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._abertas -= 1
+
+    def fechar_todas(self):
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self.descartar(conn)
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["abertas"] = self._abertas
+        stats["livres"] = self._livres.qsize()
+        stats["em_uso"] = stats["abertas"] - stats["livres"]
+        total = stats["hits"] + stats["misses"]
+        stats["taxa_hit"] = stats["hits"] / total if total else 0.0
+        stats["tempo_espera_medio"] = (
+            stats["tempo_espera_total"] / stats["esperas"] if stats["esperas"] else 0.0
+        )
+        return stats
+
+
+_pool = None
+_pool_leitura = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> PoolConexoes:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes()
+    return _pool
+
+
+def get_pool_leitura() -> PoolConexoes:
+    global _pool_leitura
+    if _pool_leitura is None:
+        with _pool_lock:
+            if _pool_leitura is None:
+                _pool_leitura = PoolConexoes(somente_leitura=True)
+    return _pool_leitura
+
+
+@contextmanager
+def conexao():
+    """
+    Empresta uma conexão do pool durante o bloco `with`.
+
+    Se o bloco levantar exceção, a transação aberta é desfeita antes de
+    a conexão voltar para o pool.
+    """
+    pool = get_pool()
+    conn = pool.obter()
+    try:
+        yield conn
+    finally:
+        try:
+            pool.devolver(conn)
+        except sqlite3.Error:
+            # Não conseguiu nem desfazer a transação: não reaproveita a conexão
+            pool.descartar(conn)
+
+
+@contextmanager
+def leitura(conn=None):
+    """
+    Empresta uma conexão somente leitura (mode=ro) com uma transação de
+    leitura aberta. Sob WAL, todas as consultas dentro do bloco enxergam o
+    mesmo instante do banco (snapshot) e não bloqueiam nem são bloqueadas
+    pela fila de escrita.
+
+    Se `conn` vier de um leitura() externo, reaproveita o mesmo snapshot.
+    """
+    if conn is not None:
+        yield conn
+        return
+
+    pool = get_pool_leitura()
+    conn = pool.obter()
+    try:
+        # O snapshot é fixado na primeira consulta e vale até o fim do bloco
+        conn.execute("BEGIN;")
+        yield conn
+    finally:
+        try:
+            pool.devolver(conn)
+        except sqlite3.Error:
+            pool.descartar(conn)
+
+
+def versao_dados(conn, tabelas) -> tuple:
+    """
+    Devolve o contador de versão de cada tabela (mantido por triggers).
+    Muda a cada gravação feita por qualquer sessão ou processo, então serve
+    de chave para caches de leitura.
+    """
+    versoes = dict(conn.execute("SELECT tabela, versao FROM versao_dados;").fetchall())
+    return tuple(versoes.get(t, 0) for t in tabelas)
+
+
+def versao_atrasada(versao: tuple, referencia: tuple) -> bool:
+    """
+    True se `versao` (de versao_dados) é de um snapshot anterior ao de
+    `referencia`. Os contadores só crescem, então um snapshot mais antigo
+    tem algum contador menor.
+    """
+    return any(a < b for a, b in zip(versao, referencia))
+
+
+def estatisticas_pool(somente_leitura: bool = False) -> dict:
+    return (get_pool_leitura() if somente_leitura else get_pool()).estatisticas()
+
+
+# ------------------------
+# Fila de escrita (um único escritor com group commit)
+# ------------------------
+
+# Máximo de gravações agrupadas num mesmo commit
+MAX_LOTE_ESCRITA = 100
+
+# Tempo máximo (s) que executar_escrita espera uma gravação sair da fila.
+# Depois que ela começou, espera o fim: a thread sempre resolve o Future
+# (commit, erro ou queda da thread), e uma importação grande pode levar
+# minutos
+TIMEOUT_ESCRITA = 60
+
+
+class FilaEscrita:
+    """
+    Todas as gravações passam por uma thread dedicada, dona de uma conexão
+    própria. O que estiver na fila quando ela acorda é gravado num único
+    commit (group commit); cada gravação roda num SAVEPOINT, então o erro
+    de uma não desfaz as outras do mesmo lote.
+
+    Quem chama recebe um Future, resolvido só depois do COMMIT.
+
+    Se a thread não consegue abrir a conexão (arquivo travado, ausente,
+    erro de disco) ou morre por um erro fora do lote, as gravações
+    pendentes recebem a exceção e o próximo enviar() sobe outra thread.
+    """
+
+    def __init__(self, caminho: str = DB_PATH, max_lote: int = MAX_LOTE_ESCRITA):
+        self.caminho = caminho
+        self.max_lote = max_lote
+        self._fila = queue.Queue()
+        self._lock = threading.Lock()
+        self._stats = {
+            "gravacoes": 0,
+            "gravacoes_com_erro": 0,
+            "commits": 0,
+            "maior_lote": 0,
+            "profundidade_max": 0,
+            "latencia_commit_total": 0.0,
+            "latencia_commit_max": 0.0,
+            "espera_total": 0.0,
+            "falhas_thread": 0,
+            "ultima_falha": None,
+        }
+        self._ativa = False
+        with self._lock:
+            self._iniciar()
+
+    def _iniciar(self):
+        # chamado com self._lock
+        self._ativa = True
+        threading.Thread(target=self._loop, name="fila-escrita", daemon=True).start()
+
+    def enviar(self, funcao, *args, **kwargs) -> Future:
+        """Agenda funcao(conn, *args, **kwargs) na thread de escrita."""
+        futuro = Future()
+        with self._lock:
+            if not self._ativa:
+                self._iniciar()
+            self._fila.put((funcao, args, kwargs, futuro, time.perf_counter()))
+            self._stats["profundidade_max"] = max(self._stats["profundidade_max"], self._fila.qsize())
+        return futuro
+
+    def _loop(self):
+        conn = None
+        lote = []
+        try:
+            conn = get_connection(self.caminho)
+            while True:
+                lote = [self._fila.get()]
+                while len(lote) < self.max_lote:
+                    try:
+                        lote.append(self._fila.get_nowait())
+                    except queue.Empty:
+                        break
+                self._gravar_lote(conn, lote)
+        except BaseException as e:
+            self._encerrar(conn, lote, e)
+
+    def _encerrar(self, conn, lote, erro):
+        """Thread morrendo: falha o lote em andamento e tudo que está na fila."""
+        # enviar() só enfileira com o lock: depois daqui, quem chegar sobe outra thread
+        with self._lock:
+            self._ativa = False
+            self._stats["falhas_thread"] += 1
+            self._stats["ultima_falha"] = repr(erro)
+            while True:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+        for item in lote:
+            if not item[3].done():
+                item[3].set_exception(erro)
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _gravar_lote(self, conn, lote):
+        resultados = []
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+            for funcao, args, kwargs, futuro, _ in lote:
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT gravacao;")
+                try:
+                    resultado = funcao(conn, *args, **kwargs)
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO gravacao;")
+                    conn.execute("RELEASE gravacao;")
+                    resultados.append((futuro, None, e))
+                else:
+                    conn.execute("RELEASE gravacao;")
+                    resultados.append((futuro, resultado, None))
+
+            inicio_commit = time.perf_counter()
+            conn.commit()
+            latencia = time.perf_counter() - inicio_commit
+        except BaseException as e:
+            # Falhou o lote inteiro (BEGIN/COMMIT): nada foi gravado
+            if conn.in_transaction:
+                conn.rollback()
+            for item in lote:
+                if not item[3].done():
+                    item[3].set_exception(e)
+            return
+
+        agora = time.perf_counter()
+        with self._lock:
+            self._stats["commits"] += 1
+            self._stats["gravacoes"] += len(resultados)
+            self._stats["gravacoes_com_erro"] += sum(1 for _, _, e in resultados if e is not None)
+            self._stats["maior_lote"] = max(self._stats["maior_lote"], len(resultados))
+            self._stats["latencia_commit_total"] += latencia
+            self._stats["latencia_commit_max"] = max(self._stats["latencia_commit_max"], latencia)
+            self._stats["espera_total"] += sum(agora - item[4] for item in lote)
+
+        for futuro, resultado, erro in resultados:
+            if erro is not None:
+                futuro.set_exception(erro)
+            else:
+                futuro.set_result(resultado)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["profundidade"] = self._fila.qsize()
+        commits = stats["commits"]
+        stats["tamanho_medio_lote"] = stats["gravacoes"] / commits if commits else 0.0
+        stats["latencia_commit_media"] = stats["latencia_commit_total"] / commits if commits else 0.0
+        stats["espera_media"] = stats["espera_total"] / stats["gravacoes"] if stats["gravacoes"] else 0.0
+        return stats
+
+
+_fila_escrita = None
+
+
+def get_fila_escrita() -> FilaEscrita:
+    global _fila_escrita
+    if _fila_escrita is None:
+        with _pool_lock:
+            if _fila_escrita is None:
+                _fila_escrita = FilaEscrita()
+    return _fila_escrita
+
+
+def executar_escrita(funcao, *args, timeout: float | None = TIMEOUT_ESCRITA, **kwargs):
+    """
+    Executa funcao(conn, ...) na thread de escrita e devolve o resultado
+    (ou levanta a exceção dela). Tudo que a função gravar entra no mesmo
+    commit, então serve de unidade de trabalho para várias gravações.
+
+    Se a gravação não começou até o timeout, ela é cancelada (não chega a
+    ser feita) e levanta TimeoutError. Se já está rodando, espera o fim.
+    """
+    futuro = get_fila_escrita().enviar(funcao, *args, **kwargs)
+    try:
+        return futuro.result(timeout=timeout)
+    except TimeoutError:
+        if futuro.cancel():
+            raise
+    return futuro.result()
+
+
+def escrita(funcao):
+    """
+    Decorador para funções de gravação com parâmetro `conn`.
+
+    - chamada com conn: roda direto nessa conexão (já dentro de uma
+      gravação maior, sem commit próprio)
+    - chamada sem conn: vai para a fila de escrita e espera o commit
+    """
+    @functools.wraps(funcao)
+    def wrapper(*args, conn=None, **kwargs):
+        if conn is not None:
+            return funcao(*args, conn=conn, **kwargs)
+        return executar_escrita(lambda c: funcao(*args, conn=c, **kwargs))
+    return wrapper
+
+
+def metricas_escrita() -> dict:
+    return get_fila_escrita().metricas()
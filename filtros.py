@@ -0,0 +1,501 @@
+"""
+Filtros das telas de propostas (Dashboard, Consultas e Performance)
+aplicados no SQLite, e não no pandas.
+
+montar_filtro() transforma o estado dos widgets numa cláusula WHERE
+parametrizada sobre a vw_propostas, escolhida para cair nos índices:
+intervalo em data, igualdade nos ids de parceiro/banco e em tipo_produto,
+CPF completo por igualdade e digitador resolvido no cadastro de usuários
+(digitador_id IN ...). Só as linhas que passam no filtro saem do banco.
+
+Sem nenhum filtro (período cobrindo a base inteira), consultar_propostas()
+usa o DataFrame em memória do cache_propostas em vez de reler a tabela.
+
+aplicar_regra_cpf() é a única implementação da regra do valor
+considerado (CPF com mais de uma proposta tem o valor ignorado), com o
+escopo da contagem explícito; todas as telas passam por ela.
+
+O Dashboard não lê propostas: producao_diaria() soma o propostas_diario
+(produção por dia e dimensões, mantida por triggers, migração 9) e devolve
+a série por dia e os totais por combinação de banco, parceiro, digitador
+e tipo de produto.
+
+A tela de Consultas não carrega o resultado inteiro: resumir_propostas()
+devolve quantidade e somas, e pagina_propostas() só a página visível, por
+keyset (a página seguinte começa depois da chave da última linha, sem
+OFFSET).
+
+Os DataFrames devolvidos são compartilhados entre as sessões do processo
+(snapshot por versão dos dados) e chegam como cópia rasa: com o
+copy-on-write do pandas (sempre ligado no pandas >= 3; ver
+cache_propostas), uma tela pode acrescentar colunas ou filtrar à
+vontade sem duplicar nem alterar os dados das outras sessões.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from cache_propostas import TABELAS_CADASTRO, get_cache_propostas, tipar_propostas
+from db import data_para_dia, dia_para_data, versao_atrasada, versao_dados
+
+TODOS = "Todos"
+
+# Ordenações da paginação -> coluna da vw_propostas. Só colunas com índice
+# em propostas; o id desempata e fecha a chave do keyset. Data vem primeiro
+# (padrão): os índices (parceiro/banco/digitador/tipo_produto, data) já
+# entregam as linhas nessa ordem, então a página sai sem ordenar o filtro.
+ORDENACOES = {"Data": "data", "ID": "id"}
+
+# Escopo da contagem de CPF na regra do valor considerado (rótulo -> escopo
+# de aplicar_regra_cpf). O padrão de todas as telas é a base inteira.
+ESCOPOS_CPF = {
+    "Base inteira": "base",
+    "Período filtrado": "periodo",
+    "Mesmo banco no período filtrado": "banco",
+}
+
+# Colunas acrescentadas por aplicar_regra_cpf
+COLUNAS_REGRA_CPF = ["qtd_cpf", "ignorar_valor", "valor_considerado_centavos", "valor_considerado"]
+
+# Propostas do mesmo CPF na base inteira: busca pela chave primária de
+# cpf_stats (mantida por triggers, migração 8); {tabela} é a tabela/view da
+# consulta de fora
+SQL_QTD_CPF_BASE = "COALESCE((SELECT s.qtd FROM cpf_stats s WHERE s.cpf = {tabela}.cpf), 0)"
+
+# Somas do propostas_diario; {filtro} é o WHERE do montar_filtro, que só
+# usa colunas presentes no rollup quando não há filtro de CPF/ADE/ID
+SOMAS_DIARIO = (
+    "SUM(qtd) AS qtd, SUM(valor_centavos) AS valor_centavos, "
+    "SUM(valor_considerado_centavos) AS valor_considerado_centavos"
+)
+SQL_PRODUCAO_DIAS = f"SELECT data, {SOMAS_DIARIO} FROM propostas_diario {{filtro}} GROUP BY data ORDER BY data;"
+SQL_PRODUCAO_DIMENSOES = f"""
+    SELECT
+        d.banco_id, d.parceiro_id, d.digitador_id,
+        b.descricao AS banco, pa.descricao AS parceiro, u.nome_exibicao AS digitador,
+        NULLIF(d.tipo_produto, '') AS tipo_produto,
+        d.qtd, d.valor_centavos, d.valor_considerado_centavos
+    FROM (
+        SELECT banco_id, parceiro_id, digitador_id, tipo_produto, {SOMAS_DIARIO}
+        FROM propostas_diario {{filtro}}
+        GROUP BY banco_id, parceiro_id, digitador_id, tipo_produto
+    ) d
+    LEFT JOIN bancos b ON b.id = d.banco_id
+    LEFT JOIN parceiros pa ON pa.id = d.parceiro_id
+    LEFT JOIN usuarios u ON u.id = d.digitador_id;
+"""
+
+COLUNAS_DIMENSOES = ["banco_id", "parceiro_id", "digitador_id", "banco", "parceiro", "digitador", "tipo_produto"]
+TIPOS_PRODUCAO = {
+    "banco_id": "int32",
+    "parceiro_id": "int32",
+    "digitador_id": "int32",
+    "banco": "category",
+    "parceiro": "category",
+    "digitador": "category",
+    "tipo_produto": "category",
+    "qtd": "int64",
+    "valor_centavos": "int64",
+    "valor_considerado_centavos": "int64",
+}
+
+# Resultados recentes por (filtro, versão dos dados): um rerun com o mesmo
+# filtro e sem gravação no meio não volta ao banco
+MAX_RESULTADOS_EM_CACHE = 8
+MAX_RESUMOS_EM_CACHE = 32
+MAX_PRODUCOES_EM_CACHE = 16
+_resultados = OrderedDict()
+_resumos = OrderedDict()
+_producoes = OrderedDict()
+_resultados_lock = threading.Lock()   # protege os três
+
+# Base inteira com as colunas da regra de CPF, uma por versão dos dados;
+# fica fora do LRU para não ser descartada por consultas estreitas
+_snapshot_completo = (None, None)
+_snapshot_lock = threading.Lock()
+
+
+def _like_contem(texto: str) -> str:
+    """Padrão LIKE de "contém", escapando os curingas digitados pelo usuário."""
+    texto = texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{texto}%"
+
+
+def intervalo_datas(conn) -> tuple:
+    """(menor, maior) data cadastrada, ou (None, None) sem propostas. Usa idx_propostas_data."""
+    # um MIN/MAX por SELECT: só assim o SQLite lê a ponta do índice em vez
+    # de varrer a tabela
+    menor, maior = conn.execute(
+        "SELECT (SELECT MIN(data) FROM propostas), (SELECT MAX(data) FROM propostas);"
+    ).fetchone()
+    if menor is None:
+        return None, None
+    return dia_para_data(menor), dia_para_data(maior)
+
+
+def montar_filtro(
+    data_inicial=None,
+    data_final=None,
+    limites: tuple | None = None,
+    digitador: str = "",
+    cpf: str = "",
+    ade: str = "",
+    id_contem: str = "",
+    parceiro: str = TODOS,
+    banco: str = TODOS,
+    tipo_produto: str = TODOS,
+) -> tuple[str, list]:
+    """
+    Devolve (where, params) para a vw_propostas. where vazio = sem filtro.
+    Só usa colunas que também existem em propostas, então serve direto na
+    tabela (sem os JOINs da view) para contagens e somas.
+
+    - limites: (menor, maior) data da base; se o período escolhido cobre
+      tudo, o filtro de data é omitido
+    - textos vazios e "Todos" não filtram
+    """
+    condicoes, params = [], []
+
+    if data_inicial is not None and data_final is not None:
+        cobre_tudo = limites is not None and data_inicial <= limites[0] and data_final >= limites[1]
+        if not cobre_tudo:
+            condicoes.append("data BETWEEN ? AND ?")
+            params += [data_para_dia(data_inicial), data_para_dia(data_final)]
+
+    if parceiro and parceiro != TODOS:
+        condicoes.append("parceiro_id = (SELECT id FROM parceiros WHERE descricao = ?)")
+        params.append(parceiro)
+
+    if banco and banco != TODOS:
+        condicoes.append("banco_id = (SELECT id FROM bancos WHERE descricao = ?)")
+        params.append(banco)
+
+    if tipo_produto and tipo_produto != TODOS:
+        condicoes.append("tipo_produto = ?")
+        params.append(tipo_produto)
+
+    digitador = (digitador or "").strip()
+    if digitador:
+        # o cadastro de usuários é pequeno: resolve o nome lá e filtra pelo índice do id
+        condicoes.append("digitador_id IN (SELECT id FROM usuarios WHERE contem(nome_exibicao, ?))")
+        params.append(digitador)
+
+    cpf = (cpf or "").strip()
+    if cpf:
+        if cpf.isdigit() and len(cpf) == 11:
+            condicoes.append("cpf = ?")
+            params.append(cpf)
+        else:
+            condicoes.append("instr(cpf, ?) > 0")
+            params.append(cpf)
+
+    ade = (ade or "").strip()
+    if ade:
+        condicoes.append("ade LIKE ? ESCAPE '\\'")
+        params.append(_like_contem(ade))
+
+    id_contem = (id_contem or "").strip()
+    if id_contem:
+        condicoes.append("instr(CAST(id AS TEXT), ?) > 0")
+        params.append(id_contem)
+
+    return " AND ".join(condicoes), params
+
+
+def _contar_por_cpf(cpf: pd.Series) -> np.ndarray:
+    """Quantas vezes o CPF de cada linha aparece na série (bincount nos códigos da category)."""
+    codigos = cpf.cat.codes.to_numpy()
+    contagem = np.bincount(codigos[codigos >= 0], minlength=len(cpf.cat.categories))
+    return np.where(codigos >= 0, contagem[codigos], 0)
+
+
+def _contar_por_cpf_e_banco(df: pd.DataFrame) -> np.ndarray:
+    """Quantas vezes o par (CPF, banco) de cada linha aparece em df."""
+    codigos = df["cpf"].cat.codes.to_numpy().astype("int64")
+    bancos = df["banco_id"].to_numpy().astype("int64")
+    pares, _ = pd.factorize(codigos * (int(bancos.max(initial=0)) + 1) + bancos)
+    contagem = np.bincount(pares)
+    return np.where(codigos >= 0, contagem[pares], 0)
+
+
+def aplicar_regra_cpf(df: pd.DataFrame, escopo: str = "base") -> pd.DataFrame:
+    """
+    Regra do valor considerado: proposta de CPF com mais de uma proposta no
+    escopo tem o valor ignorado (valor considerado = 0). Acrescenta
+    qtd_cpf (propostas do CPF no escopo), ignorar_valor,
+    valor_considerado_centavos e valor_considerado.
+
+    - "base": base inteira, não importa o filtro. qtd_cpf já vem em df
+      (cpf_stats no SQL ou contagem da base em memória)
+    - "periodo": só as linhas de df (o resultado do filtro)
+    - "banco": só as linhas de df do mesmo banco da proposta
+
+    Contagens por bincount nos códigos da category, sem função por linha.
+    """
+    if escopo == "base":
+        qtd = df["qtd_cpf"].to_numpy(dtype="int64")
+    elif escopo == "periodo":
+        qtd = _contar_por_cpf(df["cpf"])
+    elif escopo == "banco":
+        qtd = _contar_por_cpf_e_banco(df)
+    else:
+        raise ValueError(f"Escopo da regra de CPF desconhecido: {escopo}")
+
+    df["qtd_cpf"] = qtd
+    df["ignorar_valor"] = qtd > 1
+    df["valor_considerado_centavos"] = np.where(
+        df["ignorar_valor"], 0, df["valor_centavos"].fillna(0).to_numpy(dtype="int64")
+    )
+    df["valor_considerado"] = df["valor_considerado_centavos"] / 100
+    return df
+
+
+def _do_cache(cache: OrderedDict, chave):
+    with _resultados_lock:
+        if chave in cache:
+            cache.move_to_end(chave)
+            return cache[chave]
+    return None
+
+
+def _guardar_no_cache(cache: OrderedDict, chave, valor, maximo: int):
+    """chave termina na versão dos dados; entradas de versões anteriores saem."""
+    with _resultados_lock:
+        for antiga in [k for k in cache if k[-1] != chave[-1]]:
+            del cache[antiga]
+        cache[chave] = valor
+        while len(cache) > maximo:
+            cache.popitem(last=False)
+
+
+def _base_completa(conn, versao) -> pd.DataFrame:
+    global _snapshot_completo
+    with _snapshot_lock:
+        versao_snapshot, df = _snapshot_completo
+        # como o cache_propostas, só anda para a frente: um snapshot de
+        # leitura anterior recebe o estado mais novo
+        if versao_snapshot is not None and (versao_snapshot == versao or versao_atrasada(versao, versao_snapshot)):
+            return df
+        df = get_cache_propostas().obter(conn).copy(deep=False)
+        df["qtd_cpf"] = _contar_por_cpf(df["cpf"])
+        df = aplicar_regra_cpf(df, "base")
+        _snapshot_completo = (versao, df)
+        return df
+
+
+def consultar_propostas(where: str, params: list, conn, escopo_cpf: str | None = "base") -> pd.DataFrame:
+    """
+    Propostas que passam no filtro (ordenadas por id desc), já tipadas.
+
+    - escopo_cpf: escopo da regra do valor considerado (ver
+      aplicar_regra_cpf); None = sem as colunas da regra. No escopo "base"
+      a contagem por CPF sai do cpf_stats só para os CPFs do resultado
+    """
+    versao = versao_dados(conn, ("propostas",) + TABELAS_CADASTRO)
+
+    chave = (where, tuple(params), escopo_cpf, versao)
+    df = _do_cache(_resultados, chave)
+    if df is not None:
+        return df.copy(deep=False)
+
+    if not where:
+        df = _base_completa(conn, versao)
+        if escopo_cpf == "base":
+            return df.copy(deep=False)
+        df = df.drop(columns=COLUNAS_REGRA_CPF)
+    else:
+        colunas = "*"
+        if escopo_cpf == "base":
+            colunas += ", " + SQL_QTD_CPF_BASE.format(tabela="vw_propostas") + " AS qtd_cpf"
+        df = tipar_propostas(pd.read_sql_query(
+            f"SELECT {colunas} FROM vw_propostas WHERE {where} ORDER BY id DESC;",
+            conn,
+            params=params,
+        ))
+    if escopo_cpf is not None:
+        df = aplicar_regra_cpf(df, escopo_cpf)
+
+    _guardar_no_cache(_resultados, chave, df, MAX_RESULTADOS_EM_CACHE)
+    return df.copy(deep=False)
+
+
+def resumir_propostas(where: str, params: list, conn) -> dict:
+    """
+    Quantidade (COUNT(*)) e somas em centavos das propostas que passam no
+    filtro: valor_centavos (bruto) e valor_considerado_centavos (regra de
+    CPF na base geral). Guardado por filtro e versão dos dados.
+    """
+    versao = versao_dados(conn, ("propostas",) + TABELAS_CADASTRO)
+    chave = (where, tuple(params), versao)
+    resumo = _do_cache(_resumos, chave)
+    if resumo is not None:
+        return resumo
+
+    if not where:
+        # base inteira: o snapshot compartilhado já tem a regra aplicada
+        df = _base_completa(conn, versao)
+        qtd, bruto, considerado = len(df), df["valor_centavos"].sum(), df["valor_considerado_centavos"].sum()
+    else:
+        qtd, bruto, considerado = conn.execute(
+            f"""
+            SELECT
+                COUNT(*),
+                SUM(valor_centavos),
+                SUM(CASE WHEN {SQL_QTD_CPF_BASE.format(tabela="p")} > 1 THEN 0 ELSE valor_centavos END)
+            FROM propostas p
+            WHERE {where};
+            """,
+            params,
+        ).fetchone()
+    resumo = {
+        "qtd": int(qtd),
+        "valor_centavos": int(bruto or 0),
+        "valor_considerado_centavos": int(considerado or 0),
+    }
+    _guardar_no_cache(_resumos, chave, resumo, MAX_RESUMOS_EM_CACHE)
+    return resumo
+
+
+def pagina_propostas(
+    where: str,
+    params: list,
+    conn,
+    ordem: str = "Data",
+    crescente: bool = False,
+    tamanho: int = 50,
+    apos: tuple | None = None,
+) -> tuple[pd.DataFrame, tuple | None]:
+    """
+    Uma página do resultado, já tipada e com a regra de CPF da base geral
+    (cpf_stats lido só para as linhas da página).
+
+    Paginação por keyset: `apos` é a chave (coluna de ordem, id) da última
+    linha da página anterior, None na primeira. O SQLite desce pelo índice
+    da ordenação direto até a página, qualquer que seja a profundidade.
+
+    Devolve (página, chave para a próxima página ou None se esta é a última).
+    """
+    chave = list(dict.fromkeys([ORDENACOES[ordem], "id"]))
+    sentido, comparacao = ("ASC", ">") if crescente else ("DESC", "<")
+
+    condicoes, valores = ([f"({where})"], list(params)) if where else ([], [])
+    if apos is not None:
+        condicoes.append(f"({', '.join(chave)}) {comparacao} ({', '.join('?' * len(chave))})")
+        valores += list(apos)
+    filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+
+    # uma linha a mais só para saber se existe próxima página
+    bruto = pd.read_sql_query(
+        f"""
+        SELECT *, {SQL_QTD_CPF_BASE.format(tabela="vw_propostas")} AS qtd_cpf
+        FROM vw_propostas
+        {filtro}
+        ORDER BY {', '.join(f'{c} {sentido}' for c in chave)}
+        LIMIT ?;
+        """,
+        conn,
+        params=valores + [tamanho + 1],
+    )
+    proxima = None
+    if len(bruto) > tamanho:
+        bruto = bruto.iloc[:tamanho]
+        proxima = tuple(int(v) for v in bruto[chave].iloc[-1])
+
+    df = tipar_propostas(bruto)
+    return aplicar_regra_cpf(df, "base"), proxima
+
+
+def _tipar_producao(dias: pd.DataFrame, dimensoes: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    dias = dias.astype({c: "int64" for c in dias.columns if c != "data"})
+    if not pd.api.types.is_datetime64_any_dtype(dias["data"]):
+        dias["data"] = pd.to_datetime(dias["data"].astype("int64"), unit="D")
+    return dias, dimensoes.astype(TIPOS_PRODUCAO)
+
+
+def _agregar_propostas(df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Mesmo formato do propostas_diario, a partir das propostas (já com a regra de CPF)."""
+    somas = {
+        "qtd": ("id", "size"),
+        "valor_centavos": ("valor_centavos", "sum"),
+        "valor_considerado_centavos": ("valor_considerado_centavos", "sum"),
+    }
+    dias = df.groupby("data").agg(**somas).reset_index()
+    dimensoes = df.groupby(COLUNAS_DIMENSOES, observed=True, dropna=False).agg(**somas).reset_index()
+    return dias, dimensoes
+
+
+def producao_diaria(where: str, params: list, conn, por_proposta: bool = False) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Produção do filtro para o Dashboard (valor considerado na regra de CPF
+    da base geral), somas em centavos:
+
+    - dias: data, qtd, valor_centavos, valor_considerado_centavos, por data
+    - dimensoes: uma linha por combinação de banco, parceiro, digitador e
+      tipo_produto (ids e nomes) com as mesmas somas
+
+    Lê o propostas_diario: o custo acompanha dias x dimensões do período,
+    não a quantidade de propostas. por_proposta=True quando o filtro usa
+    colunas que o rollup não tem (CPF): agrega as propostas filtradas.
+    """
+    versao = versao_dados(conn, ("propostas",) + TABELAS_CADASTRO)
+    chave = (where, tuple(params), por_proposta, versao)
+    producao = _do_cache(_producoes, chave)
+    if producao is not None:
+        return tuple(df.copy(deep=False) for df in producao)
+
+    if por_proposta:
+        producao = _agregar_propostas(consultar_propostas(where, params, conn))
+    else:
+        filtro = f"WHERE {where}" if where else ""
+        producao = (
+            pd.read_sql_query(SQL_PRODUCAO_DIAS.format(filtro=filtro), conn, params=params),
+            pd.read_sql_query(SQL_PRODUCAO_DIMENSOES.format(filtro=filtro), conn, params=params),
+        )
+    producao = _tipar_producao(*producao)
+
+    _guardar_no_cache(_producoes, chave, producao, MAX_PRODUCOES_EM_CACHE)
+    return tuple(df.copy(deep=False) for df in producao)
+
+
+def divergencias_cpf_stats(conn) -> int:
+    """
+    CPFs em que cpf_stats não bate com a contagem real em propostas (0 =
+    exato). Varre as duas tabelas: só para conferência sob demanda.
+    """
+    (divergentes,) = conn.execute(
+        """
+        WITH reais AS (SELECT cpf, COUNT(*) AS qtd FROM propostas GROUP BY cpf)
+        SELECT
+            (SELECT COUNT(*) FROM (SELECT cpf, qtd FROM reais EXCEPT SELECT cpf, qtd FROM cpf_stats))
+            + (SELECT COUNT(*) FROM (SELECT cpf, qtd FROM cpf_stats EXCEPT SELECT cpf, qtd FROM reais));
+        """
+    ).fetchone()
+    return divergentes
+
+
+def divergencias_propostas_diario(conn) -> int:
+    """
+    Linhas em que propostas_diario não bate com a produção recalculada das
+    propostas (0 = exato), com a contagem por CPF refeita de propostas.
+    Varre a tabela inteira: só para conferência sob demanda.
+    """
+    (divergentes,) = conn.execute(
+        """
+        WITH reais AS (
+            SELECT
+                p.data, p.banco_id, p.parceiro_id, p.digitador_id, COALESCE(p.tipo_produto, '') AS tipo_produto,
+                COUNT(*) AS qtd,
+                SUM(COALESCE(p.valor_centavos, 0)) AS valor_centavos,
+                SUM(CASE WHEN c.qtd > 1 THEN 0 ELSE COALESCE(p.valor_centavos, 0) END) AS valor_considerado_centavos
+            FROM propostas p
+            JOIN (SELECT cpf, COUNT(*) AS qtd FROM propostas GROUP BY cpf) c ON c.cpf = p.cpf
+            GROUP BY 1, 2, 3, 4, 5
+        )
+        SELECT
+            (SELECT COUNT(*) FROM (SELECT * FROM reais EXCEPT SELECT * FROM propostas_diario))
+            + (SELECT COUNT(*) FROM (SELECT * FROM propostas_diario EXCEPT SELECT * FROM reais));
+        """
+    ).fetchone()
+    return divergentes
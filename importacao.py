@@ -0,0 +1,293 @@
+"""
+Importação em lote de propostas a partir de planilhas (CSV / XLSX).
+
+A validação é feita na planilha inteira de uma vez (operações vetorizadas
+do pandas) e as linhas válidas são gravadas com executemany numa única
+transação, junto com as linhas de auditoria.
+"""
+import io
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from db import escrita, reais_para_centavos
+
+# Cabeçalhos aceitos na planilha -> coluna da tabela propostas.
+# Inclui os nomes usados na exportação da tela de Consultas.
+COLUNAS_PLANILHA = {
+    "digitador": "digitador",
+    "ade": "ade",
+    "cpf": "cpf",
+    "data": "data",
+    "parceiro": "parceiro",
+    "banco": "banco",
+    "tipo_produto": "tipo_produto",
+    "tipo de produto": "tipo_produto",
+    "valor": "valor",
+}
+
+COLUNAS_OBRIGATORIAS = ["ade", "cpf", "data", "parceiro", "banco"]
+
+
+def ler_planilha(arquivo, nome_arquivo: str) -> pd.DataFrame:
+    """
+    Lê um CSV (separador ';' ou ',') ou XLSX e devolve um DataFrame com as
+    colunas normalizadas para os nomes da tabela propostas.
+    """
+    nome = nome_arquivo.lower()
+    if nome.endswith(".xlsx"):
+        # valor e cpf são lidos com o tipo da célula (normalizados na validação)
+        df = pd.read_excel(arquivo, dtype=object)
+    elif nome.endswith(".csv"):
+        conteudo = arquivo.read()
+        if isinstance(conteudo, bytes):
+            conteudo = conteudo.decode("utf-8-sig")
+        primeira_linha = conteudo.split("\n", 1)[0]
+        sep = ";" if primeira_linha.count(";") > primeira_linha.count(",") else ","
+        df = pd.read_csv(io.StringIO(conteudo), sep=sep, dtype=str, keep_default_na=False)
+    else:
+        raise ValueError("Formato não suportado. Envie um arquivo .csv ou .xlsx.")
+
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    df = df.rename(columns=COLUNAS_PLANILHA)
+    faltando = [c for c in COLUNAS_OBRIGATORIAS if c not in df.columns]
+    if faltando:
+        raise ValueError("Colunas obrigatórias ausentes na planilha: " + ", ".join(faltando))
+
+    colunas = [c for c in dict.fromkeys(COLUNAS_PLANILHA.values()) if c in df.columns]
+    return df[colunas].reset_index(drop=True)
+
+
+def _texto(serie: pd.Series) -> pd.Series:
+    return serie.astype("string").fillna("").str.strip()
+
+
+def _logicos(serie: pd.Series) -> pd.Series:
+    """Células VERDADEIRO/FALSO do Excel (bool do Python ou do NumPy)."""
+    return serie.map(lambda v: isinstance(v, (bool, np.bool_))).astype(bool)
+
+
+def _normalizar_cpf(serie: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    CPF só com os dígitos, completado com zeros à esquerda até 11. Célula
+    numérica do Excel perde os zeros (01234567890 -> 1234567890) e pode vir
+    como float; vazio continua vazio.
+
+    Devolve (cpfs, mascara_invalidos). Célula lógica ou número que não é um
+    inteiro de até 11 dígitos (1234567890.5, 1e20, -1) é inválida e sai vazia.
+    """
+    eh_texto = serie.map(type) == str
+    logicos = _logicos(serie)
+    numeros = pd.to_numeric(serie.where(~eh_texto & ~logicos), errors="coerce")
+    inteiros = (numeros % 1 == 0) & (numeros >= 0) & (numeros < 10**11)
+    invalidos = (logicos | (numeros.notna() & ~inteiros)).astype(bool)
+
+    numeros = numeros.where(inteiros)
+    texto = _texto(serie.where(eh_texto, numeros.astype("Int64").astype("string")))
+    digitos = texto.str.replace(r"\D", "", regex=True)
+    return digitos.where(digitos == "", digitos.str.zfill(11)), invalidos
+
+
+def _converter_valor(serie: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Converte a coluna valor com a mesma regra da tela de Lançamento
+    ("1.500,00" -> 1500.0). Células numéricas do Excel são usadas direto.
+
+    Devolve (valores, mascara_invalidos).
+    """
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype(float), pd.Series(False, index=serie.index)
+
+    eh_texto = serie.map(type) == str
+    numeros = pd.to_numeric(serie.where(~eh_texto), errors="coerce")
+
+    texto = _texto(serie.where(eh_texto))
+    convertidos = pd.to_numeric(
+        texto.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+        errors="coerce",
+    )
+    valores = numeros.where(~eh_texto, convertidos).astype(float)
+    invalidos = eh_texto & (texto != "") & convertidos.isna()
+    return valores, invalidos
+
+
+def _converter_data(serie: pd.Series) -> pd.Series:
+    """
+    Aceita datas ISO (2025-01-31), brasileiras (31/01/2025) ou células de
+    data do Excel, inclusive as gravadas como número serial (45000 ->
+    2023-03-15).
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
+    texto = _texto(serie.astype(object).where(serie.map(type) == str))
+    # número do Excel é data serial (dias desde 30/12/1899); lógico não é data
+    celulas = serie.where((serie.map(type) != str) & ~_logicos(serie))
+    numeros = pd.to_numeric(celulas, errors="coerce")
+    seriais = pd.to_datetime(numeros, unit="D", origin="1899-12-30", errors="coerce")
+    datas = pd.to_datetime(celulas.where(numeros.isna()), errors="coerce").fillna(seriais)
+    iso = pd.to_datetime(texto.str.slice(0, 10), format="%Y-%m-%d", errors="coerce")
+    br = pd.to_datetime(texto, format="%d/%m/%Y", errors="coerce")
+    return datas.fillna(iso).fillna(br)
+
+
+def validar_propostas(
+    df: pd.DataFrame,
+    parceiros_ativos: dict[str, int],
+    bancos_ativos: dict[str, int],
+    digitadores: dict[str, int],
+    tipos_produto: list[str],
+    digitador_padrao: str,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Valida a planilha inteira e devolve (validas, erros).
+
+    parceiros_ativos, bancos_ativos e digitadores mapeiam a descrição /
+    nome de exibição para o id do cadastro.
+
+    - validas: linhas prontas para gravar, já com os ids resolvidos, data
+      em ISO e valor numérico
+    - erros: uma linha por proposta rejeitada, com o número da linha na
+      planilha (contando o cabeçalho) e os motivos
+    """
+    out = pd.DataFrame(index=df.index)
+
+    if "digitador" in df.columns:
+        out["digitador"] = _texto(df["digitador"]).replace("", digitador_padrao)
+    else:
+        out["digitador"] = digitador_padrao
+    out["ade"] = _texto(df["ade"])
+    out["cpf"], cpf_invalido = _normalizar_cpf(df["cpf"])
+    out["parceiro"] = _texto(df["parceiro"])
+    out["banco"] = _texto(df["banco"])
+    out["tipo_produto"] = _texto(df["tipo_produto"]) if "tipo_produto" in df.columns else ""
+
+    datas = _converter_data(df["data"])
+    out["data"] = datas.dt.strftime("%Y-%m-%d")
+
+    if "valor" in df.columns:
+        out["valor"], valor_invalido = _converter_valor(df["valor"])
+    else:
+        out["valor"] = np.nan
+        valor_invalido = pd.Series(False, index=df.index)
+
+    out["digitador_id"] = out["digitador"].map(digitadores)
+    out["parceiro_id"] = out["parceiro"].map(parceiros_ativos)
+    out["banco_id"] = out["banco"].map(bancos_ativos)
+
+    regras = [
+        (out["digitador_id"].isna(), "Digitador não cadastrado"),
+        (out["ade"] == "", "ADE não preenchida"),
+        ((out["cpf"] == "") & ~cpf_invalido, "CPF não preenchido"),
+        (cpf_invalido, "CPF inválido"),
+        (out["cpf"].str.len() > 11, "CPF com mais de 11 dígitos"),
+        (datas.isna(), "Data inválida"),
+        (out["parceiro"] == "", "Parceiro não preenchido"),
+        ((out["parceiro"] != "") & out["parceiro_id"].isna(), "Parceiro inexistente ou inativo"),
+        (out["banco"] == "", "Banco não preenchido"),
+        ((out["banco"] != "") & out["banco_id"].isna(), "Banco inexistente ou inativo"),
+        ((out["tipo_produto"] != "") & ~out["tipo_produto"].isin(tipos_produto), "Tipo de produto inválido"),
+        (valor_invalido, "Valor inválido"),
+    ]
+
+    motivos = pd.Series("", index=df.index, dtype=object)
+    for mascara, mensagem in regras:
+        mascara = mascara.fillna(False).astype(bool)
+        motivos = motivos.where(~mascara, motivos + mensagem + "; ")
+
+    com_erro = motivos != ""
+    erros = pd.DataFrame({
+        "linha": df.index[com_erro] + 2,
+        "erro": motivos[com_erro].str.rstrip("; "),
+    })
+
+    validas = out[~com_erro].copy()
+    for col in ["digitador_id", "parceiro_id", "banco_id"]:
+        validas[col] = validas[col].astype("int64")
+    validas["tipo_produto"] = validas["tipo_produto"].astype(object).where(validas["tipo_produto"] != "", None)
+    return validas.reset_index(drop=True), erros.reset_index(drop=True)
+
+
+@escrita
+def importar_propostas(validas: pd.DataFrame, usuario: str, nome_arquivo: str = "", conn=None) -> int:
+    """
+    Grava as propostas já validadas e uma linha de log (INSERT) para cada uma,
+    tudo no mesmo commit da fila de escrita. Devolve a quantidade importada.
+    """
+    if validas.empty:
+        return 0
+
+    # data como número do dia e valor em centavos, como na tabela
+    dias = pd.to_datetime(validas["data"], format="%Y-%m-%d").values.astype("datetime64[D]").astype("int64")
+    # mesma conversão do Lançamento (Decimal, meio centavo para cima: 0,285
+    # -> 29), feita uma vez por valor distinto
+    distintos = validas["valor"].dropna().unique()
+    centavos = validas["valor"].map(dict(zip(distintos, map(reais_para_centavos, distintos)))).astype("Int64")
+    centavos = centavos.astype(object).where(centavos.notna(), None)
+    linhas = list(zip(
+        validas["digitador_id"].tolist(), validas["ade"], validas["cpf"], dias.tolist(),
+        validas["parceiro_id"].tolist(), validas["tipo_produto"], centavos, validas["banco_id"].tolist(),
+    ))
+
+    # A fila de escrita segura o lock de escrita (BEGIN IMMEDIATE) durante o
+    # lote, então os ids do AUTOINCREMENT saem sequenciais a partir do último
+    (ultimo_id,) = conn.execute(
+        """
+        SELECT MAX(
+            COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'propostas'), 0),
+            COALESCE((SELECT MAX(id) FROM propostas), 0)
+        );
+        """
+    ).fetchone()
+
+    # A fila de escrita abre um SAVEPOINT por tarefa, e dentro dele cada
+    # INSERT com gatilhos fica mais caro conforme o savepoint cresce (200 mil
+    # linhas não terminavam). As linhas passam por uma tabela temporária sem
+    # gatilhos e entram em propostas num único INSERT ... SELECT.
+    conn.execute(
+        """
+        CREATE TEMP TABLE importacao_propostas (
+            digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id
+        );
+        """
+    )
+    conn.executemany("INSERT INTO temp.importacao_propostas VALUES (?, ?, ?, ?, ?, ?, ?, ?);", linhas)
+    conn.execute(
+        """
+        INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+        SELECT digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id
+        FROM temp.importacao_propostas
+        ORDER BY rowid;
+        """
+    )
+    conn.execute("DROP TABLE temp.importacao_propostas;")
+
+    ids = np.arange(ultimo_id + 1, ultimo_id + 1 + len(linhas))
+    (qtd_gravada,) = conn.execute(
+        "SELECT COUNT(*) FROM propostas WHERE id BETWEEN ? AND ?;",
+        (int(ids[0]), int(ids[-1])),
+    ).fetchone()
+    if qtd_gravada != len(linhas):
+        raise RuntimeError("Ids das propostas importadas não são sequenciais; importação desfeita.")
+
+    detalhes = (
+        "digitador=" + validas["digitador"]
+        + ", ade=" + validas["ade"]
+        + ", cpf=" + validas["cpf"]
+        + ", data=" + validas["data"]
+        + ", parceiro=" + validas["parceiro"]
+        + ", tipo_produto=" + validas["tipo_produto"].fillna("None").astype(str)
+        + ", valor=" + validas["valor"].astype(object).fillna("None").astype(str)
+        + ", banco=" + validas["banco"]
+        + f" (importação: {nome_arquivo})"
+    )
+    ts = datetime.now().isoformat(sep=" ", timespec="seconds")
+    conn.executemany(
+        """
+        INSERT INTO log_propostas (proposta_id, acao, usuario, timestamp, detalhes)
+        VALUES (?, 'INSERT', ?, ?, ?);
+        """,
+        zip(ids.tolist(), [usuario] * len(ids), [ts] * len(ids), detalhes),
+    )
+
+    return len(linhas)
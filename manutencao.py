@@ -0,0 +1,272 @@
+"""
+Manutenção do propostas.db em segundo plano.
+
+Uma thread por processo acorda de tempos em tempos e roda o que estiver
+vencido:
+
+- backup online com a API de backup incremental do sqlite3 (poucas páginas
+  por passo, a partir de um snapshot de leitura, sem travar quem grava)
+- PRAGMA optimize (ANALYZE só das tabelas/índices que precisam)
+- checkpoint PASSIVE do WAL (não espera nem bloqueia leitores/escritores)
+- PRAGMA incremental_vacuum (quando o banco tem auto_vacuum=INCREMENTAL)
+- limpeza do log propostas_alteracoes (um cache mais atrasado que o log
+  mantido simplesmente recarrega tudo)
+- snapshot colunar das propostas em disco, de onde o cache de um processo
+  novo parte em vez de reler a tabela inteira
+
+A duração de cada passo fica registrada e aparece no Diagnóstico.
+"""
+import glob
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from db import DB_PATH, conexao, executar_escrita, get_connection
+
+PASTA_BACKUP = "backups"
+BACKUPS_MANTIDOS = 7
+PAGINAS_POR_PASSO = 256          # ~1 MB por passo com páginas de 4 KB
+PAUSA_ENTRE_PASSOS = 0.002       # devolve o disco para as telas entre os passos
+PAGINAS_VACUUM = 500             # máximo de páginas livres devolvidas por rodada
+LIMITE_ANALYSIS = 400            # linhas amostradas por índice no ANALYZE do optimize
+ALTERACOES_MANTIDAS = 100_000    # linhas recentes de propostas_alteracoes preservadas
+
+# tarefa -> intervalo entre execuções (segundos)
+INTERVALOS = {
+    "backup": 6 * 3600,
+    "optimize": 3600,
+    "checkpoint": 300,
+    "incremental_vacuum": 3600,
+    "limpar_alteracoes": 3600,
+    "snapshot_colunar": 300,
+}
+ATRASO_INICIAL = 60              # não disputa o disco com a subida do app
+INTERVALO_VERIFICACAO = 15
+
+
+def _agora() -> str:
+    return datetime.now().isoformat(sep=" ", timespec="seconds")
+
+
+def fazer_backup(caminho: str = DB_PATH, pasta: str = PASTA_BACKUP) -> dict:
+    """
+    Copia o banco para pasta/propostas-AAAAMMDD-HHMMSS.db.
+
+    A conexão de origem segura uma transação de leitura durante a cópia:
+    sob WAL isso fixa o snapshot, então as gravações do app continuam
+    normalmente e o backup não recomeça a cada commit. Cada passo copia
+    PAGINAS_POR_PASSO páginas.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    destino = os.path.join(pasta, datetime.now().strftime("propostas-%Y%m%d-%H%M%S.db"))
+    temporario = destino + ".tmp"
+
+    passos = {"quantidade": 0, "maior": 0.0, "paginas": 0}
+    inicio_passo = time.perf_counter()
+
+    def progresso(status, restantes, total):
+        nonlocal inicio_passo
+        duracao = time.perf_counter() - inicio_passo
+        passos["quantidade"] += 1
+        passos["maior"] = max(passos["maior"], duracao)
+        passos["paginas"] = total
+        time.sleep(PAUSA_ENTRE_PASSOS)
+        inicio_passo = time.perf_counter()
+
+    origem = get_connection(caminho, somente_leitura=True)
+    alvo = sqlite3.connect(temporario)
+    try:
+        origem.execute("BEGIN;")
+        origem.execute("SELECT 1 FROM sqlite_master LIMIT 1;").fetchall()
+        origem.backup(alvo, pages=PAGINAS_POR_PASSO, progress=progresso)
+        origem.rollback()
+    finally:
+        alvo.close()
+        origem.close()
+    os.replace(temporario, destino)
+
+    # mantém só os BACKUPS_MANTIDOS mais recentes
+    for antigo in sorted(glob.glob(os.path.join(pasta, "propostas-*.db")))[:-BACKUPS_MANTIDOS]:
+        os.remove(antigo)
+
+    return {
+        "arquivo": destino,
+        "paginas": passos["paginas"],
+        "passos": passos["quantidade"],
+        "passo_max": passos["maior"],
+    }
+
+
+def _optimize(conn):
+    inicio = time.perf_counter()
+    conn.execute(f"PRAGMA analysis_limit={LIMITE_ANALYSIS};")
+    conn.execute("PRAGMA optimize;").fetchall()
+    return {"passo_max": time.perf_counter() - inicio}
+
+
+def _incremental_vacuum(conn):
+    inicio = time.perf_counter()
+    (modo,) = conn.execute("PRAGMA auto_vacuum;").fetchone()
+    if modo != 2:
+        return {"passo_max": 0.0, "obs": "auto_vacuum não é INCREMENTAL; nada a fazer"}
+    (livres,) = conn.execute("PRAGMA freelist_count;").fetchone()
+    # cada execute() dá um passo no statement, que devolve uma página; dentro
+    # da transação da fila de escrita não dá para usar o executescript (que
+    # faria COMMIT antes)
+    devolvidas = min(livres, PAGINAS_VACUUM)
+    for _ in range(devolvidas):
+        conn.execute("PRAGMA incremental_vacuum(1);")
+    return {
+        "passo_max": time.perf_counter() - inicio,
+        "obs": f"{devolvidas} de {livres} páginas livres devolvidas",
+    }
+
+
+def _limpar_alteracoes(conn):
+    inicio = time.perf_counter()
+    cur = conn.execute(
+        "DELETE FROM propostas_alteracoes WHERE seq <= (SELECT MAX(seq) FROM propostas_alteracoes) - ?;",
+        (ALTERACOES_MANTIDAS,),
+    )
+    return {"passo_max": time.perf_counter() - inicio, "obs": f"{cur.rowcount} linhas removidas"}
+
+
+def _snapshot_colunar():
+    # import aqui: o cache (pandas) só é carregado quando a tarefa roda, e
+    # não na subida do app junto com a thread de manutenção
+    from cache_propostas import materializar_snapshot
+
+    return materializar_snapshot()
+
+
+def _checkpoint():
+    # Única tarefa que mexe no banco fora da fila de escrita: o checkpoint
+    # não pode rodar dentro da transação da thread de escrita, e o PASSIVE
+    # não pega o lock de escrita nem espera por ninguém, só copia para o
+    # arquivo o que nenhum leitor ainda precisa no WAL. Nunca faz a thread
+    # de escrita receber SQLITE_BUSY (TRUNCATE/RESTART fariam).
+    inicio = time.perf_counter()
+    with conexao() as conn:
+        ocupado, paginas_wal, copiadas = conn.execute("PRAGMA wal_checkpoint(PASSIVE);").fetchone()
+    return {
+        "passo_max": time.perf_counter() - inicio,
+        "obs": f"{copiadas} de {paginas_wal} páginas do WAL copiadas" + (" (leitores ativos)" if ocupado else ""),
+    }
+
+
+# tarefa -> função sem argumentos que roda o passo e devolve um dict com
+# passo_max (maior tempo segurando o banco) e, opcionalmente, obs
+TAREFAS = {
+    "backup": lambda: fazer_backup(),
+    # o ANALYZE do optimize grava no arquivo: passa pela fila de escrita
+    # para não disputar o lock com as gravações das telas
+    "optimize": lambda: executar_escrita(_optimize),
+    "checkpoint": _checkpoint,
+    # devolver páginas livres também grava: mesmo caminho do optimize
+    "incremental_vacuum": lambda: executar_escrita(_incremental_vacuum),
+    "limpar_alteracoes": lambda: executar_escrita(_limpar_alteracoes),
+    # só lê o banco (delta do cache); a gravação é em arquivos próprios
+    "snapshot_colunar": _snapshot_colunar,
+}
+
+
+class Manutencao:
+    """Thread daemon que agenda as TAREFAS e guarda as métricas de cada uma."""
+
+    def __init__(self, intervalos: dict[str, float] = INTERVALOS, atraso_inicial: float = ATRASO_INICIAL):
+        self.intervalos = dict(intervalos)
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        inicio = time.monotonic() + atraso_inicial
+        self._proxima = {tarefa: inicio for tarefa in TAREFAS}
+        self._stats = {
+            tarefa: {
+                "execucoes": 0,
+                "erros": 0,
+                "ultima_execucao": None,
+                "ultima_duracao": 0.0,
+                "duracao_max": 0.0,
+                "passo_max": 0.0,
+                "ultimo_resultado": "",
+                "ultimo_erro": "",
+            }
+            for tarefa in TAREFAS
+        }
+        self._thread = threading.Thread(target=self._loop, name="manutencao", daemon=True)
+        self._thread.start()
+
+    def solicitar(self, tarefa: str):
+        """Antecipa a tarefa para a próxima volta da thread."""
+        with self._lock:
+            self._proxima[tarefa] = 0.0
+        self._acordar.set()
+
+    def _loop(self):
+        while True:
+            self._acordar.wait(INTERVALO_VERIFICACAO)
+            self._acordar.clear()
+            agora = time.monotonic()
+            with self._lock:
+                vencidas = [t for t, quando in self._proxima.items() if quando <= agora]
+            for tarefa in vencidas:
+                self._executar(tarefa)
+
+    def _executar(self, tarefa: str):
+        inicio = time.perf_counter()
+        try:
+            resultado = TAREFAS[tarefa]()
+            erro = None
+        except Exception as e:
+            resultado, erro = {}, e
+        duracao = time.perf_counter() - inicio
+
+        with self._lock:
+            self._proxima[tarefa] = time.monotonic() + self.intervalos[tarefa]
+            stats = self._stats[tarefa]
+            stats["execucoes"] += 1
+            stats["ultima_execucao"] = _agora()
+            stats["ultima_duracao"] = duracao
+            stats["duracao_max"] = max(stats["duracao_max"], duracao)
+            if erro is not None:
+                stats["erros"] += 1
+                stats["ultimo_erro"] = f"{type(erro).__name__}: {erro}"
+                return
+            stats["passo_max"] = max(stats["passo_max"], resultado.get("passo_max", 0.0))
+            if tarefa == "backup":
+                stats["ultimo_resultado"] = (
+                    f"{resultado['arquivo']} ({resultado['paginas']} páginas em {resultado['passos']} passos)"
+                )
+            else:
+                stats["ultimo_resultado"] = resultado.get("obs", "ok")
+
+    def metricas(self) -> list[dict]:
+        agora = time.monotonic()
+        with self._lock:
+            return [
+                {"tarefa": tarefa, "proxima_em": max(0.0, self._proxima[tarefa] - agora), **stats}
+                for tarefa, stats in self._stats.items()
+            ]
+
+
+_manutencao = None
+_manutencao_lock = threading.Lock()
+
+
+def iniciar_manutencao() -> Manutencao:
+    """Sobe a thread de manutenção (uma por processo) e a devolve."""
+    global _manutencao
+    if _manutencao is None:
+        with _manutencao_lock:
+            if _manutencao is None:
+                _manutencao = Manutencao()
+    return _manutencao
+
+
+def metricas_manutencao() -> list[dict]:
+    return iniciar_manutencao().metricas()
+
+
+def solicitar_manutencao(tarefa: str):
+    iniciar_manutencao().solicitar(tarefa)
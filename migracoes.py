@@ -0,0 +1,1120 @@
+"""
+Migrações versionadas do schema do propostas.db.
+
+Cada migração é aplicada uma única vez e registrada na tabela
+schema_version. O app chama garantir_schema() a cada rerun, mas depois da
+primeira execução no processo isso custa só a checagem de um flag em
+memória.
+"""
+import hashlib
+import threading
+from datetime import datetime
+
+from db import conexao
+
+PARCEIROS_INICIAIS = [
+    "Selecione o parceiro",
+    "1@EVOLVE SOLUÇÕES LTDA",
+    "2@JOSE WALTER PEREIRA BATISTA",
+    "3@MARIA IEDA SAMICO CAVALCANTI NETA",
+    "1001@FLAVIA CHRISTIANE GOMES DE SIQUEIRA",
+    "1002@PAULO RAMON GOMES DA SILVA",
+    "1003@MICHELI ROSE DOS SANTOS SILVA",
+    "1004@JOSE ERIK DOS SANTOS SILVA",
+    "1005@CELIA EMPRESTIMOS LTDA",
+    "1006@ACTOS PROMOTORA LTDA",
+    "1007@ROZILVA VIEIRA DOS SANTOS",
+    "1010@GEOVANIA SANTOS BARBOSA DE MOURA",
+    "1014@MEGA CRED SERVICOS FINANCEIROS LTDA",
+    "1017@RENE R. DA SILVA SANTOS",
+    "1023@MARLLEN KELLY FERREIRA DA SILVA",
+    "1024@MANACES FRANCA DO NASCIMENTO JUNIOR",
+    "1026@J J SOARES COSTA LTDA",
+    "1027@EMILLY BREENDA DE FIGUEIREDO DA SILVA",
+    "1030@EVOLVE PROMOTORA LTDA",
+    "1031@ERIKA PATRICIA BEZERRA BRASIL",
+    "1032@JANAINA RENATA DA SILVA",
+    "1033@S C DA C FIGUEREDO NA CONTACRED",
+    "1034@ISACREDITO CADASTRO E INTERMEDIACOES FINANCEIRAS LTDA",
+    "1036@AD SANTANA RAMOS",
+    "1038@R P DA SILVA PROMOTORA DE NEGOCIOS",
+    "1039@F DOS SANTOS BARROS LTDA",
+    "1040@JAQUELINE PEREIRA DA SILVA",
+    "1041@ALAN FERREIRA CHICUTA",
+    "1043@MERCIA LOPES DE GOES",
+    "1044@EVERTON FELIX TELES",
+    "1045@RAYSSA KARLA SILVA DOS SANTOS",
+    "1046@MORAES CONSIGNADOS LTDA",
+    "1047@VIVIANE RIBEIRO SENA DE MELO SILVA",
+    "1048@Q L A CHUCUTA PROMOTORA DE VENDAS E SERVICOS",
+    "1049@CLAUDETE OLIVEIRA BORGES DA SILVA",
+    "1050@KEILA COSTA BARROS",
+    "1052@ISRAEL BISPO DA SILVA",
+    "1053@RAFAEL VICENTE DA SILVA SANTOS",
+    "1054@SILVANIA ALMEIDA DA SILVA QUIRINO",
+    "1055@CARLOS CESAR FOLHA DE SANTANA",
+    "1056@FERNANDO SAMPAIO BARROS",
+    "1057@KAUAI AMORIM GOUVEIA",
+    "1059@FERNANDA EMANUELLE DOS SANTOS FERREIRA",
+    "1060@VANIA LUCIA SILVESTRE DE ANDRADE CASTRO SOTERO",
+    "1061@TANIA MARIA SANTOS FERREIRA",
+    "1062@CINTHIA ALVES CADETE",
+    "1063@VALERIA FERREIRA SILVA",
+    "1064@KARLA JULIANA SOARES MACIEL",
+    "1065@VALQUIRIA SANTOS",
+    "1066@WARLLEN VINICIUS GAMA DE LIMA",
+    "1067@CARLA NAIARA DOS SANTOS LIMA",
+    "1068@GILSON NASCIMENTO DO CARMO",
+    "1070@ADIVALDIR DOS SANTOS SIQUEIRA JUNIOR",
+    "1072@ANDREIA DOS SANTOS SILVA",
+    "1073@GUSTAVO ARGEMIRO DA SILVA PARREIRA",
+    "1074@JOAO LINO RAMOS NETO",
+    "1075@PAULA JULIANA CORDEIRO SANTOS DA SILVA",
+    "1076@IZABELLA ALVES DE MENEZES MAIA",
+    "1078@SELMA ALVES BULHOES DE MACEDO",
+    "1079@SHEILA GUILHERME DA SILVA",
+    "1080@SALETE MENDONCA PEREIRA",
+    "1081@FERNANDA PESSOA DE OLIVEIRA",
+    "1082@MARIA DE LOURDES GOMES LIMA",
+    "1083@RAFAELLA DE ARAUJO CANDIDO DA SILVA",
+    "1084@JOSE VITOR OLIVEIRA SILVA",
+    "1086@ERICK GUSTAVO ALVES DE SOUZA",
+    "1087@CLARISSA BARACHO PEREIRA",
+    "1088@MARCOS PAULO TEIXEIRA DA SILVA",
+    "1089@THIAGO WINICIUS NOGUEIRA DA SILVA",
+    "1085@MONICA TALITA DA SILVA AMARO",
+    "1091@RENATO DE SANTANA ALVES",
+    "1092@AMANDA GALVAO DE SOUZA",
+    "1093@NILTON FABRICIO SANTANA RAMOS",
+    "1094@LUCIANA GOMES DA SILVA CRUZ",
+    "1095@ALBERTO TEIXEIRA DE SOUZA FILHO",
+    "1096@KAMILLA CAMPOS MALTA",
+    "1097@FABIOLA VANIA PIMENTEL BRANDAO FREIRE",
+    "1098@JANE GONCALVES DE MACEDO",
+    "1099@ROBSON BERNARDO OLIVEIRA",
+    "1100@HELLISVAN CLEMENTE DA SILVA",
+    "1077@JACQUELINE SANTOS VICENTE DA SILVA",
+    "1102@JOSYVANIA LINS SANTOS",
+    "1103@INGRID MAYARA MOREIRA DE OLIVEIRA MENDONCA CANDEA",
+    "1104@ANA LUCIA PEREIRA DA SILVA",
+    "1105@ODJANE SILVA DOS SANTOS",
+    "1106@LARISSA KALLYNE DOS SANTOS ALVES PEIXOTO",
+    "1107@MICHAEL MORAES DE BARROS",
+    "1108@MAICOLN SILVA SANTOS",
+    "1109@JOYCE MAYARA BARBOSA DA SILVA",
+    "1110@MARCEL DE MORAIS TENORIO",
+    "1111@MICHELLE MONTELARES DE OLIVEIRA E SILVA",
+    "1112@ERICK DAMIAO DOS SANTOS SILVA",
+    "1113@ALINE DE MENDONCA ARAUJO",
+    "1114@LEANDRO DE OLIVEIRA CAVALCANTE",
+    "1115@JHOANNA LOWHAYNY DA SILVA SANTOS",
+    "1116@MARIA DA PENHA VIEIRA DE FARIAS",
+    "1117@QUEZIA ELOY TENORIO CADENGUE",
+    "1118@JEAN CARLOS SILVA SANTANA",
+    "1071@CICERO ALDO DOS SANTOS DA COSTA",
+    "1120@JALDEMO OLIVEIRA PAZ",
+    "1121@SAQUE CRED",
+    "1122@INES MARINHO PEIXOTO",
+    "1123@ALESSANDRO TEIXEIRA DA SILVA",
+    "1124@LUCAS LINDO DE SOUZA",
+    "1125@NELSON R DA SILVA FILHO",
+    "1126@GUSTAVO DO AMARAL LIMA",
+    "1127@JENESSON PEREIRA DA SILVA",
+    "1128@DIVA HERMELINDA SANTOS DO NASCIMENTO",
+    "1129@WANESSA ROBERTA VILA NOVA DA SILVA CALAZANS",
+    "1130@MAIARA SANTOS DE MEDEIROS",
+    "1131@JEFERSON WILLIAM COSTA VIEIRA",
+    "1132@LAYS FERNANDA ROCHA DA SILVA",
+    "1133@DMAIS PROMOTORA LTDA",
+    "1134@DANIEL DANTAS NETO",
+    "1069@PATRICIA DA COSTA SANTOS",
+    "1136@ROSILEIDE GOMES DOS SANTOS",
+    "1137@ALEXSANDRA LINDYSANE VANDERLEI SANTOS GUIMARAES",
+    "1138@MARCEL DE MORAIS TENORIO JUNIOR",
+    "1139@54.266.455 BRENA GABRIELE CHASTINET NASCIMENTO",
+    "1140@P P DA S SANTOS TOPCRED SOLUCOES FINANCEIRAS",
+    "1141@JOSE DOUGLAS CAVALCANTE DA ROCHA",
+    "1058@CAMILA PEREIRA DA SILVA",
+    "1143@S. PAULA GUIMARAES AMARAL",
+    "1144@DEBORAH BEATRIZ SILVA SANTOS",
+    "1145@ROSMYLE MONTEIRO DOS SANTOS",
+    "1146@CICERO RAFAEL DOS SANTOS SILVA",
+    "1147@FABIO TORRES MEDEIROS REGO",
+    "1148@CLAUDIANE ARAUJO DA SILVA",
+    "1149@ANDREIA DA SILVA SANTOS",
+    "1150@LEONE PEREIRA GOMES",
+    "1051@ANE ISABELY AZEVEDO DE SOUZA",
+    "1042@SIVALDO CALIXTO DA ROCHA",
+    "1154@GUILHERME TEIXEIRA TAVARES",
+    "1155@RENATA DE FATIMA ANDRADE MASTRANGELI",
+    "1156@HERICK DE MENDONCA ANSELMO",
+    "1157@TAMMIRIS EMANUELA DOMINGOS DE MELO",
+    "1158@JOSINEIDE MARIA DA SILVA SANTOS",
+    "1159@MICHELINE KATTY DE LIMA",
+    "1037@LUCINEIDE MARIA BARBOSA",
+    "1161@RENATA MARIA DOS SANTOS",
+    "1035@MARCELO CORTEZ DE LUCENA 00307167569",
+    "1163@ALLYSON GUILHERME FELIX DO NASCIMENTO",
+    "1164@RENATA BARROS DE CASTRO",
+    "1165@DANIELA KIVIA GOMES NICANDRO",
+    "1166@FLAVIA CRISTINA ASSUNCAO DE MELO",
+    "1029@ALBUQUERQUE E MORAES SERVICOS LTDA",
+    "1168@MARIA HELANIA DA SILVA",
+    "1169@KETHELY ALVES",
+    "1170@EDUARDO GOMES DA CRUZ",
+    "1171@JOSIVANIA DA SILVA LUZ",
+    "1172@MARILENE RODRIGUES GOMES DEODATO",
+    "1173@MARIA FERNANDA GOMES DE LIMA FERNANDES",
+    "1174@SILVANIA SARAIVA DE FRANCA SILVA",
+    "1175@MARIA CLAUDIA GREGO DE AGUIAR LIMA",
+    "1176@SHALLAKO WANDYSON MOREIRA DO CARMO",
+    "1177@JULIO JOSE CLIMACO DE MELO MENDONCA",
+    "1178@VANESSA RIBEIRO DOMINGOS SANTOS",
+    "1179@JEFFERSON CAVALCANTI LUCENA",
+    "1182@SAVIO ALLAN CABRAL SANTANA DA SILVA",
+    "1028@FABRICIA SILVA DE BRITO CAMPOS",
+    "1184@CARLA CLAUDIA GUILHERME DA SILVA MARQUES",
+    "1185@NEXT LEVEL PROMOTORA LTDA",
+    "1186@NEXT LEVEL PROMOTORA LTDA",
+    "1189@MARIA NEIDE CAMARA DE QUEIROZ",
+    "1190@ELIEZER ALVES DE MEIRELES",
+    "1191@JACIRA DOS SANTOS FILGUEIRA",
+    "1025@F P DE OLIVEIRA FERNANDES",
+    "1193@ANDREA CHRISTIANE DE MENEZES ANDRADE",
+    "1194@MONICA GOUVEIA DA SILVA SANTOS",
+    "1195@MARIA MADALENA DA SILVA",
+    "1196@LUZIANA MARIA DE SOUZA DUTRA",
+    "1197@KARINY KELLY DE MENEZES",
+    "1022@REAL PROMOTORA DE VENDAS LTDA",
+    "1199@ALEXANDRA ALVES DE CARVALHO",
+    "1200@SEVERINO EDUARDO DA SILVA",
+    "1201@ISABELE MARIA BARBOSA SANTOS",
+    "1202@ISMAEL DE SOUZA GOMES",
+    "1203@VERA LUCIA ANDRADE DONATO",
+    "1205@JOSE CID HONORATO",
+    "1206@ADEILDO JOSE PATRIOTA",
+    "1207@CLAUDIO CEZAR COUTINHO DE MOURA",
+    "1208@JANIEIDE DA SILVA GONCALVES",
+    "1021@DAYANE B S DE OLIVEIRA",
+    "1020@LARISSA DAIANNY DA SILVA AVELINO",
+    "1211@CLAUDIA MARIA FERREIRA CAMILO",
+    "1212@FABIANE BENICIO DE ARAUJO",
+    "1019@RIVANIA ROMANA RODRIGUES DO NASCIMENTO LTDA",
+    "1214@MARIA CRISTINA ALVES BARBOSA",
+    "1215@SUELEN LIMA DA SILVA",
+    "1216@MARCELO DELGADO ALVES",
+    "1018@ROSIMARIA BARBOSA DE FIGUEIREDO",
+    "1218@CRISTIANE IZIDORO DA SILVA",
+    "1219@IARA CURVELO TENORIO",
+    "1220@PEDRO ANTONIO DA SILVA",
+    "1221@MARIA ZENIVANIA ALVES BARBOSA MOURA",
+    "1222@ANDRESSA RAYANE DOS SANTOS",
+    "1224@MACIELE NOGUEIRA DE LIMA",
+    "1225@MARIA IEDA SAMICO CAVALCANTI NETA",
+    "1226@ANDERSON FERREIRA DE SOUZA",
+    "1227@JOAO CARLOS TAVARES DE LIMA",
+    "1228@GABRIELA ALENCAR CAMPELO DE MELO",
+    "1229@CAMILA IRIS DE FRANCA SILVA",
+    "1231@DANIELE CIARA DA SILVA",
+    "1232@THAINA SILVA FERREIRA",
+    "1233@MARCYVANIA SANTOS DA SILVA",
+    "1016@KATIA CRISTINA MORAIS DE OLIVEIRA KM",
+    "1235@VILMAR DONDI",
+    "1236@LUIZ RAPHAEL D EMERY DUARTE",
+    "1237@ERIKA FERNANDA MARTINS DA SILVA",
+    "1238@MARCELA DE SOUZA COSTA",
+    "1239@DUCILENE NOGUEIRA DA SILVA",
+    "1240@IVINA ELENITA RIBEIRO BEZERRA",
+    "1015@E DOS SANTOS REPRESENTACAO",
+    "1242@CYNTHIA SANTOS SILVA",
+    "1243@JOSE CICERO SILVA NETO",
+    "1244@TESTE",
+    "2244@PRODUÇÃO INTERNA",
+    "2250@TABELA ESPELHO",
+    "2251@IULY GOMES DOS SANTOS",
+    "2252@M FINANCEIRA LTDA",
+    "2257@FLAVIA REJANE DOS SANTOS",
+    "2258@TABELA ESPELHO ACTOS",
+    "2260@JOCYANE LUCIA SANTOS AMORIM",
+    "2261@TABELA ESPELHO AYRON",
+    "2262@TABELA ESPELHO C6BANK",
+    "2263@TABELA ESPELHO BONUS PAN",
+    "2264@CELSO CORREIA DE LIMA",
+    "2266@RICARDO LEONARDO FERREIRA DA SILVA",
+    "2267@ANDRE DO ESPIRITO SANTO CRUZ FILHO",
+    "2268@TABELA ESPELHO SAQUECRED",
+    "2269@GLAUCIA ALVES SANTOS",
+    "2270@JESSICA GOUVEIA DA SILVA",
+    "2271@TABELA ESPELHO SAQUE CRED",
+    "2272@TESTE 2",
+    "1013@ROSALIA NUNES DA CRUZ",
+    "1012@MARCIO ANDRE PAES BENJOINO FILHO",
+    "1011@DENISE VANDERLEI LUCAS 80309933404",
+    "1009@SILVANIA RAMOS DOS SANTOS LIMA",
+    "1008@FRANCO CARNAUBA FERREIRA",
+    "1090@VANIA LUCIA DE LIMA RODRIGUES",
+    "1101@BEMSENIOR PROMOTORA DE CREDITO LTDA",
+    "1119@LETICIA DAS NEVES DOS SANTOS",
+    "1135@ROSILEIDE FERNANDES BARBOZA SILVA",
+    "1142@MARCELO DOS SANTOS BEZERRA",
+    "1151@MARIA ELIANE CRISTIANO LAURINDO",
+    "1152@TILGATHPILNEZER FERNANDES LIMA NETO",
+    "1160@VANDETE TAVARES DA SILVA PEREIRA",
+    "1162@ICARO LEON UBIRATAN SILVA",
+    "1167@MARISTELA RODRIGUES LEMOS",
+    "1183@JOSE NAZARENO TELES",
+    "1192@EDUARDO LOPES DO NASCIMENTO",
+    "1198@JOSE ANDERSON DO NASCIMENTO",
+    "1209@LUCIA DE FATIMA DA CONCEICAO",
+    "1210@ANA MARIA ARAGAO",
+    "1213@LUANA DA SILVA RAMOS",
+    "1217@TANIA LUZIMAR DA SILVA PEREIRA",
+    "1234@JUSCARA LIMA SOARES",
+    "1241@NEIDJA ABREU DE QUEIROZ",
+]
+
+BANCOS_INICIAIS = [
+    "C6 - DG",
+    "DIGIO - BEVI",
+    "DIGIO - DG (209271)",
+    "DIGIO - AD PROM.(100154)",
+    "BMG - DG 53991",
+    "BMG - BEVI",
+    "FACTA FINANCEIRA - DG",
+    "OLE(ANTIGO) - DG",
+    "OLE(FVE) - DG",
+    "SANTANDER - DG",
+    "CREFISA - DG",
+    "CREFISA BOLSA FAMILIA - DG",
+    "CREFISA BOLSA FAMILIA - ALCIF",
+    "CIASPREV - INOPERANTE",
+    "PAULISTA - INOPERANTE",
+    "VEMCARD - INOPERANTE",
+    "HAPPY - DG",
+    "AMIGOZ - DG",
+    "ITAU - DG",
+    "BRB - ESTEIRA DIGITAL",
+    "BRB - EVOLVE",
+    "BRB - DG",
+    "CREFAZ - DG",
+    "SABEMI - BEVI",
+    "QUERO+ - DG",
+    "QUERO+ (RL) - DG",
+    "MASTER - DG",
+    "INCONTA - PORT",
+    "INBURSA - PORT",
+    "DAYCOVAL - BEVI",
+    "BANRISUL - BEVI",
+    "BANRISUL - DG",
+    "SAFRA - BEVI",
+    "SAFRA - DIRETO",
+    "MEU CASHCARD",
+    "KARDBANK - GFT",
+    "ICRED - BEVI",
+    "MERCANTIL - DG",
+    "FINANTO - DIRETO",
+    "PRESENÇA BANK - DG",
+    "FUTURO PREVIDENCIA - DIRETO",
+    "AKI CAPITAL (ALCIF CONVENIOS) - ALCIF",
+    "PAN - DG",
+    "PICPAY - DG",
+    "PARANA - DG",
+    "NBC BANK - DG",
+    "PRATA - DG",
+]
+
+
+def _criar_schema_base(cur):
+    """Tabelas originais do app (versão 0), com os cadastros iniciais."""
+    # Tabela de propostas
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS propostas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            digitador TEXT NOT NULL,
+            ade TEXT NOT NULL,
+            cpf TEXT NOT NULL,
+            data TEXT NOT NULL,
+            parceiro TEXT NOT NULL,
+            tipo_produto TEXT,
+            valor REAL,
+            banco TEXT NOT NULL
+        );
+        """
+    )
+
+    # Tabela de usuários (login)
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario TEXT UNIQUE NOT NULL,
+            nome_exibicao TEXT NOT NULL,
+            senha_hash TEXT NOT NULL,
+            perfil TEXT NOT NULL  -- 'admin' ou 'digitador'
+        );
+        """
+    )
+
+    # Tabela de logs de auditoria das propostas
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS log_propostas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            proposta_id INTEGER,
+            acao TEXT NOT NULL,          -- INSERT, UPDATE, DELETE
+            usuario TEXT NOT NULL,       -- login de quem fez
+            timestamp TEXT NOT NULL,     -- data/hora da ação
+            detalhes TEXT,               -- texto livre descrevendo a mudança
+            FOREIGN KEY (proposta_id) REFERENCES propostas(id)
+        );
+        """
+    )
+
+    # Tabela de parceiros
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS parceiros (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descricao TEXT UNIQUE NOT NULL,
+            ativo INTEGER NOT NULL DEFAULT 1
+        );
+        """
+    )
+
+    # Tabela de bancos
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS bancos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            descricao TEXT UNIQUE NOT NULL,
+            ativo INTEGER NOT NULL DEFAULT 1
+        );
+        """
+    )
+
+    # Popula parceiros iniciais se estiver vazio
+    cur.execute("SELECT COUNT(*) FROM parceiros;")
+    if cur.fetchone()[0] == 0:
+        cur.executemany(
+            "INSERT OR IGNORE INTO parceiros (descricao, ativo) VALUES (?, 1);",
+            [(p,) for p in PARCEIROS_INICIAIS],
+        )
+
+    # Popula bancos iniciais se estiver vazio
+    cur.execute("SELECT COUNT(*) FROM bancos;")
+    if cur.fetchone()[0] == 0:
+        cur.executemany(
+            "INSERT OR IGNORE INTO bancos (descricao, ativo) VALUES (?, 1);",
+            [(b,) for b in BANCOS_INICIAIS],
+        )
+
+    # Usuário admin padrão caso a tabela esteja vazia (usuario: admin / senha: admin)
+    cur.execute("SELECT COUNT(*) FROM usuarios;")
+    if cur.fetchone()[0] == 0:
+        cur.execute(
+            """
+            INSERT INTO usuarios (usuario, nome_exibicao, senha_hash, perfil)
+            VALUES (?, ?, ?, ?);
+            """,
+            ("admin", "Administrador", hashlib.sha256("admin".encode("utf-8")).hexdigest(), "admin"),
+        )
+
+
+def _m001_tipo_produto(cur):
+    # Bases antigas foram criadas antes da coluna tipo_produto existir
+    cur.execute("PRAGMA table_info(propostas);")
+    cols = [r[1] for r in cur.fetchall()]
+    if "tipo_produto" not in cols:
+        cur.execute("ALTER TABLE propostas ADD COLUMN tipo_produto TEXT;")
+
+
+def _m002_indices_filtros(cur):
+    # Índices secundários. Nos compostos a igualdade vem antes do intervalo de
+    # data, assim "banco X entre as datas A e B" vira uma única faixa do índice;
+    # o prefixo também atende o filtro só por banco/parceiro/digitador/tipo.
+    indices = {
+        "idx_propostas_data": "propostas (data)",
+        "idx_propostas_cpf": "propostas (cpf)",
+        "idx_propostas_banco_data": "propostas (banco, data)",
+        "idx_propostas_parceiro_data": "propostas (parceiro, data)",
+        "idx_propostas_digitador_data": "propostas (digitador, data)",
+        "idx_propostas_tipo_produto_data": "propostas (tipo_produto, data)",
+        "idx_log_propostas_proposta_id": "log_propostas (proposta_id)",
+        "idx_log_propostas_usuario": "log_propostas (usuario)",
+    }
+    for nome, alvo in indices.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {alvo};")
+
+
+def _m003_chaves_estrangeiras(cur):
+    """
+    Troca os textos de parceiro, banco e digitador em propostas por ids de
+    parceiros, bancos e usuarios. A tabela é reconstruída numa única
+    transação; sob WAL as leituras continuam vendo a versão anterior até o
+    commit.
+
+    Corrigida antes de ser publicada (a série de migrações ainda não saiu
+    em nenhuma versão): os logins legado_N pulam os que já existem. A
+    versão anterior abortava nesse caso, então nenhum banco migrado por ela
+    fica diferente.
+    """
+    # Textos que não existem mais nos cadastros entram como inativos,
+    # para nenhuma proposta perder o parceiro/banco original
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO parceiros (descricao, ativo)
+        SELECT DISTINCT parceiro, 0 FROM propostas;
+        """
+    )
+    cur.execute(
+        """
+        INSERT OR IGNORE INTO bancos (descricao, ativo)
+        SELECT DISTINCT banco, 0 FROM propostas;
+        """
+    )
+
+    # Digitadores sem usuário correspondente viram usuários sem login
+    # (senha_hash '!' nunca confere com um sha256)
+    cur.execute(
+        """
+        SELECT DISTINCT digitador FROM propostas
+        WHERE digitador NOT IN (SELECT nome_exibicao FROM usuarios)
+        ORDER BY digitador;
+        """
+    )
+    sem_usuario = [r[0] for r in cur.fetchall()]
+    cur.execute("SELECT usuario FROM usuarios;")
+    logins = {r[0] for r in cur.fetchall()}
+    i = 0
+    for nome in sem_usuario:
+        # pula os legado_N que já são login de alguém (usuario é UNIQUE)
+        i += 1
+        while f"legado_{i}" in logins:
+            i += 1
+        cur.execute(
+            """
+            INSERT INTO usuarios (usuario, nome_exibicao, senha_hash, perfil)
+            VALUES (?, ?, '!', 'digitador');
+            """,
+            (f"legado_{i}", nome),
+        )
+
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'propostas';")
+    row = cur.fetchone()
+    seq_antiga = row[0] if row else 0
+
+    cur.execute(
+        """
+        CREATE TABLE propostas_nova (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            digitador_id INTEGER NOT NULL REFERENCES usuarios(id),
+            ade TEXT NOT NULL,
+            cpf TEXT NOT NULL,
+            data TEXT NOT NULL,
+            parceiro_id INTEGER NOT NULL REFERENCES parceiros(id),
+            tipo_produto TEXT,
+            valor REAL,
+            banco_id INTEGER NOT NULL REFERENCES bancos(id)
+        );
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO propostas_nova (id, digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor, banco_id)
+        SELECT
+            p.id,
+            (SELECT MIN(u.id) FROM usuarios u WHERE u.nome_exibicao = p.digitador),
+            p.ade, p.cpf, p.data,
+            (SELECT pa.id FROM parceiros pa WHERE pa.descricao = p.parceiro),
+            p.tipo_produto, p.valor,
+            (SELECT b.id FROM bancos b WHERE b.descricao = p.banco)
+        FROM propostas p;
+        """
+    )
+    cur.execute("DROP TABLE propostas;")
+    cur.execute("ALTER TABLE propostas_nova RENAME TO propostas;")
+
+    # Não reaproveita ids de propostas excluídas antes da migração
+    cur.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'propostas';",
+        (seq_antiga,),
+    )
+
+    for nome, alvo in {
+        "idx_propostas_data": "propostas (data)",
+        "idx_propostas_cpf": "propostas (cpf)",
+        "idx_propostas_banco_data": "propostas (banco_id, data)",
+        "idx_propostas_parceiro_data": "propostas (parceiro_id, data)",
+        "idx_propostas_digitador_data": "propostas (digitador_id, data)",
+        "idx_propostas_tipo_produto_data": "propostas (tipo_produto, data)",
+    }.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {alvo};")
+
+    # Visão com os textos para exibição (mesmas colunas da tabela antiga)
+    cur.execute(
+        """
+        CREATE VIEW vw_propostas AS
+        SELECT
+            p.id,
+            u.nome_exibicao AS digitador,
+            p.ade,
+            p.cpf,
+            p.data,
+            pa.descricao AS parceiro,
+            p.tipo_produto,
+            p.valor,
+            b.descricao AS banco,
+            p.digitador_id,
+            p.parceiro_id,
+            p.banco_id
+        FROM propostas p
+        LEFT JOIN usuarios u ON u.id = p.digitador_id
+        LEFT JOIN parceiros pa ON pa.id = p.parceiro_id
+        LEFT JOIN bancos b ON b.id = p.banco_id;
+        """
+    )
+
+
+def _m004_tipos_data_valor(cur):
+    """
+    Grava data como número do dia (desde 1970-01-01) e valor como centavos
+    inteiros, para o app carregar datetime64 e somas exatas sem converter
+    texto a cada rerun.
+
+    Corrigida antes de ser publicada (a série de migrações ainda não saiu
+    em nenhuma versão): centavos pelo reais_para_centavos do db, como nas
+    telas, e recusa de valor em texto, que antes virava 0. Uma migração
+    nova não refaria isso, porque o valor REAL original some aqui.
+    """
+    cur.execute(
+        """
+        SELECT id, data FROM propostas
+        WHERE julianday(data) IS NULL
+        ORDER BY id;
+        """
+    )
+    invalidas = cur.fetchall()
+    if invalidas:
+        ids = ", ".join(str(r[0]) for r in invalidas[:20])
+        raise ValueError(
+            f"{len(invalidas)} proposta(s) com data inválida (ids: {ids}). "
+            "Corrija a coluna data antes de aplicar a migração 4."
+        )
+
+    # valor REAL guarda como texto o que não parece número
+    cur.execute(
+        """
+        SELECT id FROM propostas
+        WHERE valor IS NOT NULL AND typeof(valor) NOT IN ('integer', 'real')
+        ORDER BY id;
+        """
+    )
+    invalidas = cur.fetchall()
+    if invalidas:
+        ids = ", ".join(str(r[0]) for r in invalidas[:20])
+        raise ValueError(
+            f"{len(invalidas)} proposta(s) com valor inválido (ids: {ids}). "
+            "Corrija a coluna valor antes de aplicar a migração 4."
+        )
+
+    cur.execute("SELECT seq FROM sqlite_sequence WHERE name = 'propostas';")
+    row = cur.fetchone()
+    seq_antiga = row[0] if row else 0
+
+    cur.execute("DROP VIEW IF EXISTS vw_propostas;")
+    cur.execute(
+        """
+        CREATE TABLE propostas_nova (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            digitador_id INTEGER NOT NULL REFERENCES usuarios(id),
+            ade TEXT NOT NULL,
+            cpf TEXT NOT NULL,
+            data INTEGER NOT NULL CHECK (typeof(data) = 'integer'),   -- dias desde 1970-01-01
+            parceiro_id INTEGER NOT NULL REFERENCES parceiros(id),
+            tipo_produto TEXT,
+            valor_centavos INTEGER CHECK (valor_centavos IS NULL OR typeof(valor_centavos) = 'integer'),
+            banco_id INTEGER NOT NULL REFERENCES bancos(id)
+        );
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO propostas_nova (id, digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+        SELECT
+            id, digitador_id, ade, cpf,
+            CAST(julianday(date(data)) - 2440587.5 AS INTEGER),
+            parceiro_id, tipo_produto,
+            reais_para_centavos(valor),   -- função do db.get_connection
+            banco_id
+        FROM propostas;
+        """
+    )
+    cur.execute("DROP TABLE propostas;")
+    cur.execute("ALTER TABLE propostas_nova RENAME TO propostas;")
+    cur.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'propostas';",
+        (seq_antiga,),
+    )
+
+    for nome, alvo in {
+        "idx_propostas_data": "propostas (data)",
+        "idx_propostas_cpf": "propostas (cpf)",
+        "idx_propostas_banco_data": "propostas (banco_id, data)",
+        "idx_propostas_parceiro_data": "propostas (parceiro_id, data)",
+        "idx_propostas_digitador_data": "propostas (digitador_id, data)",
+        "idx_propostas_tipo_produto_data": "propostas (tipo_produto, data)",
+    }.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {alvo};")
+
+    cur.execute(
+        """
+        CREATE VIEW vw_propostas AS
+        SELECT
+            p.id,
+            u.nome_exibicao AS digitador,
+            p.ade,
+            p.cpf,
+            p.data,
+            pa.descricao AS parceiro,
+            p.tipo_produto,
+            p.valor_centavos,
+            p.valor_centavos / 100.0 AS valor,
+            b.descricao AS banco,
+            p.digitador_id,
+            p.parceiro_id,
+            p.banco_id
+        FROM propostas p
+        LEFT JOIN usuarios u ON u.id = p.digitador_id
+        LEFT JOIN parceiros pa ON pa.id = p.parceiro_id
+        LEFT JOIN bancos b ON b.id = p.banco_id;
+        """
+    )
+
+
+def _m005_versao_dados(cur):
+    """
+    Contador de versão por tabela, incrementado por triggers a cada
+    INSERT/UPDATE/DELETE. Qualquer gravação, de qualquer processo, muda o
+    contador; os caches do app comparam o contador em vez de reler a tabela.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS versao_dados (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        );
+        """
+    )
+    for tabela in ["propostas", "parceiros", "bancos", "usuarios"]:
+        cur.execute("INSERT OR IGNORE INTO versao_dados (tabela, versao) VALUES (?, 0);", (tabela,))
+        for evento in ["INSERT", "UPDATE", "DELETE"]:
+            cur.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{tabela}_{evento.lower()}_versao
+                AFTER {evento} ON {tabela}
+                BEGIN
+                    UPDATE versao_dados SET versao = versao + 1 WHERE tabela = '{tabela}';
+                END;
+                """
+            )
+
+
+def _m006_propostas_alteracoes(cur):
+    """
+    Log de alterações de propostas (id e ordem), mantido por triggers, para
+    o cache do app buscar só o que mudou desde a última sincronização.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS propostas_alteracoes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            proposta_id INTEGER NOT NULL
+        );
+        """
+    )
+    for evento, linha in [("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")]:
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_propostas_{evento.lower()}_alteracoes
+            AFTER {evento} ON propostas
+            BEGIN
+                INSERT INTO propostas_alteracoes (proposta_id) VALUES ({linha}.id);
+            END;
+            """
+        )
+
+
+def _m007_indices_log(cur):
+    """
+    Índices da tela de Logs de Auditoria, que pagina por id desc. Todo
+    índice secundário termina no rowid (= id), então "igualdade + faixa de
+    id" já sai na ordem da página, sem ordenar.
+
+    - acao: filtro só por ação
+    - usuario, acao: usuário e ação juntos (o idx_log_propostas_usuario
+      continua atendendo só o usuário, na ordem de id)
+    - timestamp: acha o primeiro/último id de um período; o período vira
+      faixa de id (o log só recebe INSERTs com o horário da gravação)
+    """
+    for nome, alvo in {
+        "idx_log_propostas_acao": "log_propostas (acao)",
+        "idx_log_propostas_usuario_acao": "log_propostas (usuario, acao)",
+        "idx_log_propostas_timestamp": "log_propostas (timestamp)",
+    }.items():
+        cur.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {alvo};")
+
+
+def _m008_cpf_stats(cur):
+    """
+    Quantidade de propostas por CPF, mantida exata por triggers em
+    propostas, para a regra "CPF com mais de uma proposta na base". A
+    regra passa a ser uma busca pela chave primária de cpf_stats por
+    linha, em vez de contar as propostas do CPF no idx_propostas_cpf.
+
+    - INSERT soma 1 no CPF novo; DELETE tira 1 do antigo e apaga a linha
+      quando chega a zero (cpf_stats só tem CPFs presentes na base)
+    - UPDATE só mexe em cpf_stats quando o CPF muda
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cpf_stats (
+            cpf TEXT PRIMARY KEY,
+            qtd INTEGER NOT NULL CHECK (qtd > 0)
+        ) WITHOUT ROWID;
+        """
+    )
+    cur.execute("DELETE FROM cpf_stats;")
+    cur.execute("INSERT INTO cpf_stats (cpf, qtd) SELECT cpf, COUNT(*) FROM propostas GROUP BY cpf;")
+
+    soma = """
+        INSERT INTO cpf_stats (cpf, qtd) VALUES (NEW.cpf, 1)
+        ON CONFLICT (cpf) DO UPDATE SET qtd = qtd + 1;
+    """
+    subtrai = """
+        DELETE FROM cpf_stats WHERE cpf = OLD.cpf AND qtd = 1;
+        UPDATE cpf_stats SET qtd = qtd - 1 WHERE cpf = OLD.cpf;
+    """
+    for evento, corpo in [
+        ("INSERT ON propostas", soma),
+        ("DELETE ON propostas", subtrai),
+        ("UPDATE OF cpf ON propostas WHEN OLD.cpf IS NOT NEW.cpf", subtrai + soma),
+    ]:
+        nome = evento.split()[0].lower()
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_propostas_{nome}_cpf_stats
+            AFTER {evento}
+            BEGIN
+                {corpo}
+            END;
+            """
+        )
+
+
+def _m009_propostas_diario(cur):
+    """
+    Produção por dia e dimensões do Dashboard (data, banco, parceiro,
+    digitador, tipo_produto -> quantidade, valor bruto e valor considerado,
+    em centavos), mantida exata por triggers em propostas. O Dashboard lê
+    dias x dimensões em vez de todas as propostas do período.
+
+    O valor considerado segue a regra do CPF na base inteira, então uma
+    gravação também mexe no dia de outra proposta do mesmo CPF:
+
+    - CPF chega à 2ª proposta: a 1ª deixa de ser considerada
+    - CPF volta a ter 1 proposta: a que sobrou volta a ser considerada
+
+    A contagem do CPF sai de propostas (idx_propostas_cpf), e não de
+    cpf_stats, para não depender da ordem em que o SQLite dispara os
+    triggers. tipo_produto NULL é guardado como '' (chave primária).
+
+    A chave primária começa na data (série por dia e recorte de período);
+    idx_propostas_diario_dimensoes cobre as somas na ordem das dimensões,
+    então o total por banco/parceiro/digitador/tipo sai sem ordenar.
+    """
+    cur.execute(
+        """
+        CREATE TABLE IF NOT EXISTS propostas_diario (
+            data INTEGER NOT NULL,
+            banco_id INTEGER NOT NULL,
+            parceiro_id INTEGER NOT NULL,
+            digitador_id INTEGER NOT NULL,
+            tipo_produto TEXT NOT NULL,
+            qtd INTEGER NOT NULL,
+            valor_centavos INTEGER NOT NULL,
+            valor_considerado_centavos INTEGER NOT NULL,
+            PRIMARY KEY (data, banco_id, parceiro_id, digitador_id, tipo_produto)
+        ) WITHOUT ROWID;
+        """
+    )
+    cur.execute("DELETE FROM propostas_diario;")
+    cur.execute(
+        """
+        INSERT INTO propostas_diario
+        SELECT
+            p.data, p.banco_id, p.parceiro_id, p.digitador_id, COALESCE(p.tipo_produto, ''),
+            COUNT(*),
+            SUM(COALESCE(p.valor_centavos, 0)),
+            SUM(CASE WHEN s.qtd > 1 THEN 0 ELSE COALESCE(p.valor_centavos, 0) END)
+        FROM propostas p
+        JOIN cpf_stats s ON s.cpf = p.cpf
+        GROUP BY 1, 2, 3, 4, 5;
+        """
+    )
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_propostas_diario_dimensoes ON propostas_diario (
+            banco_id, parceiro_id, digitador_id, tipo_produto, data,
+            qtd, valor_centavos, valor_considerado_centavos
+        );
+        """
+    )
+
+    colunas = "data, banco_id, parceiro_id, digitador_id, tipo_produto, qtd, valor_centavos, valor_considerado_centavos"
+    acumula = """
+        ON CONFLICT (data, banco_id, parceiro_id, digitador_id, tipo_produto) DO UPDATE SET
+            qtd = qtd + excluded.qtd,
+            valor_centavos = valor_centavos + excluded.valor_centavos,
+            valor_considerado_centavos = valor_considerado_centavos + excluded.valor_considerado_centavos;
+    """
+
+    def qtd_cpf(cpf):
+        return f"(SELECT COUNT(*) FROM propostas WHERE cpf = {cpf})"
+
+    def linha(alias, sinal, considerada):
+        """Soma (sinal +) ou tira (sinal -) a própria proposta do seu dia."""
+        valor = f"{sinal}COALESCE({alias}.valor_centavos, 0)"
+        return f"""
+            INSERT INTO propostas_diario ({colunas})
+            VALUES (
+                {alias}.data, {alias}.banco_id, {alias}.parceiro_id, {alias}.digitador_id,
+                COALESCE({alias}.tipo_produto, ''),
+                {sinal}1, {valor}, CASE WHEN {considerada} THEN {valor} ELSE 0 END
+            )
+            {acumula}
+        """
+
+    def vizinha(cpf, id_gravada, sinal, quando):
+        """Liga (sinal +) ou desliga (sinal -) o valor considerado da outra proposta do CPF."""
+        return f"""
+            INSERT INTO propostas_diario ({colunas})
+            SELECT
+                v.data, v.banco_id, v.parceiro_id, v.digitador_id, COALESCE(v.tipo_produto, ''),
+                0, 0, {sinal}COALESCE(v.valor_centavos, 0)
+            FROM propostas v
+            WHERE v.cpf = {cpf} AND v.id <> {id_gravada} AND {quando}
+            {acumula}
+        """
+
+    limpa = """
+        DELETE FROM propostas_diario
+        WHERE data = OLD.data AND banco_id = OLD.banco_id AND parceiro_id = OLD.parceiro_id
+          AND digitador_id = OLD.digitador_id AND tipo_produto = COALESCE(OLD.tipo_produto, '')
+          AND qtd = 0;
+    """
+    cpf_mudou = "OLD.cpf IS NOT NEW.cpf"
+    dimensoes = ["data", "banco_id", "parceiro_id", "digitador_id", "tipo_produto", "cpf", "valor_centavos"]
+
+    insere = (
+        linha("NEW", "+", f"{qtd_cpf('NEW.cpf')} = 1")
+        + vizinha("NEW.cpf", "NEW.id", "-", f"{qtd_cpf('NEW.cpf')} = 2")
+    )
+    exclui = (
+        linha("OLD", "-", f"{qtd_cpf('OLD.cpf')} = 0")
+        + vizinha("OLD.cpf", "OLD.id", "+", f"{qtd_cpf('OLD.cpf')} = 1")
+        + limpa
+    )
+    # depois do UPDATE a linha já está com o CPF novo: o antigo tinha uma
+    # proposta a mais do que a contagem atual quando o CPF mudou
+    altera = (
+        linha("OLD", "-", f"{qtd_cpf('OLD.cpf')} + ({cpf_mudou}) = 1")
+        + linha("NEW", "+", f"{qtd_cpf('NEW.cpf')} = 1")
+        + vizinha("OLD.cpf", "NEW.id", "+", f"{cpf_mudou} AND {qtd_cpf('OLD.cpf')} = 1")
+        + vizinha("NEW.cpf", "NEW.id", "-", f"{cpf_mudou} AND {qtd_cpf('NEW.cpf')} = 2")
+        + limpa
+    )
+    for nome, evento, corpo in [
+        ("insert", "INSERT ON propostas", insere),
+        ("delete", "DELETE ON propostas", exclui),
+        (
+            "update",
+            f"UPDATE OF {', '.join(dimensoes)} ON propostas "
+            f"WHEN {' OR '.join(f'OLD.{c} IS NOT NEW.{c}' for c in dimensoes)}",
+            altera,
+        ),
+    ]:
+        cur.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_propostas_{nome}_diario
+            AFTER {evento}
+            BEGIN
+                {corpo}
+            END;
+            """
+        )
+
+
+# (versão, descrição, função). Sempre acrescente no final, nunca reordene
+# nem altere uma migração já publicada: crie uma nova.
+MIGRACOES = [
+    (1, "coluna tipo_produto em propostas", _m001_tipo_produto),
+    (2, "índices dos filtros de propostas e log_propostas", _m002_indices_filtros),
+    (3, "parceiro, banco e digitador como chaves estrangeiras", _m003_chaves_estrangeiras),
+    (4, "data como número do dia e valor em centavos", _m004_tipos_data_valor),
+    (5, "contador de versão dos dados por tabela (invalidação de cache)", _m005_versao_dados),
+    (6, "log de alterações de propostas (carga incremental)", _m006_propostas_alteracoes),
+    (7, "índices da paginação do log de auditoria", _m007_indices_log),
+    (8, "quantidade de propostas por CPF (regra do valor considerado)", _m008_cpf_stats),
+    (9, "produção diária por dimensão do Dashboard (rollup)", _m009_propostas_diario),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1][0]
+
+# Consulta típica de cada tela que deve ser atendida pelo índice
+# correspondente (schema atual)
+CONSULTAS_INDICES = {
+    "idx_propostas_data": (
+        "SELECT * FROM propostas WHERE data BETWEEN ? AND ?;",
+        (20089, 20119),
+    ),
+    "idx_propostas_cpf": (
+        "SELECT * FROM propostas WHERE cpf = ?;",
+        ("00000000000",),
+    ),
+    "idx_propostas_banco_data": (
+        "SELECT * FROM propostas WHERE banco_id = ? AND data BETWEEN ? AND ?;",
+        (1, 20089, 20119),
+    ),
+    "idx_propostas_parceiro_data": (
+        "SELECT * FROM propostas WHERE parceiro_id = ? AND data BETWEEN ? AND ?;",
+        (1, 20089, 20119),
+    ),
+    "idx_propostas_digitador_data": (
+        "SELECT * FROM propostas WHERE digitador_id = ? AND data BETWEEN ? AND ?;",
+        (1, 20089, 20119),
+    ),
+    "idx_propostas_tipo_produto_data": (
+        "SELECT * FROM propostas WHERE tipo_produto = ? AND data BETWEEN ? AND ?;",
+        ("FGTS", 20089, 20119),
+    ),
+    "idx_log_propostas_proposta_id": (
+        "SELECT * FROM log_propostas WHERE proposta_id = ?;",
+        (1,),
+    ),
+    "idx_log_propostas_usuario": (
+        "SELECT * FROM log_propostas WHERE usuario = ?;",
+        ("admin",),
+    ),
+    "idx_log_propostas_acao": (
+        "SELECT * FROM log_propostas WHERE acao = ?;",
+        ("DELETE",),
+    ),
+    "idx_log_propostas_usuario_acao": (
+        "SELECT * FROM log_propostas WHERE usuario = ? AND acao = ?;",
+        ("admin", "DELETE"),
+    ),
+    "idx_log_propostas_timestamp": (
+        "SELECT id FROM log_propostas WHERE timestamp >= ? ORDER BY timestamp LIMIT 1;",
+        ("2025-01-01",),
+    ),
+    "idx_propostas_diario_dimensoes": (
+        "SELECT banco_id, parceiro_id, digitador_id, tipo_produto, SUM(valor_considerado_centavos) "
+        "FROM propostas_diario WHERE banco_id = ? GROUP BY 1, 2, 3, 4;",
+        (1,),
+    ),
+}
+
+_schema_ok = False
+_schema_lock = threading.Lock()
+
+
+def versao_schema(conn) -> int:
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version';"
+    )
+    if cur.fetchone() is None:
+        return 0
+    (versao,) = conn.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version;").fetchone()
+    return versao
+
+
+def aplicar_migracoes(conn) -> list[int]:
+    """
+    Aplica as migrações pendentes e devolve as versões aplicadas.
+
+    Cada passo roda em sua própria transação IMMEDIATE, então dois
+    processos subindo ao mesmo tempo não aplicam a mesma migração duas vezes.
+    """
+    aplicadas = []
+    cur = conn.cursor()
+
+    cur.execute("BEGIN IMMEDIATE;")
+    try:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_version (
+                versao INTEGER PRIMARY KEY,
+                descricao TEXT NOT NULL,
+                aplicada_em TEXT NOT NULL
+            );
+            """
+        )
+        if versao_schema(conn) == 0:
+            _criar_schema_base(cur)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    for versao, descricao, funcao in MIGRACOES:
+        cur.execute("BEGIN IMMEDIATE;")
+        try:
+            # Relê dentro da transação: outro processo pode ter aplicado antes
+            if versao_schema(conn) >= versao:
+                conn.rollback()
+                continue
+            funcao(cur)
+            cur.execute(
+                "INSERT INTO schema_version (versao, descricao, aplicada_em) VALUES (?, ?, ?);",
+                (versao, descricao, datetime.now().isoformat(sep=" ", timespec="seconds")),
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        aplicadas.append(versao)
+
+    return aplicadas
+
+
+def garantir_schema():
+    """Deixa o banco na versão mais recente (só faz trabalho uma vez por processo)."""
+    global _schema_ok
+    if _schema_ok:
+        return
+    with _schema_lock:
+        if _schema_ok:
+            return
+        with conexao() as conn:
+            if versao_schema(conn) < VERSAO_ATUAL:
+                aplicar_migracoes(conn)
+        _schema_ok = True
+
+
+def verificar_planos(conn) -> list[dict]:
+    """
+    Roda EXPLAIN QUERY PLAN nas consultas de CONSULTAS_INDICES e indica se
+    cada uma usa o índice esperado (e não uma varredura completa da tabela).
+    """
+    resultado = []
+    for indice, (sql, params) in CONSULTAS_INDICES.items():
+        linhas = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+        plano = " | ".join(l[-1] for l in linhas)
+        resultado.append({
+            "indice": indice,
+            "usa_indice": f"USING INDEX {indice}" in plano
+                          or f"USING COVERING INDEX {indice}" in plano,
+            "plano": plano,
+        })
+    return resultado
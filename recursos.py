@@ -0,0 +1,102 @@
+"""
+Recursos estáticos do app (logos, versão, IP do servidor) preparados uma
+vez por processo, e o orçamento de tempo da partida.
+
+O Streamlit reexecuta o app.py a cada interação. Uma imagem passada por
+caminho é relida a cada rerun e, se for mais larga que o conteúdo da
+página, redimensionada e recodificada de novo: só o page_icon
+(logo_evolve.png, 2021 px) custava ~600 ms por rerun. Aqui cada imagem é
+reduzida uma única vez ao tamanho em que aparece e entregue como bytes
+PNG, que o Streamlit repassa sem reprocessar.
+"""
+import functools
+import io
+import json
+import socket
+import threading
+from pathlib import Path
+
+from PIL import Image
+
+PASTA_APP = Path(__file__).parent
+
+LADO_ICONE = 64                  # favicon da aba (px)
+LARGURA_LOGO_SIDEBAR = 320       # ~2x a largura da coluna do meio da sidebar (telas HiDPI)
+
+# Orçamento de tempo da partida (s), conferido no Diagnóstico e pelo
+# tests/test_partida.py (processo novo, banco vazio)
+ORCAMENTO_PARTIDA = {
+    # import do pandas e dos módulos das telas, feito só depois do login
+    "modulos_telas": 2.0,
+    # do início do script até a sidebar de login desenhada
+    "login": 1.0,
+}
+
+
+@functools.cache
+def _png_reduzido(arquivo: str, lado: int) -> bytes:
+    with Image.open(PASTA_APP / arquivo) as imagem:
+        imagem.thumbnail((lado, lado))
+        saida = io.BytesIO()
+        imagem.save(saida, format="PNG")
+    return saida.getvalue()
+
+
+def icone_pagina() -> bytes:
+    return _png_reduzido("logo_evolve.png", LADO_ICONE)
+
+
+def logo_sidebar() -> bytes:
+    return _png_reduzido("logo_evolvegrande.png", LARGURA_LOGO_SIDEBAR)
+
+
+@functools.cache
+def get_version_info() -> dict:
+    """Conteúdo do version.json gerado no build (lido uma vez por processo)."""
+    try:
+        with open(PASTA_APP / "version.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {
+            "version": "0.0.0",
+            "build": 0,
+            "generatedAt": "",
+            "description": ""
+        }
+
+
+@functools.cache
+def get_user_ip() -> str:
+    # resolução de nome pode demorar: o resultado vale para o processo todo
+    try:
+        return socket.gethostbyname(socket.gethostname())
+    except OSError:
+        return "IP desconhecido"
+
+
+_partida = {}
+_partida_lock = threading.Lock()
+
+
+def registrar_partida(etapa: str, segundos: float):
+    """Guarda a duração de uma etapa da partida (a primeira é a do processo recém-iniciado)."""
+    with _partida_lock:
+        stats = _partida.setdefault(etapa, {"execucoes": 0, "primeira": segundos, "ultima": 0.0, "maxima": 0.0})
+        stats["execucoes"] += 1
+        stats["ultima"] = segundos
+        stats["maxima"] = max(stats["maxima"], segundos)
+
+
+def metricas_partida() -> list[dict]:
+    """Uma linha por etapa do ORCAMENTO_PARTIDA, com a pior duração comparada ao orçamento."""
+    with _partida_lock:
+        linhas = []
+        for etapa, orcamento in ORCAMENTO_PARTIDA.items():
+            stats = _partida.get(etapa, {"execucoes": 0, "primeira": 0.0, "ultima": 0.0, "maxima": 0.0})
+            linhas.append({
+                "etapa": etapa,
+                "orcamento": orcamento,
+                **stats,
+                "dentro_orcamento": stats["maxima"] <= orcamento,
+            })
+    return linhas
@@ -0,0 +1,204 @@
+"""
+Snapshot colunar das propostas em disco, aberto com np.memmap.
+
+Cada coluna do DataFrame vira um ou mais .npy tipados:
+
+- numéricas e datas: o array NumPy como está
+- inteiros anuláveis (Int64): valores + máscara de nulos
+- category: códigos inteiros + dicionário de valores distintos
+- texto: layout do Arrow (offsets int64 + bytes UTF-8 + bitmap de
+  válidos), o mesmo do dtype "str" do pandas; texto em object volta como
+  object (copiado)
+
+Abrir o snapshot não lê os arquivos: os arrays apontam para as páginas
+mapeadas (np.load com mmap_mode="r") e o pandas/pyarrow os usa sem copiar.
+Só o dicionário das colunas category é validado (hash dos valores
+distintos) ao montar o dtype.
+
+Cada gravação vai para uma pasta de geração nova e só então o manifesto é
+trocado (os.replace), então quem abre sempre vê uma geração completa. As
+gerações antigas são apagadas; um processo que ainda as tenha mapeadas
+continua lendo normalmente (o arquivo só some quando o último mapeamento
+é fechado).
+"""
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+PASTA_SNAPSHOT = "propostas_colunas"
+MANIFESTO = "manifesto.json"
+FORMATO = 1
+
+# Gerações mais novas que isso não são apagadas: podem ser de outro
+# processo que ainda não trocou o manifesto
+IDADE_MINIMA_LIMPEZA = 60
+
+
+def _gravar_array(pasta: str, arquivo: str, valores: np.ndarray) -> str:
+    np.save(os.path.join(pasta, arquivo + ".npy"), np.ascontiguousarray(valores), allow_pickle=False)
+    return arquivo + ".npy"
+
+
+def _abrir_array(pasta: str, arquivo: str) -> np.ndarray:
+    return np.load(os.path.join(pasta, arquivo), mmap_mode="r", allow_pickle=False)
+
+
+def _gravar_coluna(pasta: str, nome: str, valores) -> dict:
+    """Grava um array do pandas e devolve a entrada do manifesto que o descreve."""
+    tipo = valores.dtype
+
+    if isinstance(tipo, pd.CategoricalDtype):
+        return {
+            "codificacao": "dicionario",
+            "ordenada": bool(tipo.ordered),
+            "codigos": _gravar_array(pasta, f"{nome}.codigos", np.asarray(valores.codes)),
+            "dicionario": _gravar_coluna(pasta, f"{nome}.dicionario", tipo.categories.array),
+        }
+
+    objeto = pd.api.types.is_object_dtype(tipo) and pd.api.types.infer_dtype(np.asarray(valores)) in ("string", "empty")
+    if isinstance(tipo, pd.StringDtype) or objeto:
+        texto = pa.array(valores, type=pa.large_string(), from_pandas=True)
+        if isinstance(texto, pa.ChunkedArray):
+            texto = texto.combine_chunks()
+        _, offsets, dados = texto.buffers()
+        entrada = {
+            "codificacao": "texto",
+            "linhas": len(texto),
+            "offsets": _gravar_array(
+                pasta,
+                f"{nome}.offsets",
+                np.frombuffer(offsets, dtype=np.int64)[texto.offset : texto.offset + len(texto) + 1],
+            ),
+            "dados": _gravar_array(
+                pasta, f"{nome}.dados", np.frombuffer(dados, dtype=np.uint8) if dados is not None else np.zeros(0, np.uint8)
+            ),
+        }
+        if texto.null_count:
+            validos = texto.is_valid().to_numpy(zero_copy_only=False)
+            entrada["validos"] = _gravar_array(pasta, f"{nome}.validos", np.packbits(validos, bitorder="little"))
+        if objeto:
+            # ex.: categorias de uma base vazia, que o pandas deixa em object
+            entrada["objeto"] = True
+        return entrada
+
+    if isinstance(valores, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+        tipo_numpy = tipo.numpy_dtype
+        return {
+            "codificacao": "mascarada",
+            "dtype": str(tipo),
+            "valores": _gravar_array(pasta, f"{nome}.valores", valores.to_numpy(dtype=tipo_numpy, na_value=tipo_numpy.type(0))),
+            "nulos": _gravar_array(pasta, f"{nome}.nulos", np.asarray(valores.isna())),
+        }
+
+    matriz = np.asarray(valores)
+    if matriz.dtype.kind in "biufM":
+        return {"codificacao": "numpy", "arquivo": _gravar_array(pasta, nome, matriz)}
+
+    raise TypeError(f"Coluna {nome}: tipo {tipo} sem codificação no snapshot colunar")
+
+
+def _abrir_coluna(pasta: str, entrada: dict):
+    codificacao = entrada["codificacao"]
+
+    if codificacao == "numpy":
+        return _abrir_array(pasta, entrada["arquivo"])
+
+    if codificacao == "mascarada":
+        classe = pd.api.types.pandas_dtype(entrada["dtype"]).construct_array_type()
+        return classe(_abrir_array(pasta, entrada["valores"]), _abrir_array(pasta, entrada["nulos"]))
+
+    if codificacao == "texto":
+        validos = entrada.get("validos")
+        texto = pa.LargeStringArray.from_buffers(
+            entrada["linhas"],
+            pa.py_buffer(_abrir_array(pasta, entrada["offsets"])),
+            pa.py_buffer(_abrir_array(pasta, entrada["dados"])),
+            null_bitmap=pa.py_buffer(_abrir_array(pasta, validos)) if validos else None,
+        )
+        if entrada.get("objeto"):
+            return pd.array(texto.to_numpy(zero_copy_only=False), dtype=object)
+        return pd.array(texto, dtype="str")
+
+    if codificacao == "dicionario":
+        categorias = pd.Index(_abrir_coluna(pasta, entrada["dicionario"]))
+        tipo = pd.CategoricalDtype(categorias, ordered=entrada["ordenada"])
+        return pd.Categorical.from_codes(_abrir_array(pasta, entrada["codigos"]), dtype=tipo, validate=False)
+
+    raise ValueError(f"Codificação desconhecida no snapshot colunar: {codificacao}")
+
+
+def ler_manifesto(pasta: str = PASTA_SNAPSHOT) -> dict | None:
+    """Manifesto da geração atual, ou None se ainda não há snapshot (ou é de outro formato)."""
+    try:
+        with open(os.path.join(pasta, MANIFESTO), encoding="utf-8") as arquivo:
+            manifesto = json.load(arquivo)
+    except FileNotFoundError:
+        return None
+    return manifesto if manifesto.get("formato") == FORMATO else None
+
+
+def gravar_snapshot(df: pd.DataFrame, versao: tuple, ultimo_seq: int, pasta: str = PASTA_SNAPSHOT) -> dict:
+    """
+    Grava df como uma geração nova e a publica no manifesto.
+
+    - versao: contadores versao_dados de quem gerou o df (propostas e
+      cadastros), para quem abre saber se ainda vale
+    - ultimo_seq: último propostas_alteracoes.seq já refletido no df
+    """
+    geracao = f"geracao-{time.time_ns()}-{os.getpid()}"
+    destino = os.path.join(pasta, geracao)
+    os.makedirs(destino)
+
+    colunas = [{"nome": nome, **_gravar_coluna(destino, nome, df[nome].array)} for nome in df.columns]
+    tamanho = sum(entrada.stat().st_size for entrada in os.scandir(destino))
+    manifesto = {
+        "formato": FORMATO,
+        "geracao": geracao,
+        "gerado_em": datetime.now().isoformat(sep=" ", timespec="seconds"),
+        "linhas": len(df),
+        "bytes": tamanho,
+        "versao": list(versao),
+        "ultimo_seq": int(ultimo_seq),
+        "colunas": colunas,
+    }
+
+    temporario = os.path.join(pasta, f"{MANIFESTO}.{os.getpid()}.tmp")
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False)
+    os.replace(temporario, os.path.join(pasta, MANIFESTO))
+
+    limite = time.time() - IDADE_MINIMA_LIMPEZA
+    for entrada in os.scandir(pasta):
+        if (
+            entrada.is_dir()
+            and entrada.name.startswith("geracao-")
+            and entrada.name != geracao
+            and entrada.stat().st_mtime < limite
+        ):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+    return manifesto
+
+
+def abrir_snapshot(pasta: str = PASTA_SNAPSHOT) -> tuple[pd.DataFrame, dict] | None:
+    """
+    (DataFrame com as colunas mapeadas do disco, manifesto), ou None se não
+    há snapshot. Os arrays são somente leitura; com o copy-on-write do
+    pandas qualquer alteração gera cópia própria.
+    """
+    manifesto = ler_manifesto(pasta)
+    if manifesto is None:
+        return None
+    origem = os.path.join(pasta, manifesto["geracao"])
+    df = pd.DataFrame(
+        {entrada["nome"]: _abrir_coluna(origem, entrada) for entrada in manifesto["colunas"]},
+        copy=False,
+    )
+    if len(df) != manifesto["linhas"]:
+        raise ValueError(f"Snapshot colunar {manifesto['geracao']} incompleto")
+    return df, manifesto
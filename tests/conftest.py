@@ -0,0 +1,75 @@
+import sqlite3
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+# Os módulos do app ficam na raiz do repositório, fora de um pacote
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+import cache_propostas  # noqa: E402
+import db  # noqa: E402
+import filtros  # noqa: E402
+import migracoes  # noqa: E402
+
+
+@pytest.fixture
+def processo(tmp_path, monkeypatch):
+    """
+    Diretório vazio (o propostas.db é criado em tmp_path) e os singletons
+    do processo (pools, fila de escrita, caches) zerados para o teste.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(db, "_pool", None)
+    monkeypatch.setattr(db, "_pool_leitura", None)
+    monkeypatch.setattr(db, "_fila_escrita", None)
+    monkeypatch.setattr(migracoes, "_schema_ok", False)
+    monkeypatch.setattr(cache_propostas, "_cache", None)
+    monkeypatch.setattr(filtros, "_resultados", OrderedDict())
+    monkeypatch.setattr(filtros, "_resumos", OrderedDict())
+    monkeypatch.setattr(filtros, "_producoes", OrderedDict())
+    monkeypatch.setattr(filtros, "_snapshot_completo", (None, None))
+    yield tmp_path
+    for pool in (db._pool, db._pool_leitura):
+        if pool is not None:
+            pool.fechar_todas()
+
+
+@pytest.fixture
+def banco(processo):
+    """propostas.db novo, já na versão mais recente do schema."""
+    migracoes.garantir_schema()
+    return processo
+
+
+@pytest.fixture
+def banco_legado(processo):
+    """
+    Cria um propostas.db na versão 0 (tabelas originais, textos em
+    propostas) com as linhas dadas; as migrações ficam para o teste.
+
+    criar(propostas, usuarios=()): propostas são tuplas (digitador, ade,
+    cpf, data, parceiro, tipo_produto, valor, banco) e usuarios tuplas
+    (usuario, nome_exibicao) acrescentadas ao cadastro inicial.
+    """
+    def criar(propostas, usuarios=()):
+        conn = sqlite3.connect(db.DB_PATH)
+        cur = conn.cursor()
+        migracoes._criar_schema_base(cur)
+        cur.executemany(
+            "INSERT INTO usuarios (usuario, nome_exibicao, senha_hash, perfil) VALUES (?, ?, '!', 'digitador');",
+            usuarios,
+        )
+        cur.executemany(
+            """
+            INSERT INTO propostas (digitador, ade, cpf, data, parceiro, tipo_produto, valor, banco)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            propostas,
+        )
+        conn.commit()
+        conn.close()
+
+    return criar
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import agregacao
+
+
+def _propostas(n=500, semente=0):
+    """Recortes categóricos, de texto e de data, todos com nulos, e medidas com nulos."""
+    rng = np.random.default_rng(semente)
+
+    def com_nulos(valores):
+        valores = np.asarray(valores, dtype=object)
+        valores[rng.random(len(valores)) < 0.1] = None
+        return valores
+
+    bancos = ["C6", "PAN", "BMG", "SEM PROPOSTA"]    # categoria que não aparece
+    return pd.DataFrame({
+        "banco": pd.Categorical(com_nulos(rng.choice(bancos[:3], n)), categories=bancos),
+        "parceiro": com_nulos(rng.choice(["P1", "P2", "P3", "P4"], n)),
+        # dias com buracos no meio
+        "data": pd.to_datetime(com_nulos(rng.choice(pd.date_range("2025-01-01", periods=40)[::3], n))),
+        "cpf": com_nulos(rng.integers(0, 60, n).astype(str)),
+        "valor_centavos": pd.array(com_nulos(rng.integers(0, 10**7, n)), dtype="Int64"),
+        "taxa": pd.Series(com_nulos(rng.random(n)), dtype="float64"),
+        "qtd": rng.integers(1, 5, n),
+    })
+
+
+RECORTES = ["banco", "parceiro", "data"]
+MEDIDAS = ["valor_centavos", "taxa", "qtd"]
+
+
+def _esperado(df, recorte):
+    esperado = df.groupby(recorte, observed=True).agg(
+        linhas=("qtd", "size"),
+        valor_centavos=("valor_centavos", "sum"),
+        taxa=("taxa", "sum"),
+        qtd=("qtd", "sum"),
+        clientes=("cpf", "nunique"),
+        dias=("data", "nunique"),
+    )
+    esperado.index = pd.Index(list(esperado.index), name=recorte)
+    return esperado
+
+
+def _conferir(df):
+    totais, por = agregacao.agregar_recortes(df, RECORTES, MEDIDAS, distintos={"clientes": "cpf", "dias": "data"})
+
+    assert totais == {
+        "linhas": len(df),
+        "valor_centavos": int(df["valor_centavos"].sum()),
+        "taxa": pytest.approx(df["taxa"].sum()),
+        "qtd": int(df["qtd"].sum()),
+    }
+    for recorte in RECORTES:
+        obtido = por[recorte]
+        obtido.index = pd.Index(list(obtido.index), name=recorte)
+        pd.testing.assert_frame_equal(obtido, _esperado(df, recorte), check_dtype=False)
+        assert obtido["valor_centavos"].dtype == "int64"
+
+
+def test_recortes_batem_com_o_groupby():
+    _conferir(_propostas())
+
+
+def test_distintos_sem_a_matriz_de_marcacao(monkeypatch):
+    monkeypatch.setattr(agregacao, "LIMITE_MARCACAO", 0)
+    _conferir(_propostas(semente=1))
+
+
+def test_recorte_so_com_nulos_e_frame_vazio():
+    df = _propostas(20)
+    df["data"] = pd.NaT
+    _, por = agregacao.agregar_recortes(df, ["data"], ["qtd"])
+    assert por["data"].empty
+
+    totais, por = agregacao.agregar_recortes(df.iloc[:0], RECORTES, MEDIDAS)
+    assert totais == {"linhas": 0, "valor_centavos": 0, "taxa": 0.0, "qtd": 0}
+    assert all(por[r].empty for r in RECORTES)
+
+
+def _producao(linhas):
+    """linhas: (digitador, cpf, dia de janeiro, valor, considerado) em centavos."""
+    digitador, cpf, dia, valor, considerado = zip(*linhas) if linhas else ([],) * 5
+    return pd.DataFrame({
+        "digitador": pd.Categorical(digitador, categories=["Ana", "Bia", "Caio"]),
+        "cpf": list(cpf),
+        "data": pd.to_datetime([f"2025-01-{d:02d}" for d in dia]),
+        "valor_centavos": pd.array(valor, dtype="int64"),
+        "valor_considerado_centavos": pd.array(considerado, dtype="int64"),
+    })
+
+
+@pytest.mark.parametrize(
+    ("atual", "anterior", "dias_periodo", "esperado"),
+    [
+        (
+            # Bia não produziu antes e Caio só produziu valor desconsiderado:
+            # crescimento NaN para os dois
+            [("Ana", "1", 1, 100, 100), ("Ana", "2", 2, 200, 200), ("Bia", "3", 1, 100, 100), ("Caio", "4", 1, 500, 0)],
+            [("Ana", "1", 1, 150, 150), ("Caio", "4", 1, 500, 0)],
+            10,
+            [
+                ("Ana", 2, 2, 2, 3.0, 3.0, 1.5, 0.3, 0.75, 1.0),
+                ("Bia", 1, 1, 1, 1.0, 1.0, 1.0, 0.1, 0.25, np.nan),
+                ("Caio", 1, 1, 1, 5.0, 0.0, 0.0, 0.0, 0.0, np.nan),
+            ],
+        ),
+        (
+            # nada considerado: participação zero; mesmo CPF e dia contam uma vez
+            [("Bia", "1", 3, 100, 0), ("Bia", "1", 3, 100, 0), ("Ana", "2", 4, 50, 0)],
+            [("Bia", "1", 3, 100, 100)],
+            1,
+            [
+                ("Ana", 1, 1, 1, 0.5, 0.0, 0.0, 0.0, 0.0, np.nan),
+                ("Bia", 2, 1, 1, 2.0, 0.0, 0.0, 0.0, 0.0, -1.0),
+            ],
+        ),
+        (
+            # período de 0 dias conta como 1 na média diária
+            [("Caio", "1", 1, 700, 700)],
+            [],
+            0,
+            [("Caio", 1, 1, 1, 7.0, 7.0, 7.0, 7.0, 1.0, np.nan)],
+        ),
+    ],
+)
+def test_performance_por_digitador(atual, anterior, dias_periodo, esperado):
+    df = agregacao.performance_por_digitador(_producao(atual), _producao(anterior), dias_periodo)
+
+    colunas = [
+        "digitador", "qtd_propostas", "qtd_clientes", "dias_ativos", "valor_bruto", "valor_considerado",
+        "ticket_medio", "media_diaria", "participacao", "crescimento",
+    ]
+    pd.testing.assert_frame_equal(df, pd.DataFrame(esperado, columns=colunas), check_dtype=False)
@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import auditoria
+from db import executar_escrita, leitura
+
+USUARIOS = ["admin", "jose", "maria"]
+
+
+@pytest.fixture
+def logs(banco):
+    """
+    60 linhas de log em ordem de horário, de 3 em 3 horas a partir de
+    10/01/2025 (dias 10 a 19), com um buraco nos dias 13 e 14.
+    """
+    linhas, horario = [], datetime(2025, 1, 10, 1, 30)
+    while len(linhas) < 60:
+        if horario.day not in (13, 14):
+            i = len(linhas)
+            linhas.append((i % 7 + 1, auditoria.ACOES[i % 3], USUARIOS[i // 2 % 3], horario.isoformat(sep=" "), f"log {i}"))
+        horario += timedelta(hours=3)
+
+    executar_escrita(lambda conn: conn.executemany(
+        "INSERT INTO log_propostas (proposta_id, acao, usuario, timestamp, detalhes) VALUES (?, ?, ?, ?, ?);",
+        linhas,
+    ))
+    with leitura() as conn:
+        return auditoria.intervalo_logs(conn)
+
+
+def _esperado(conn, acao=None, usuario=None, proposta_id=None, data_inicial=None, data_final=None):
+    """Mesmo filtro direto no timestamp, sem a conversão para faixa de ids."""
+    condicoes, params = ["1 = 1"], []
+    for coluna, valor in [("acao", acao), ("usuario", usuario), ("proposta_id", proposta_id)]:
+        if valor is not None:
+            condicoes.append(f"{coluna} = ?")
+            params.append(valor)
+    if data_inicial is not None:
+        condicoes.append("timestamp >= ?")
+        params.append(data_inicial.isoformat())
+    if data_final is not None:
+        condicoes.append("timestamp < ?")
+        params.append((data_final + timedelta(days=1)).isoformat())
+    linhas = conn.execute(
+        f"SELECT id FROM log_propostas WHERE {' AND '.join(condicoes)} ORDER BY id DESC;", params
+    ).fetchall()
+    return [i for (i,) in linhas]
+
+
+@pytest.mark.parametrize(
+    "filtro",
+    [
+        {},
+        {"data_inicial": date(2025, 1, 11), "data_final": date(2025, 1, 15)},
+        {"data_inicial": date(2025, 1, 12), "data_final": date(2025, 1, 12)},
+        # período só com o buraco, e pontas caindo no buraco
+        {"data_inicial": date(2025, 1, 13), "data_final": date(2025, 1, 14)},
+        {"data_inicial": date(2025, 1, 13), "data_final": date(2025, 1, 16)},
+        {"data_inicial": date(2025, 1, 1), "data_final": date(2025, 1, 14)},
+        # período que cobre o log todo (filtro de data omitido)
+        {"data_inicial": date(2025, 1, 1), "data_final": date(2025, 12, 31)},
+        {"usuario": "jose"},
+        {"usuario": "maria", "data_inicial": date(2025, 1, 11), "data_final": date(2025, 1, 16)},
+        {"usuario": "ninguem"},
+        {"acao": "UPDATE", "proposta_id": 3, "data_inicial": date(2025, 1, 15)},
+    ],
+)
+def test_paginas_do_log_batem_com_o_filtro_no_timestamp(logs, filtro):
+    where, params = auditoria.montar_filtro_logs(limites=logs, **filtro)
+
+    with leitura() as conn:
+        esperado = _esperado(conn, **filtro)
+        for tamanho in (1, 4, 100):
+            ids, apos = [], None
+            while True:
+                pagina, apos = auditoria.pagina_logs(where, params, conn, tamanho=tamanho, apos=apos)
+                assert len(pagina) == tamanho or apos is None
+                ids += pagina["id"].tolist()
+                if apos is None:
+                    break
+            assert ids == esperado
+
+
+def test_intervalo_e_usuarios_do_log(logs):
+    assert logs == (date(2025, 1, 10), date(2025, 1, 19))
+    with leitura() as conn:
+        assert auditoria.usuarios_do_log(conn) == USUARIOS
@@ -0,0 +1,85 @@
+import cache_propostas
+import filtros
+from db import executar_escrita, leitura
+
+
+def _inserir(conn, cpf, dia=20119, valor_centavos=1000, banco_id=1):
+    conn.execute(
+        """
+        INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+        VALUES (1, 'ADE', ?, ?, 2, 'FGTS', ?, ?);
+        """,
+        (cpf, dia, valor_centavos, banco_id),
+    )
+
+
+def test_alterar_o_frame_de_uma_sessao_nao_muda_o_compartilhado(banco):
+    executar_escrita(lambda conn: [_inserir(conn, f"{i:011d}", valor_centavos=100 * i) for i in range(1, 4)])
+
+    with leitura() as conn:
+        sessao = filtros.consultar_propostas("", [], conn)
+        sessao.loc[:, "valor_centavos"] = 0
+        sessao["valor_considerado"] *= 2
+        sessao.iloc[0, sessao.columns.get_loc("cpf")] = "00000000001"
+
+        outra = filtros.consultar_propostas("", [], conn)
+        cache = cache_propostas.get_cache_propostas().obter(conn)
+
+    assert outra["valor_centavos"].tolist() == [300, 200, 100]
+    assert outra["valor_considerado"].tolist() == [3.0, 2.0, 1.0]
+    assert cache["cpf"].astype(str).tolist() == ["00000000003", "00000000002", "00000000001"]
+
+
+def _fixar_snapshot(conn):
+    # sob WAL o snapshot da transação de leitura é fixado na primeira consulta
+    conn.execute("SELECT COUNT(*) FROM propostas;").fetchone()
+
+
+def test_leitura_com_snapshot_anterior_nao_volta_o_cache(banco):
+    executar_escrita(lambda conn: _inserir(conn, "00000000001"))
+    cache = cache_propostas.get_cache_propostas()
+
+    with leitura() as antiga:
+        _fixar_snapshot(antiga)
+        executar_escrita(lambda conn: _inserir(conn, "00000000002"))
+        with leitura() as nova:
+            assert len(cache.obter(nova)) == 2
+        _, versao, ultimo_seq = cache.estado()
+
+        assert len(cache.obter(antiga)) == 2
+        assert cache.estado()[1:] == (versao, ultimo_seq)
+
+    with leitura() as nova:
+        assert len(cache.obter(nova)) == 2
+    assert cache.metricas()["cargas_completas"] == 1
+
+
+def test_cadastro_alterado_entre_snapshots_nao_recarrega_no_snapshot_antigo(banco):
+    executar_escrita(lambda conn: _inserir(conn, "00000000001"))
+    cache = cache_propostas.get_cache_propostas()
+    with leitura() as conn:
+        cache.obter(conn)
+
+    with leitura() as antiga:
+        _fixar_snapshot(antiga)
+        executar_escrita(lambda conn: conn.execute("UPDATE usuarios SET nome_exibicao = 'Admin Novo' WHERE id = 1;"))
+        with leitura() as nova:
+            assert cache.obter(nova)["digitador"].tolist() == ["Admin Novo"]
+        assert cache.metricas()["cargas_completas"] == 2
+
+        # antes: recarregava tudo no snapshot antigo, e de novo no próximo rerun
+        assert cache.obter(antiga)["digitador"].tolist() == ["Admin Novo"]
+        with leitura() as nova:
+            cache.obter(nova)
+    assert cache.metricas()["cargas_completas"] == 2
+
+
+def test_base_completa_de_snapshot_anterior_nao_volta_o_resultado(banco):
+    executar_escrita(lambda conn: _inserir(conn, "00000000001"))
+
+    with leitura() as antiga:
+        _fixar_snapshot(antiga)
+        executar_escrita(lambda conn: _inserir(conn, "00000000001"))
+        with leitura() as nova:
+            assert filtros.consultar_propostas("", [], nova)["valor_considerado_centavos"].tolist() == [0, 0]
+        assert filtros.consultar_propostas("", [], antiga)["valor_considerado_centavos"].tolist() == [0, 0]
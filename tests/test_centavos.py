@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+import importacao
+import migracoes
+from db import conexao, reais_para_centavos
+
+# (valor em reais, centavos): meio centavo sempre para cima, inclusive
+# onde float * 100 fica logo abaixo do meio (0.285 * 100 = 28.4999...)
+CASOS = [(0.285, 29), (2.675, 268), (1.005, 101), (1500.5, 150050), (0.1, 10)]
+
+
+@pytest.mark.parametrize(("valor", "centavos"), CASOS)
+def test_reais_para_centavos(valor, centavos):
+    assert reais_para_centavos(valor) == centavos
+    assert reais_para_centavos(str(valor)) == centavos
+
+
+def test_importacao_usa_a_mesma_conversao(banco):
+    with conexao() as conn:
+        parceiro = conn.execute("SELECT descricao, id FROM parceiros WHERE ativo = 1 LIMIT 1;").fetchone()
+        banco_ = conn.execute("SELECT descricao, id FROM bancos WHERE ativo = 1 LIMIT 1;").fetchone()
+    planilha = pd.DataFrame({
+        "ade": [f"A{i}" for i in range(len(CASOS) + 1)],
+        "cpf": [f"{i:011d}" for i in range(len(CASOS) + 1)],
+        "data": ["2025-01-31"] * (len(CASOS) + 1),
+        "parceiro": [parceiro[0]] * (len(CASOS) + 1),
+        "banco": [banco_[0]] * (len(CASOS) + 1),
+        # texto no formato da tela de Lançamento; a última fica sem valor
+        "valor": [str(v).replace(".", ",") for v, _ in CASOS] + [""],
+    })
+    validas, erros = importacao.validar_propostas(
+        planilha, {parceiro[0]: parceiro[1]}, {banco_[0]: banco_[1]}, {"Administrador": 1}, [], "Administrador"
+    )
+    assert erros.empty
+
+    importacao.importar_propostas(validas, "admin", "teste.csv")
+
+    with conexao() as conn:
+        gravados = [c for (c,) in conn.execute("SELECT valor_centavos FROM propostas ORDER BY id;")]
+    assert gravados == [c for _, c in CASOS] + [None]
+
+
+def test_migracao_4_usa_a_mesma_conversao(banco_legado):
+    banco_legado([
+        ("Administrador", f"A{i}", f"{i:011d}", "2025-01-31", "PARCEIRO", None, valor, "BANCO")
+        for i, (valor, _) in enumerate(CASOS + [(None, None)])
+    ])
+    migracoes.garantir_schema()
+
+    with conexao() as conn:
+        gravados = [c for (c,) in conn.execute("SELECT valor_centavos FROM propostas ORDER BY id;")]
+    assert gravados == [c for _, c in CASOS] + [None]
+
+
+def test_migracao_4_recusa_valor_que_nao_e_numero(banco_legado):
+    banco_legado([("Administrador", "A1", "00000000001", "2025-01-31", "PARCEIRO", None, "abc", "BANCO")])
+
+    with pytest.raises(ValueError, match="valor inválido"):
+        migracoes.garantir_schema()
@@ -0,0 +1,71 @@
+import pandas as pd
+
+from db import executar_escrita, leitura
+from filtros import divergencias_cpf_stats
+from importacao import importar_propostas
+
+
+def _inserir(conn, cpf):
+    return conn.execute(
+        """
+        INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+        VALUES (1, 'ADE', ?, 20119, 2, 'FGTS', 1000, 1);
+        """,
+        (cpf,),
+    ).lastrowid
+
+
+def _stats():
+    with leitura() as conn:
+        assert divergencias_cpf_stats(conn) == 0
+        return dict(conn.execute("SELECT cpf, qtd FROM cpf_stats;").fetchall())
+
+
+def test_insert_e_delete_contam_e_o_ultimo_apaga_a_linha(banco):
+    a1, a2, b1 = executar_escrita(lambda conn: [_inserir(conn, c) for c in ("111", "111", "222")])
+    assert _stats() == {"111": 2, "222": 1}
+
+    executar_escrita(lambda conn: conn.execute("DELETE FROM propostas WHERE id = ?;", (a1,)))
+    assert _stats() == {"111": 1, "222": 1}
+
+    executar_escrita(lambda conn: conn.execute("DELETE FROM propostas WHERE id IN (?, ?);", (a2, b1)))
+    assert _stats() == {}
+
+
+def test_troca_de_cpf_move_a_contagem(banco):
+    a1, _, b1 = executar_escrita(lambda conn: [_inserir(conn, c) for c in ("111", "111", "222")])
+
+    executar_escrita(lambda conn: conn.execute("UPDATE propostas SET cpf = '222' WHERE id = ?;", (a1,)))
+    assert _stats() == {"111": 1, "222": 2}
+
+    # a única do 333 some do cpf_stats quando o CPF muda
+    executar_escrita(lambda conn: conn.execute("UPDATE propostas SET cpf = '333' WHERE id = ?;", (b1,)))
+    executar_escrita(lambda conn: conn.execute("UPDATE propostas SET cpf = '444' WHERE id = ?;", (b1,)))
+    assert _stats() == {"111": 1, "222": 1, "444": 1}
+
+    # UPDATE que não muda o CPF não mexe na contagem
+    executar_escrita(lambda conn: conn.execute("UPDATE propostas SET cpf = cpf, valor_centavos = 1;"))
+    assert _stats() == {"111": 1, "222": 1, "444": 1}
+
+
+def test_importacao_em_lote(banco):
+    executar_escrita(_inserir, "00000000001")
+    cpfs = ["00000000001", "00000000002", "00000000002"] + [f"{i:011d}" for i in range(10, 1010)]
+    validas = pd.DataFrame({
+        "digitador": "Administrador",
+        "digitador_id": 1,
+        "ade": [f"A{i}" for i in range(len(cpfs))],
+        "cpf": cpfs,
+        "data": "2025-01-31",
+        "parceiro": "1@EVOLVE SOLUÇÕES LTDA",
+        "parceiro_id": 2,
+        "tipo_produto": "FGTS",
+        "valor": 10.0,
+        "banco": "C6 - DG",
+        "banco_id": 1,
+    })
+
+    assert importar_propostas(validas, usuario="admin") == len(cpfs)
+    stats = _stats()
+    assert len(stats) == 1002
+    assert (stats["00000000001"], stats["00000000002"], stats["00000000010"]) == (2, 2, 1)
@@ -0,0 +1,41 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import db
+
+
+def test_falha_ao_abrir_a_conexao_nao_trava_quem_espera(processo):
+    fila = db.FilaEscrita(caminho=str(processo / "nao_existe" / "propostas.db"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        fila.enviar(lambda conn: 1).result(timeout=5)
+    assert fila.metricas()["falhas_thread"] >= 1
+
+    # o diretório passa a existir: a próxima gravação sobe outra thread
+    (processo / "nao_existe").mkdir()
+    assert fila.enviar(lambda conn: conn.execute("SELECT 42;").fetchone()[0]).result(timeout=5) == 42
+
+
+def test_timeout_cancela_a_gravacao_que_ainda_esta_na_fila(processo):
+    liberar = threading.Event()
+    gravou = []
+
+    ocupada = db.get_fila_escrita().enviar(lambda conn: liberar.wait(5))
+    with pytest.raises(TimeoutError):
+        db.executar_escrita(lambda conn: gravou.append(1), timeout=0.2)
+    liberar.set()
+
+    ocupada.result(timeout=5)
+    assert db.executar_escrita(lambda conn: "ok") == "ok"
+    assert gravou == []
+
+
+def test_gravacao_que_ja_comecou_nao_sofre_timeout(processo):
+    def demorada(conn):
+        time.sleep(0.5)
+        return "gravada"
+
+    assert db.executar_escrita(demorada, timeout=0.1) == "gravada"
@@ -0,0 +1,157 @@
+import random
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import filtros
+from db import data_para_dia, executar_escrita, leitura
+
+DIAS = [date(2025, 1, d) for d in (6, 7, 8, 10, 13)]
+DIGITADORES = ["Administrador", "José Digitador", "Maria Digitadora"]
+
+
+@pytest.fixture
+def propostas(banco):
+    """50 propostas em poucos dias (muitos empates de data), com nulos em tipo e valor."""
+    sorteio = random.Random(0)
+
+    def gravar(conn):
+        conn.executemany(
+            "INSERT INTO usuarios (usuario, nome_exibicao, senha_hash, perfil) VALUES (?, ?, '!', 'digitador');",
+            [("jose", DIGITADORES[1]), ("maria", DIGITADORES[2])],
+        )
+        for i in range(50):
+            conn.execute(
+                """
+                INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+                """,
+                (
+                    sorteio.randint(1, 3),
+                    sorteio.choice(["ADE%1", "ADE_2", "ade-3", "X9"]) + str(i),
+                    f"{sorteio.randrange(1, 30) * 1234567:011d}",
+                    data_para_dia(sorteio.choice(DIAS)),
+                    sorteio.randint(2, 4),
+                    sorteio.choice([None, "FGTS", "CLT"]),
+                    sorteio.choice([None, 100, 12345]),
+                    sorteio.randint(1, 3),
+                ),
+            )
+
+    executar_escrita(gravar)
+
+
+def _percorrer(where, params, conn, **ordem):
+    """
+    Anda pelas páginas para frente guardando a chave de início de cada uma
+    (como a tela) e depois volta da última para a primeira com as mesmas
+    chaves. Devolve as páginas.
+    """
+    inicios, paginas = [None], []
+    while True:
+        pagina, proxima = filtros.pagina_propostas(where, params, conn, apos=inicios[-1], **ordem)
+        paginas.append(pagina)
+        assert len(pagina) == ordem["tamanho"] or proxima is None
+        if proxima is None:
+            break
+        inicios.append(proxima)
+
+    for inicio, pagina in zip(reversed(inicios), reversed(paginas)):
+        de_volta, _ = filtros.pagina_propostas(where, params, conn, apos=inicio, **ordem)
+        assert de_volta["id"].tolist() == pagina["id"].tolist()
+    return paginas
+
+
+@pytest.mark.parametrize("crescente", [False, True])
+@pytest.mark.parametrize("ordem", list(filtros.ORDENACOES))
+def test_paginas_cobrem_o_resultado_sem_buracos_nem_repeticoes(propostas, ordem, crescente):
+    colunas = list(dict.fromkeys([filtros.ORDENACOES[ordem], "id"]))
+    with leitura() as conn:
+        for where, params in [("", []), filtros.montar_filtro(banco="C6 - DG"), ("id < 0", [])]:
+            todas = filtros.consultar_propostas(where, params, conn)
+            esperado = todas.sort_values(colunas, ascending=crescente).set_index("id")
+
+            # 10 divide o total: a última página sai cheia e sem próxima
+            for tamanho in (4, 10, 100):
+                paginas = _percorrer(where, params, conn, ordem=ordem, crescente=crescente, tamanho=tamanho)
+                assert len(paginas) == max(1, -(-len(esperado) // tamanho))
+
+                obtido = pd.concat(paginas).set_index("id")
+                assert obtido.index.tolist() == esperado.index.tolist()
+                # regra de CPF da base inteira, como no resultado completo
+                assert obtido["valor_considerado_centavos"].tolist() == esperado["valor_considerado_centavos"].tolist()
+
+
+def _filtro_antigo(df, data_inicial, data_final, digitador="", cpf="", ade="", id_contem="",
+                   parceiro="Todos", banco="Todos", tipo_produto="Todos"):
+    """Filtragem que as telas faziam no pandas, sobre a base inteira carregada."""
+    df = df[(df["data"] >= pd.Timestamp(data_inicial)) & (df["data"] <= pd.Timestamp(data_final))]
+    if digitador:
+        df = df[df["digitador"].str.contains(digitador, case=False, na=False)]
+    if cpf:
+        df = df[df["cpf"].astype(str).str.contains(cpf, case=False, na=False)]
+    if ade:
+        df = df[df["ade"].str.contains(ade, case=False, na=False, regex=False)]
+    if id_contem:
+        df = df[df["id"].astype(str).str.contains(id_contem, na=False)]
+    if parceiro != "Todos":
+        df = df[df["parceiro"] == parceiro]
+    if banco != "Todos":
+        df = df[df["banco"] == banco]
+    if tipo_produto != "Todos":
+        df = df[df["tipo_produto"] == tipo_produto]
+    return df
+
+
+@pytest.mark.parametrize(
+    "filtro",
+    [
+        # fim do período inclusivo: o último dia entra inteiro
+        {"data_inicial": DIAS[1], "data_final": DIAS[3]},
+        {"data_inicial": DIAS[2], "data_final": DIAS[2]},
+        # período sem propostas entre dois dias com propostas
+        {"data_inicial": date(2025, 1, 11), "data_final": date(2025, 1, 12)},
+        {"parceiro": "Todos", "banco": "Todos", "tipo_produto": "Todos"},
+        {"banco": "C6 - DG", "tipo_produto": "FGTS", "data_inicial": DIAS[0], "data_final": DIAS[3]},
+        {"parceiro": "2@JOSE WALTER PEREIRA BATISTA", "banco": "DIGIO - DG (209271)"},
+        {"parceiro": "PARCEIRO QUE NÃO EXISTE"},
+        {"tipo_produto": "CLT", "digitador": "DIGITADOR"},
+        {"digitador": "josé"},
+        {"cpf": f"{7 * 1234567:011d}"},
+        {"cpf": "345"},
+        {"ade": "%1"},
+        {"ade": "e_2", "banco": "C6 - DG"},
+        {"ade": "ade-"},
+        {"id_contem": "1", "tipo_produto": "FGTS"},
+    ],
+)
+def test_filtro_no_sql_igual_ao_filtro_antigo_no_pandas(propostas, filtro):
+    with leitura() as conn:
+        limites = filtros.intervalo_datas(conn)
+        base = filtros.consultar_propostas("", [], conn)
+        periodo = {"data_inicial": limites[0], "data_final": limites[1], **filtro}
+
+        where, params = filtros.montar_filtro(limites=limites, **periodo)
+        obtido = filtros.consultar_propostas(where, params, conn)
+        resumo = filtros.resumir_propostas(where, params, conn)
+
+    esperado = _filtro_antigo(base, **periodo)
+    assert obtido["id"].tolist() == esperado["id"].tolist()
+    assert resumo == {
+        "qtd": len(esperado),
+        "valor_centavos": int(esperado["valor_centavos"].sum()),
+        "valor_considerado_centavos": int(esperado["valor_considerado_centavos"].sum()),
+    }
+
+
+def test_periodo_que_cobre_a_base_e_todos_nao_filtram(propostas):
+    with leitura() as conn:
+        limites = filtros.intervalo_datas(conn)
+
+    assert limites == (DIAS[0], DIAS[-1])
+    assert filtros.montar_filtro(date(2024, 1, 1), date(2026, 1, 1), limites=limites) == ("", [])
+    assert filtros.montar_filtro(*limites, limites=limites, parceiro="Todos", banco="Todos", tipo_produto="Todos",
+                                 digitador=" ", cpf="", ade="", id_contem="") == ("", [])
+    # sem os limites da base o período sempre filtra, com as pontas em número do dia
+    assert filtros.montar_filtro(DIAS[0], DIAS[1]) == ("data BETWEEN ? AND ?", [20094, 20095])
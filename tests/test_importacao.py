@@ -0,0 +1,70 @@
+import io
+
+import pandas as pd
+
+import importacao
+
+PARCEIROS = {"1@EVOLVE SOLUÇÕES LTDA": 2}
+BANCOS = {"BANCO TESTE": 1}
+DIGITADORES = {"Administrador": 1}
+TIPOS = ["FGTS", "CLT"]
+
+
+def _validar(df):
+    return importacao.validar_propostas(df, PARCEIROS, BANCOS, DIGITADORES, TIPOS, "Administrador")
+
+
+def _planilha(**colunas):
+    base = {
+        "ade": ["A1"],
+        "cpf": ["01234567890"],
+        "data": ["2025-01-31"],
+        "parceiro": ["1@EVOLVE SOLUÇÕES LTDA"],
+        "banco": ["BANCO TESTE"],
+    }
+    base.update(colunas)
+    return pd.DataFrame(base)
+
+
+def test_cpf_numerico_do_excel_recupera_os_zeros_a_esquerda():
+    arquivo = io.BytesIO()
+    _planilha(cpf=[1234567890], ade=["A1"]).to_excel(arquivo, index=False)
+    arquivo.seek(0)
+
+    df = importacao.ler_planilha(arquivo, "propostas.xlsx")
+    validas, erros = _validar(df)
+
+    assert erros.empty
+    assert validas["cpf"].tolist() == ["01234567890"]
+
+
+def test_cpf_com_mascara_fica_so_com_os_digitos():
+    df = _planilha(cpf=["012.345.678-90", "", "1234567890123"], ade=["A1", "A2", "A3"],
+                   data=["2025-01-31"] * 3, parceiro=["1@EVOLVE SOLUÇÕES LTDA"] * 3, banco=["BANCO TESTE"] * 3)
+    validas, erros = _validar(df)
+
+    assert validas["cpf"].tolist() == ["01234567890"]
+    assert erros["erro"].tolist() == ["CPF não preenchido", "CPF com mais de 11 dígitos"]
+
+
+def test_cpf_numerico_que_nao_e_inteiro_de_11_digitos_e_invalido():
+    df = _planilha(cpf=[1234567890.5, 1e20, True, -1, 1234567890.0], ade=["A1", "A2", "A3", "A4", "A5"],
+                   data=["2025-01-31"] * 5, parceiro=["1@EVOLVE SOLUÇÕES LTDA"] * 5, banco=["BANCO TESTE"] * 5)
+    validas, erros = _validar(df.astype({"cpf": object}))
+
+    assert validas["cpf"].tolist() == ["01234567890"]
+    assert erros["linha"].tolist() == [2, 3, 4, 5]
+    assert set(erros["erro"]) == {"CPF inválido"}
+
+
+def test_data_numerica_do_excel_e_data_serial():
+    arquivo = io.BytesIO()
+    _planilha(data=[45000, True], ade=["A1", "A2"], cpf=["01234567890"] * 2,
+              parceiro=["1@EVOLVE SOLUÇÕES LTDA"] * 2, banco=["BANCO TESTE"] * 2).to_excel(arquivo, index=False)
+    arquivo.seek(0)
+
+    df = importacao.ler_planilha(arquivo, "propostas.xlsx")
+    validas, erros = _validar(df)
+
+    assert validas["data"].tolist() == ["2023-03-15"]
+    assert erros["erro"].tolist() == ["Data inválida"]
@@ -0,0 +1,24 @@
+import db
+import manutencao
+from db import conexao, executar_escrita
+
+
+def test_incremental_vacuum_roda_na_fila_de_escrita(banco):
+    def encher(conn):
+        conn.execute("CREATE TABLE lixo (x TEXT);")
+        conn.executemany("INSERT INTO lixo VALUES (?);", [("x" * 1000,)] * 2000)
+
+    executar_escrita(encher)
+    executar_escrita(lambda conn: conn.execute("DROP TABLE lixo;"))
+    with conexao() as conn:
+        (livres_antes,) = conn.execute("PRAGMA freelist_count;").fetchone()
+    commits_antes = db.metricas_escrita()["commits"]
+
+    resultado = manutencao.TAREFAS["incremental_vacuum"]()
+
+    with conexao() as conn:
+        (livres_depois,) = conn.execute("PRAGMA freelist_count;").fetchone()
+    devolvidas = min(livres_antes, manutencao.PAGINAS_VACUUM)
+    assert livres_depois == livres_antes - devolvidas
+    assert resultado["obs"] == f"{devolvidas} de {livres_antes} páginas livres devolvidas"
+    assert db.metricas_escrita()["commits"] == commits_antes + 1
@@ -0,0 +1,32 @@
+import migracoes
+from db import conexao
+
+
+def test_banco_legado_chega_na_versao_atual(banco_legado):
+    banco_legado([("Administrador", "A1", "00000000001", "2025-01-31", "PARCEIRO", "FGTS", 10.5, "BANCO")])
+    migracoes.garantir_schema()
+
+    with conexao() as conn:
+        assert migracoes.versao_schema(conn) == migracoes.VERSAO_ATUAL
+        assert conn.execute("SELECT digitador, data, valor_centavos, banco FROM vw_propostas;").fetchall() == [
+            ("Administrador", 20119, 1050, "BANCO"),
+        ]
+
+
+def test_digitador_sem_usuario_nao_colide_com_login_legado_existente(banco_legado):
+    banco_legado(
+        [
+            ("Fulano Antigo", "A1", "00000000001", "2025-01-31", "PARCEIRO", None, None, "BANCO"),
+            ("Beltrano Antigo", "A2", "00000000002", "2025-01-31", "PARCEIRO", None, None, "BANCO"),
+        ],
+        usuarios=[("legado_1", "Usuária Real"), ("legado_3", "Outro Real")],
+    )
+    migracoes.garantir_schema()
+
+    with conexao() as conn:
+        usuarios = dict(conn.execute("SELECT nome_exibicao, usuario FROM usuarios;").fetchall())
+        digitadores = [d for (d,) in conn.execute("SELECT digitador FROM vw_propostas ORDER BY id;")]
+    assert usuarios["Usuária Real"] == "legado_1"
+    assert usuarios["Outro Real"] == "legado_3"
+    assert {usuarios["Beltrano Antigo"], usuarios["Fulano Antigo"]} == {"legado_2", "legado_4"}
+    assert digitadores == ["Fulano Antigo", "Beltrano Antigo"]
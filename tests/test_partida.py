@@ -0,0 +1,62 @@
+import json
+import subprocess
+import sys
+import textwrap
+
+from conftest import RAIZ
+
+# Roda num processo novo: no do pytest o pandas já foi importado pelos
+# outros testes, e a partida medida é a de um servidor recém-iniciado
+SCRIPT = textwrap.dedent(
+    """
+    import json
+    import sys
+
+    sys.path.insert(0, {raiz!r})
+    from streamlit.testing.v1 import AppTest
+
+    import recursos
+
+    def etapa(nome):
+        return next(l for l in recursos.metricas_partida() if l["etapa"] == nome)
+
+    at = AppTest.from_file({app!r}, default_timeout=60)
+    at.run()
+    resultado = {{
+        "excecoes": [e.value for e in at.exception],
+        "campos_login": [t.label for t in at.sidebar.text_input],
+        "pandas_antes_do_login": "pandas" in sys.modules,
+        "login": etapa("login"),
+    }}
+
+    at.sidebar.text_input[0].input("admin")
+    at.sidebar.text_input[1].input("admin")
+    at.sidebar.button[0].click()
+    at.run()
+    resultado["excecoes"] += [e.value for e in at.exception]
+    resultado["pandas_depois_do_login"] = "pandas" in sys.modules
+    resultado["modulos_telas"] = etapa("modulos_telas")
+    print(json.dumps(resultado))
+    """
+)
+
+
+def test_tela_de_login_sobe_sem_pandas_e_dentro_do_orcamento(tmp_path):
+    import recursos
+
+    script = SCRIPT.format(raiz=str(RAIZ), app=str(RAIZ / "app.py"))
+    saida = subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path, capture_output=True, text=True, timeout=180, check=True
+    )
+    resultado = json.loads(saida.stdout.strip().splitlines()[-1])
+
+    assert resultado["excecoes"] == []
+    assert resultado["campos_login"] == ["Usuário", "Senha"]
+    assert not resultado["pandas_antes_do_login"]
+    assert resultado["pandas_depois_do_login"]
+
+    orcamento = recursos.ORCAMENTO_PARTIDA
+    assert resultado["login"]["execucoes"] == 1
+    assert resultado["login"]["maxima"] <= orcamento["login"], resultado["login"]
+    assert resultado["modulos_telas"]["execucoes"] == 1
+    assert resultado["modulos_telas"]["maxima"] <= orcamento["modulos_telas"], resultado["modulos_telas"]
@@ -0,0 +1,17 @@
+import pytest
+
+import migracoes
+from db import conexao
+
+
+def test_todas_as_consultas_tem_indice_esperado_no_schema(banco):
+    with conexao() as conn:
+        indices = {nome for (nome,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index';")}
+    assert set(migracoes.CONSULTAS_INDICES) <= indices
+
+
+@pytest.mark.parametrize("indice", list(migracoes.CONSULTAS_INDICES))
+def test_consulta_usa_o_indice(banco, indice):
+    with conexao() as conn:
+        planos = {p["indice"]: p for p in migracoes.verificar_planos(conn)}
+    assert planos[indice]["usa_indice"], planos[indice]["plano"]
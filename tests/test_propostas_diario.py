@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+from db import executar_escrita, leitura
+from filtros import divergencias_propostas_diario
+
+
+def _inserir(conn, cpf, dia=20119, valor_centavos=1000, banco_id=1, parceiro_id=2, tipo_produto="FGTS"):
+    return conn.execute(
+        """
+        INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+        VALUES (1, 'ADE', ?, ?, ?, ?, ?, ?);
+        """,
+        (cpf, dia, parceiro_id, tipo_produto, valor_centavos, banco_id),
+    ).lastrowid
+
+
+def _alterar(conn, id_proposta, **colunas):
+    atribuicoes = ", ".join(f"{c} = ?" for c in colunas)
+    conn.execute(f"UPDATE propostas SET {atribuicoes} WHERE id = ?;", (*colunas.values(), id_proposta))
+
+
+def _diario():
+    """{(data, banco_id): (qtd, valor_centavos, valor_considerado_centavos)}"""
+    with leitura() as conn:
+        assert divergencias_propostas_diario(conn) == 0
+        linhas = conn.execute(
+            """
+            SELECT data, banco_id, SUM(qtd), SUM(valor_centavos), SUM(valor_considerado_centavos)
+            FROM propostas_diario GROUP BY 1, 2;
+            """
+        ).fetchall()
+    return {(data, banco_id): tuple(somas) for data, banco_id, *somas in linhas}
+
+
+def test_segunda_proposta_do_cpf_desliga_a_primeira_e_exclusao_religa(banco):
+    primeira = executar_escrita(_inserir, "11111111111", dia=20119, valor_centavos=100)
+    assert _diario() == {(20119, 1): (1, 100, 100)}
+
+    segunda = executar_escrita(_inserir, "11111111111", dia=20120, valor_centavos=200, banco_id=2)
+    assert _diario() == {(20119, 1): (1, 100, 0), (20120, 2): (1, 200, 0)}
+
+    executar_escrita(lambda conn: conn.execute("DELETE FROM propostas WHERE id = ?;", (primeira,)))
+    assert _diario() == {(20120, 2): (1, 200, 200)}
+
+    executar_escrita(lambda conn: conn.execute("DELETE FROM propostas WHERE id = ?;", (segunda,)))
+    assert _diario() == {}
+
+
+def test_troca_de_cpf_move_a_regra_entre_os_dois_cpfs(banco):
+    def gravar(conn):
+        return [
+            _inserir(conn, "11111111111", dia=20119, valor_centavos=100),
+            _inserir(conn, "11111111111", dia=20120, valor_centavos=200),
+            _inserir(conn, "22222222222", dia=20121, valor_centavos=300),
+        ]
+
+    a1, a2, b1 = executar_escrita(gravar)
+    assert _diario() == {(20119, 1): (1, 100, 0), (20120, 1): (1, 200, 0), (20121, 1): (1, 300, 300)}
+
+    # a 2ª do 111 vai para o 222: o 111 fica com uma (volta a contar) e o
+    # 222 ganha a 2ª (as duas deixam de contar)
+    executar_escrita(_alterar, a2, cpf="22222222222")
+    assert _diario() == {(20119, 1): (1, 100, 100), (20120, 1): (1, 200, 0), (20121, 1): (1, 300, 0)}
+
+    # troca para um CPF novo, sem outra proposta
+    executar_escrita(_alterar, b1, cpf="33333333333")
+    assert _diario() == {(20119, 1): (1, 100, 100), (20120, 1): (1, 200, 200), (20121, 1): (1, 300, 300)}
+
+    # CPF igual com outras colunas mudando não mexe na regra
+    executar_escrita(_alterar, a1, cpf="11111111111", data=20121, valor_centavos=150)
+    assert _diario() == {(20120, 1): (1, 200, 200), (20121, 1): (2, 450, 450)}
+
+
+@pytest.mark.parametrize(
+    "colunas",
+    [
+        {"data": 20130},
+        {"banco_id": 3},
+        {"parceiro_id": 3},
+        {"digitador_id": 1, "tipo_produto": None},
+        {"tipo_produto": "CLT"},
+        {"valor_centavos": None},
+        {"valor_centavos": 5000},
+    ],
+)
+def test_alterar_uma_dimensao_move_a_proposta(banco, colunas):
+    def gravar(conn):
+        ids = [_inserir(conn, "11111111111", valor_centavos=100), _inserir(conn, "22222222222", valor_centavos=200)]
+        _inserir(conn, "11111111111", dia=20125, valor_centavos=400)
+        return ids
+
+    sozinha, repetida = executar_escrita(gravar)
+    executar_escrita(_alterar, sozinha, **colunas)
+    executar_escrita(_alterar, repetida, **colunas)
+    _diario()
+
+
+def test_sequencia_aleatoria_confere_com_o_recalculo(banco):
+    sorteio = random.Random(0)
+    cpfs = [f"{i:011d}" for i in range(1, 9)]
+
+    def passo(conn):
+        ids = [i for (i,) in conn.execute("SELECT id FROM propostas;")]
+        acao = sorteio.choice(["insere", "insere", "altera", "troca_cpf", "exclui"]) if ids else "insere"
+        if acao == "insere":
+            _inserir(
+                conn, sorteio.choice(cpfs), dia=20119 + sorteio.randrange(3),
+                valor_centavos=sorteio.choice([None, 100, 250, 1000]), banco_id=sorteio.randint(1, 2),
+                tipo_produto=sorteio.choice([None, "FGTS", "CLT"]),
+            )
+        elif acao == "altera":
+            coluna, valores = sorteio.choice([
+                ("data", [20119, 20120, 20121]),
+                ("banco_id", [1, 2]),
+                ("parceiro_id", [2, 3]),
+                ("tipo_produto", [None, "FGTS", "CLT"]),
+                ("valor_centavos", [None, 100, 700]),
+            ])
+            _alterar(conn, sorteio.choice(ids), **{coluna: sorteio.choice(valores)})
+        elif acao == "troca_cpf":
+            _alterar(conn, sorteio.choice(ids), cpf=sorteio.choice(cpfs))
+        else:
+            conn.execute("DELETE FROM propostas WHERE id = ?;", (sorteio.choice(ids),))
+
+    for _ in range(200):
+        executar_escrita(passo)
+        with leitura() as conn:
+            assert divergencias_propostas_diario(conn) == 0
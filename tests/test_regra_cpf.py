@@ -0,0 +1,79 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import filtros
+from db import data_para_dia, executar_escrita, leitura
+
+# Resultado de um filtro: o CPF 111 tem propostas em dois bancos, o 222
+# duas no mesmo banco, o 333 só uma no período (a outra é de fora) e o 444
+# uma só na base inteira. qtd_cpf = propostas do CPF na base inteira.
+PROPOSTAS = pd.DataFrame({
+    "id": [1, 2, 3, 4, 5, 6],
+    "cpf": pd.Categorical(["11111111111", "11111111111", "22222222222", "22222222222", "33333333333", "44444444444"]),
+    "banco_id": [1, 2, 1, 1, 1, 2],
+    "data": pd.to_datetime(["2025-01-10", "2025-01-20", "2025-01-11", "2025-01-12", "2025-01-13", "2025-01-14"]),
+    "valor_centavos": pd.array([100, 200, 300, 400, 500, 600], dtype="Int64"),
+    "qtd_cpf": [2, 2, 2, 2, 2, 1],
+})
+
+
+@pytest.mark.parametrize(
+    ("escopo", "qtd_cpf", "considerado"),
+    [
+        # base inteira: vale o qtd_cpf que veio com as linhas
+        ("base", [2, 2, 2, 2, 2, 1], [0, 0, 0, 0, 0, 600]),
+        # só as linhas do filtro: o 333 passa a ter uma proposta só
+        ("periodo", [2, 2, 2, 2, 1, 1], [0, 0, 0, 0, 500, 600]),
+        # linhas do filtro no mesmo banco: o 111 tem uma em cada banco
+        ("banco", [1, 1, 2, 2, 1, 1], [100, 200, 0, 0, 500, 600]),
+    ],
+)
+def test_escopos_da_regra(escopo, qtd_cpf, considerado):
+    df = filtros.aplicar_regra_cpf(PROPOSTAS.copy(), escopo)
+
+    assert df["qtd_cpf"].tolist() == qtd_cpf
+    assert df["ignorar_valor"].tolist() == [q > 1 for q in qtd_cpf]
+    assert df["valor_considerado_centavos"].tolist() == considerado
+    assert df["valor_considerado"].tolist() == [c / 100 for c in considerado]
+
+
+def test_valor_nulo_e_considerado_zero():
+    df = PROPOSTAS.copy()
+    df["valor_centavos"] = pd.array([None] * 6, dtype="Int64")
+
+    assert filtros.aplicar_regra_cpf(df, "periodo")["valor_considerado_centavos"].tolist() == [0] * 6
+
+
+def test_escopo_desconhecido():
+    with pytest.raises(ValueError, match="Escopo da regra de CPF desconhecido"):
+        filtros.aplicar_regra_cpf(PROPOSTAS.copy(), "mes")
+
+
+def test_escopo_base_conta_propostas_fora_do_filtro(banco):
+    def gravar(conn):
+        for cpf, dia, valor in [
+            ("11111111111", "2025-01-10", 100),
+            ("11111111111", "2024-06-01", 200),   # fora do período filtrado
+            ("22222222222", "2025-01-11", 300),
+        ]:
+            conn.execute(
+                """
+                INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+                VALUES (1, 'ADE', ?, ?, 2, NULL, ?, 1);
+                """,
+                (cpf, data_para_dia(dia), valor),
+            )
+
+    executar_escrita(gravar)
+    where, params = filtros.montar_filtro(date(2025, 1, 1), date(2025, 1, 31))
+
+    with leitura() as conn:
+        base = filtros.consultar_propostas(where, params, conn, escopo_cpf="base")
+        periodo = filtros.consultar_propostas(where, params, conn, escopo_cpf="periodo")
+        sem_regra = filtros.consultar_propostas(where, params, conn, escopo_cpf=None)
+
+    assert base["valor_considerado_centavos"].tolist() == [300, 0]
+    assert periodo["valor_considerado_centavos"].tolist() == [300, 100]
+    assert not set(filtros.COLUNAS_REGRA_CPF) & set(sem_regra.columns)
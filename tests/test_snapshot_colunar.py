@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import filtros
+import snapshot_colunar
+from db import executar_escrita, leitura
+
+
+def _ida_e_volta(df, pasta, versao=(1, 2), ultimo_seq=7):
+    manifesto = snapshot_colunar.gravar_snapshot(df, versao, ultimo_seq, pasta=str(pasta))
+    aberto, lido = snapshot_colunar.abrir_snapshot(str(pasta))
+    assert lido == manifesto
+    assert (lido["versao"], lido["ultimo_seq"], lido["linhas"]) == (list(versao), ultimo_seq, len(df))
+    # os arrays abertos são np.memmap; copiados para a memória (inclusive
+    # os códigos das category) sem mudar valores nem dtypes
+    aberto = aberto.copy()
+    for coluna in aberto.select_dtypes("category"):
+        aberto[coluna] = pd.Categorical.from_codes(np.array(aberto[coluna].cat.codes), dtype=aberto[coluna].dtype)
+    return aberto
+
+
+def test_tipos_sobrevivem_ao_snapshot(tmp_path):
+    df = pd.DataFrame({
+        "id": np.array([3, 2, 1], dtype="int64"),
+        "taxa": [0.5, np.nan, 1.25],
+        "data": pd.to_datetime(["2025-01-31", None, "2024-02-29"]),
+        "data_s": pd.to_datetime(["2025-01-31", "2025-02-01", None]).astype("datetime64[s]"),
+        "valor_centavos": pd.array([150050, None, 0], dtype="Int64"),
+        "ativo": pd.array([True, None, False], dtype="boolean"),
+        "ade": pd.array(["A-1", None, "ÇÃO ✓"], dtype="str"),
+        "vazio": pd.array(["", "", ""], dtype="str"),
+        # categoria sem uso, nulo (código -1) e categorias de texto com acento
+        "banco": pd.Categorical(["C6", None, "PAN"], categories=["PAN", "C6", "SEM USO"]),
+        "cpf": pd.Categorical(["01234567890", "01234567890", "00000000001"]),
+        "nivel": pd.Categorical(["alto", "baixo", "alto"], categories=["baixo", "alto"], ordered=True),
+        "tipo_produto": pd.Categorical([None, "FGTS", "CRÉDITO"]),
+        "banco_id": pd.Categorical([1, 2, 1]),
+    })
+
+    aberto = _ida_e_volta(df, tmp_path / "snap")
+
+    pd.testing.assert_frame_equal(aberto, df)
+    for coluna in ["banco", "nivel", "banco_id"]:
+        assert aberto[coluna].dtype == df[coluna].dtype
+
+
+def test_frame_vazio_e_regravacao(tmp_path):
+    df = pd.DataFrame({
+        "id": np.array([], dtype="int64"),
+        "ade": pd.array([], dtype="str"),
+        "valor_centavos": pd.array([], dtype="Int64"),
+        "cpf": pd.Categorical([]),
+    })
+    pasta = tmp_path / "snap"
+    pd.testing.assert_frame_equal(_ida_e_volta(df, pasta), df)
+
+    # uma nova geração substitui a anterior no manifesto
+    novo = pd.DataFrame({"id": np.array([1], dtype="int64"), "cpf": pd.Categorical(["1"])})
+    pd.testing.assert_frame_equal(_ida_e_volta(novo, pasta, versao=(2, 2), ultimo_seq=8), novo)
+
+
+def test_sem_snapshot_ou_de_outro_formato(tmp_path):
+    assert snapshot_colunar.abrir_snapshot(str(tmp_path / "nada")) is None
+
+    pasta = tmp_path / "snap"
+    snapshot_colunar.gravar_snapshot(pd.DataFrame({"id": [1]}), (1,), 0, pasta=str(pasta))
+    (pasta / snapshot_colunar.MANIFESTO).write_text('{"formato": 0}', encoding="utf-8")
+    assert snapshot_colunar.abrir_snapshot(str(pasta)) is None
+
+
+def test_tipo_sem_codificacao(tmp_path):
+    with pytest.raises(TypeError, match="sem codificação"):
+        snapshot_colunar.gravar_snapshot(pd.DataFrame({"x": [object()]}), (1,), 0, pasta=str(tmp_path))
+
+
+def test_frame_das_propostas(banco):
+    def gravar(conn):
+        for cpf, tipo, valor in [("01234567890", "FGTS", 100), ("01234567890", None, None), ("99999999999", "CLT", 5)]:
+            conn.execute(
+                """
+                INSERT INTO propostas (digitador_id, ade, cpf, data, parceiro_id, tipo_produto, valor_centavos, banco_id)
+                VALUES (1, 'ADE', ?, 20119, 2, ?, ?, 1);
+                """,
+                (cpf, tipo, valor),
+            )
+
+    executar_escrita(gravar)
+    with leitura() as conn:
+        df = filtros.consultar_propostas("", [], conn)
+
+    pd.testing.assert_frame_equal(_ida_e_volta(df, banco / "snap"), df)
+
+
+def test_base_vazia(banco):
+    # sem propostas as categorias ficam em object
+    with leitura() as conn:
+        df = filtros.consultar_propostas("", [], conn)
+
+    pd.testing.assert_frame_equal(_ida_e_volta(df, banco / "snap"), df)